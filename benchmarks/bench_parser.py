@@ -0,0 +1,90 @@
+"""
+NaturalLanguageParser 吞吐量基准
+
+对比预编译单遍解析器与旧实现（逐个模式 re.search / re.sub）在 10 万行上的耗时。
+parse_many 与逐行调用同一解析器，两者差距只是调用开销和计时抖动；在开发机上
+新解析器约为旧实现的 1.1~1.5 倍（因机器而异），并非此前记录的 1.8 倍。
+用法: python benchmarks/bench_parser.py [--lines 100000]
+"""
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from time_tracker.core.analyzer import NaturalLanguageParser
+
+
+def legacy_parse_natural_timeblock(text):
+    """旧版实现，仅用于对比"""
+    time_patterns = {
+        r'早上|早晨': '07:00',
+        r'上午': '09:00',
+        r'中午': '12:00',
+        r'下午': '14:00',
+        r'晚上': '20:00',
+        r'凌晨': '00:00'
+    }
+    duration_pattern = r'(\d+)(?:个)?(小时|分钟|min)'
+    time = None
+    for pattern, default_time in time_patterns.items():
+        if re.search(pattern, text):
+            time = default_time
+            break
+    duration_match = re.search(duration_pattern, text)
+    if duration_match:
+        num, unit = duration_match.groups()
+        if unit in ['小时', '个']:
+            duration = f"{num}小时"
+        else:
+            duration = f"{num}min"
+    else:
+        duration = "30min"
+    activity = text
+    for pattern in time_patterns.keys():
+        activity = re.sub(pattern, '', activity)
+    activity = re.sub(duration_pattern, '', activity).strip()
+    if time and activity and duration:
+        return f"{time} {activity} {duration}"
+    return None
+
+
+def generate_lines(n, seed=42):
+    rng = random.Random(seed)
+    periods = ['早上', '上午', '中午', '下午', '晚上', '']
+    activities = ['读书', '跑步', '写代码', '开会', '看电影', '午睡', '学习英语']
+    templates = [
+        lambda: f"{rng.choice(periods)}{rng.choice(activities)}{rng.randint(1, 3)}小时",
+        lambda: f"{rng.choice(periods)}{rng.choice(activities)}{rng.randint(10, 59)}分钟",
+        lambda: f"{rng.randint(6, 22)}点半{rng.choice(activities)}",
+        lambda: f"{rng.randint(6, 20)}点到{rng.randint(21, 23)}点{rng.choice(activities)}",
+        lambda: f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d} {rng.choice(activities)} {rng.randint(10, 90)}min",
+    ]
+    return [rng.choice(templates)() for _ in range(n)]
+
+
+def bench(func, lines):
+    started = time.perf_counter()
+    func(lines)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    lines = generate_lines(args.lines)
+    legacy = bench(lambda ls: [legacy_parse_natural_timeblock(line) for line in ls], lines)
+    single = bench(lambda ls: [NaturalLanguageParser.parse_natural_timeblock(line) for line in ls], lines)
+    batch = bench(NaturalLanguageParser.parse_many, lines)
+    print(f"{args.lines} 行")
+    for name, seconds in [('legacy', legacy), ('parse_natural_timeblock', single), ('parse_many', batch)]:
+        print(f"{name:<26}{seconds * 1000:9.1f} ms {args.lines / seconds:12.0f} 行/秒  x{legacy / seconds:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+情感分析后端对比基准
+
+比较内置中文词典后端与 transformers 后端的加载耗时、单篇延迟和内存占用。
+未安装 transformers 时只测词典后端。
+用法: python benchmarks/bench_sentiment.py [--diaries 200] [--backends lexicon transformers]
+"""
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from time_tracker.core.sentiment import SENTIMENT_BACKENDS, get_sentiment_backend
+
+SENTENCES = [
+    "今天很开心，完成了计划里的所有任务。",
+    "早上跑步之后感觉很轻松。",
+    "下午开会开到很晚，有点累。",
+    "项目进展不顺利，心里有些焦虑。",
+    "和朋友吃了晚饭，聊得很愉快。",
+    "晚上失眠了，特别烦躁。",
+    "读完了一本书，收获很大。",
+    "今天去了超市，买了些水果。",
+]
+
+
+def generate_diaries(n, seed=7):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 15))) for _ in range(n)]
+
+
+def rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != 'darwin' else peak / 1024 / 1024
+
+
+def bench_backend(name, diaries):
+    tracemalloc.start()
+    started = time.perf_counter()
+    backend = get_sentiment_backend(name)
+    backend.analyze(diaries[:1])  # 含模型加载
+    load_s = time.perf_counter() - started
+    started = time.perf_counter()
+    for diary in diaries:
+        backend.analyze([diary])
+    per_diary_ms = (time.perf_counter() - started) / len(diaries) * 1000
+    started = time.perf_counter()
+    backend.analyze(diaries)
+    batch_ms = (time.perf_counter() - started) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'load_s': load_s,
+        'per_diary_ms': per_diary_ms,
+        'batch_ms': batch_ms,
+        'python_peak_mb': peak / 1024 / 1024,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--diaries', type=int, default=200)
+    parser.add_argument('--backends', nargs='+', default=sorted(SENTIMENT_BACKENDS))
+    args = parser.parse_args(argv)
+
+    diaries = generate_diaries(args.diaries)
+    for name in args.backends:
+        try:
+            r = bench_backend(name, diaries)
+        except ImportError as e:
+            print(f"{name:<14}跳过: {e}")
+            continue
+        print(f"{name:<14}加载 {r['load_s']:7.2f} s  单篇 {r['per_diary_ms']:9.3f} ms  "
+              f"批量 {args.diaries} 篇 {r['batch_ms']:9.1f} ms  Python 峰值内存 {r['python_peak_mb']:7.1f} MB")
+    rss = rss_mb()
+    if rss is not None:
+        print(f"进程峰值 RSS {rss:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
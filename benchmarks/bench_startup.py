@@ -0,0 +1,127 @@
+"""
+启动耗时基准
+
+在全新的解释器里分别测量：导入界面模块、导入命令行模块、创建窗口到首屏绘制完成的耗时，
+并检查启动阶段没有加载 PIL / transformers / numpy 等重量级模块，命令行还不能加载 tkinter 和界面模块。
+--check 时与 startup_thresholds.json 比较，超出阈值则以非零状态退出，可直接用于 CI。
+没有图形环境时跳过首屏测量。
+用法: python benchmarks/bench_startup.py [--repeat 5] [--check] [--json out.json]
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+THRESHOLDS_FILE = Path(__file__).resolve().parent / 'startup_thresholds.json'
+
+PROBES = {
+    'import_cli_ms': """
+import time
+started = time.perf_counter()
+import time_tracker.cli
+result = {'ms': (time.perf_counter() - started) * 1000}
+""",
+    'import_main_window_ms': """
+import time
+started = time.perf_counter()
+import time_tracker.ui.main_window
+result = {'ms': (time.perf_counter() - started) * 1000}
+""",
+    'first_paint_ms': """
+import os, time, tempfile
+started = time.perf_counter()
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError:
+    result = {'ms': None, 'skipped': '没有图形环境'}
+else:
+    from time_tracker.ui.main_window import TimeTracker
+    os.chdir(tempfile.mkdtemp())
+    app = TimeTracker(root)
+    root.update()
+    result = {'ms': (time.perf_counter() - started) * 1000}
+    root.destroy()
+""",
+}
+
+SUFFIX = """
+import sys, json
+result['modules'] = [m for m in %r if m in sys.modules]
+print(json.dumps(result))
+"""
+
+
+def run_probe(code, forbidden):
+    output = subprocess.run(
+        [sys.executable, '-c', code + SUFFIX % (forbidden,)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def forbidden_for(name, thresholds):
+    """各项检查的禁止模块：命令行在公共列表之外还不能加载界面"""
+    forbidden = list(thresholds['forbidden_modules'])
+    if name == 'import_cli_ms':
+        forbidden += thresholds.get('cli_forbidden_modules', [])
+    return forbidden
+
+
+def measure(repeat, thresholds):
+    report = {}
+    for name, code in PROBES.items():
+        forbidden = forbidden_for(name, thresholds)
+        runs = [run_probe(code, forbidden) for _ in range(repeat)]
+        times = [r['ms'] for r in runs if r['ms'] is not None]
+        report[name] = {
+            'median': round(statistics.median(times), 1) if times else None,
+            'min': round(min(times), 1) if times else None,
+            'loaded_heavy_modules': sorted(set(m for r in runs for m in r['modules'])),
+        }
+        if not times:
+            report[name]['skipped'] = runs[0].get('skipped')
+    return report
+
+
+def check(report, thresholds):
+    failures = []
+    for name, limit in thresholds['max_ms'].items():
+        median = report.get(name, {}).get('median')
+        if median is not None and median > limit:
+            failures.append(f"{name}: {median}ms 超过阈值 {limit}ms")
+    for name, result in report.items():
+        if result['loaded_heavy_modules']:
+            failures.append(f"{name}: 启动阶段加载了 {', '.join(result['loaded_heavy_modules'])}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help='超过阈值时以状态 1 退出')
+    parser.add_argument('--json', type=Path, help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    thresholds = json.loads(THRESHOLDS_FILE.read_text(encoding='utf-8'))
+    report = measure(args.repeat, thresholds)
+    for name, result in report.items():
+        if result['median'] is None:
+            print(f"{name:<24}跳过（{result.get('skipped')}）")
+        else:
+            print(f"{name:<24}中位数 {result['median']:8.1f} ms  最小 {result['min']:8.1f} ms")
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    if args.check:
+        failures = check(report, thresholds)
+        for failure in failures:
+            print(f"FAIL {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+热点路径基准套件
+
+用 synthetic.py 生成确定性的历史数据（N 年、每天 M 条时间块，含日记和待办），测量：
+parse_time_blocks、parse_natural_timeblock、save_timeblock_df、load_timeblock_df、
+update_time_stat（IncrementalTimeStats，模拟逐字输入）、日数据保存和读取（json / sqlite），
+以及无界面启动（导入命令行和界面模块）。每项取 repeat 次的中位数，另跑一次用 tracemalloc
+记录峰值内存。结果写成 JSON 报告；--compare 与之前的报告对比，变慢或内存增长超过
+--tolerance 时以状态 1 退出，可直接用于 CI。
+用法: python benchmarks/bench_suite.py [--years 3] [--blocks 12] [--repeat 3] [--json out.json]
+                                       [--compare baseline.json] [--only parse_time_blocks ...]
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic import generate_days, natural_lines
+from bench_startup import PROBES, run_probe, forbidden_for, THRESHOLDS_FILE
+from time_tracker.core.analyzer import TimeBlockUtils, NaturalLanguageParser
+from time_tracker.core.stats import IncrementalTimeStats
+from time_tracker.core.storage import get_storage_backend
+
+REPORT_VERSION = 1
+DEFAULT_TOLERANCE = 0.25
+# 低于这个耗时的项目噪声太大，对比时不判定为退化
+MIN_COMPARE_MS = 5.0
+
+CASES = {}
+
+
+def case(name):
+    """注册基准项：函数在计时前做准备工作，返回 (被计时的无参函数, 处理的条数)，
+    需要收尾（如关闭存储后端）时再加一个不计时的清理函数"""
+    def register(func):
+        CASES[name] = func
+        return func
+    return register
+
+
+class Context:
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = Path(workdir)
+        self.days = list(generate_days(args.years, args.blocks, args.seed))
+        self.rows = [row for data in self.days for row in TimeBlockUtils.parse_time_blocks(data.time_blocks, data.date)]
+        self._dirs = 0
+
+    def fresh_dir(self, prefix):
+        self._dirs += 1
+        return self.workdir / f"{prefix}-{self._dirs}"
+
+
+@case('parse_time_blocks')
+def bench_parse_time_blocks(ctx):
+    days = ctx.days
+    return lambda: [TimeBlockUtils.parse_time_blocks(d.time_blocks, d.date) for d in days], len(ctx.rows)
+
+
+@case('parse_natural_timeblock')
+def bench_parse_natural_timeblock(ctx):
+    lines = natural_lines(len(ctx.rows), ctx.args.seed)
+    return lambda: [NaturalLanguageParser.parse_natural_timeblock(line) for line in lines], len(lines)
+
+
+@case('save_timeblock_df')
+def bench_save_timeblock_df(ctx):
+    # 和界面保存时一样按天追加，每次都写到新目录
+    def run():
+        data_dir = ctx.fresh_dir('journal')
+        data_dir.mkdir()
+        for data in ctx.days:
+            TimeBlockUtils.save_timeblock_df(data_dir, TimeBlockUtils.parse_time_blocks(data.time_blocks, data.date))
+    return run, len(ctx.rows)
+
+
+@case('load_timeblock_df')
+def bench_load_timeblock_df(ctx):
+    data_dir = ctx.fresh_dir('journal')
+    data_dir.mkdir()
+    TimeBlockUtils.save_timeblock_df(data_dir, ctx.rows)
+    TimeBlockUtils.compact_timeblock_df(data_dir)
+    return lambda: TimeBlockUtils.load_timeblock_df(data_dir), len(ctx.rows)
+
+
+@case('update_time_stat')
+def bench_update_time_stat(ctx):
+    # 把每天的时间块逐字输入一遍，每个按键统计一次
+    days = ctx.days[:min(len(ctx.days), 30)]
+
+    def run():
+        for data in days:
+            stats = IncrementalTimeStats(data.date)
+            text = data.time_blocks
+            for end in range(1, len(text) + 1):
+                stats.update(text[:end])
+    return run, sum(len(d.time_blocks) for d in days)
+
+
+def store_cases(backend):
+    @case(f'save_day_{backend}')
+    def bench_save(ctx):
+        def run():
+            store = get_storage_backend(ctx.fresh_dir(f'save-{backend}'), backend, fsync='never')
+            for data in ctx.days:
+                store.save_day(data)
+            store.close()
+        return run, len(ctx.days)
+
+    @case(f'load_day_{backend}')
+    def bench_load(ctx):
+        store = get_storage_backend(ctx.fresh_dir(f'load-{backend}'), backend, fsync='never')
+        store.bulk_import(ctx.days, [])
+
+        def run():
+            for data in ctx.days:
+                store.load_day(data.date)
+        return run, len(ctx.days), store.close
+
+
+for _backend in ('json', 'sqlite'):
+    store_cases(_backend)
+
+
+def prepare(name, ctx):
+    """-> (run, items, cleanup)"""
+    run, items, *rest = CASES[name](ctx)
+    return run, items, (rest[0] if rest else lambda: None)
+
+
+def measure_case(name, ctx, repeat, memory=True):
+    times = []
+    items = 0
+    for _ in range(repeat):
+        run, items, cleanup = prepare(name, ctx)
+        try:
+            started = time.perf_counter()
+            run()
+            times.append((time.perf_counter() - started) * 1000)
+        finally:
+            cleanup()
+    result = {
+        'ms': round(statistics.median(times), 2),
+        'min_ms': round(min(times), 2),
+        'items': items,
+        'per_sec': round(items / (statistics.median(times) / 1000)) if min(times) > 0 else None,
+    }
+    if memory:
+        run, _, cleanup = prepare(name, ctx)
+        tracemalloc.start()
+        try:
+            run()
+            result['peak_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024)
+        finally:
+            tracemalloc.stop()
+            cleanup()
+    return result
+
+
+def measure_startup(repeat):
+    thresholds = json.loads(THRESHOLDS_FILE.read_text(encoding='utf-8'))
+    results = {}
+    for name in ('import_cli_ms', 'import_main_window_ms'):
+        times = [run_probe(PROBES[name], forbidden_for(name, thresholds))['ms'] for _ in range(repeat)]
+        results[f"startup_{name[:-3]}"] = {'ms': round(statistics.median(times), 2), 'min_ms': round(min(times), 2)}
+    return results
+
+
+def compare(report, baseline, tolerance):
+    """逐项对比，返回 (说明行, 退化项)"""
+    lines, regressions = [], []
+    for key in ('years', 'blocks', 'seed'):
+        if baseline['meta'].get(key) != report['meta'].get(key):
+            lines.append(f"注意: 参数 {key} 不同（{baseline['meta'].get(key)} -> {report['meta'].get(key)}），对比仅供参考")
+    for name, result in report['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        for field, unit in (('ms', 'ms'), ('peak_kb', 'KB')):
+            if field not in result or not old.get(field):
+                continue
+            ratio = result[field] / old[field] - 1
+            line = f"{name:<28}{field:<8}{old[field]:>12} -> {result[field]:<12}{ratio:+.1%}"
+            noisy = field == 'ms' and max(result[field], old[field]) < MIN_COMPARE_MS
+            if ratio > tolerance and not noisy:
+                regressions.append(f"{name} {field}")
+                line += "  退化"
+            lines.append(line)
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--blocks', type=int, default=12, help='每天的时间块条数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES) + ['startup'], help='只跑这些项目')
+    parser.add_argument('--no-memory', action='store_true', help='不测峰值内存（tracemalloc 会拖慢一倍以上）')
+    parser.add_argument('--json', type=Path, help='把报告写入 JSON 文件')
+    parser.add_argument('--compare', type=Path, help='与之前的 JSON 报告对比')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许的变慢/内存增长比例')
+    args = parser.parse_args(argv)
+
+    names = args.only or sorted(CASES) + ['startup']
+    report = {
+        'version': REPORT_VERSION,
+        'meta': {
+            'years': args.years, 'blocks': args.blocks, 'seed': args.seed, 'repeat': args.repeat,
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = Context(args, workdir)
+        report['meta']['days'] = len(ctx.days)
+        report['meta']['rows'] = len(ctx.rows)
+        print(f"合成数据: {len(ctx.days)} 天，{len(ctx.rows)} 条时间块")
+        for name in names:
+            if name == 'startup':
+                results = measure_startup(args.repeat)
+            else:
+                results = {name: measure_case(name, ctx, args.repeat, memory=not args.no_memory)}
+            for key, result in results.items():
+                report['results'][key] = result
+                extra = f"  {result['per_sec']:>10} 条/秒" if result.get('per_sec') else ''
+                extra += f"  峰值 {result['peak_kb']} KB" if 'peak_kb' in result else ''
+                print(f"{key:<28}{result['ms']:10.1f} ms{extra}")
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding='utf-8'))
+        lines, regressions = compare(report, baseline, args.tolerance)
+        print(f"\n与 {args.compare} 对比（容差 {args.tolerance:.0%}）")
+        for line in lines:
+            print(line)
+        if regressions:
+            print(f"FAIL 退化: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+确定性的合成数据
+
+同样的 seed 和参数总是生成同样的历史：N 年的日数据，每天 M 条时间块、一段日记、几条待办和心情。
+可以只在内存里生成（generate_days），也可以写成 data/<date>.json 日文件（write_day_files），
+供各个基准脚本共用。
+用法: python benchmarks/synthetic.py DATA_DIR [--years 3] [--blocks 12]
+"""
+import sys
+import json
+import random
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from time_tracker.core.models import TimeTrackerData, TaskItem
+from time_tracker.core.analyzer import NaturalLanguageParser
+from time_tracker.core.storage import StorageBackend
+
+ACTIVITIES = ['睡觉', '阅读', '写代码', '跑步', '开会', '吃饭', '通勤', '学习英语', '看电影', '整理房间', '午睡', '散步']
+PERIODS = ['早上', '上午', '中午', '下午', '晚上']
+SENTENCES = [
+    "今天很开心，完成了计划里的所有任务。",
+    "早上跑步之后感觉很轻松。",
+    "下午开会开到很晚，有点累。",
+    "项目进展不顺利，心里有些焦虑。",
+    "和朋友吃了晚饭，聊得很愉快。",
+    "晚上失眠了，特别烦躁。",
+    "读完了一本书，收获很大。",
+    "今天去了超市，买了些水果。",
+]
+TASKS = ['回复邮件', '整理笔记', '买菜', '锻炼', '复习单词', '给家里打电话', '写周报']
+MOODS = ['happy', 'smile', 'neutral', 'sad', 'angry', 'sleepy', 'think']
+START_DATE = date(2020, 1, 1)
+
+
+def day_blocks(rng, blocks):
+    """一天内按时间顺序排开的 blocks 条标准格式时间块"""
+    minute = 6 * 60
+    lines = []
+    step = max(15, (18 * 60) // max(blocks, 1))
+    for _ in range(blocks):
+        duration = rng.randrange(10, step + 1, 5)
+        lines.append(f"{minute // 60 % 24:02d}:{minute % 60:02d} {rng.choice(ACTIVITIES)} "
+                     f"{NaturalLanguageParser.format_duration(duration)}")
+        minute += step
+    return lines
+
+
+def generate_days(years=3, blocks=12, seed=42, start=START_DATE):
+    """逐天生成 TimeTrackerData，同样的参数结果完全相同"""
+    rng = random.Random(seed)
+    for offset in range(round(years * 365)):
+        yield TimeTrackerData(
+            date=(start + timedelta(days=offset)).isoformat(),
+            time_blocks='\n'.join(day_blocks(rng, blocks)),
+            diary=''.join(rng.choice(SENTENCES) for _ in range(rng.randint(0, 12))),
+            tasks=[TaskItem(rng.choice(TASKS), rng.random() < 0.6) for _ in range(rng.randint(0, 5))],
+            mood=rng.choice(MOODS),
+        )
+
+
+def natural_lines(n, seed=42):
+    """自然语言写法的时间块，覆盖时间段、钟点、区间和时长"""
+    rng = random.Random(seed)
+    templates = [
+        lambda: f"{rng.choice(PERIODS)}{rng.choice(ACTIVITIES)}{rng.randint(1, 3)}小时",
+        lambda: f"{rng.choice(PERIODS)}{rng.choice(ACTIVITIES)}{rng.randint(10, 59)}分钟",
+        lambda: f"{rng.randint(6, 22)}点半{rng.choice(ACTIVITIES)}",
+        lambda: f"{rng.randint(6, 20)}点到{rng.randint(21, 23)}点{rng.choice(ACTIVITIES)}",
+        lambda: f"下午{rng.randint(1, 5)}点{rng.choice(ACTIVITIES)}1小时20分钟",
+    ]
+    return [rng.choice(templates)() for _ in range(n)]
+
+
+def write_day_files(data_dir, days):
+    """写成和程序保存格式一致的日文件，返回天数"""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for data in days:
+        with open(data_dir / f"{data.date}.json", 'w', encoding='utf-8') as f:
+            json.dump(StorageBackend.to_dict(data), f, ensure_ascii=False, indent=4)
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('data_dir', type=Path)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--blocks', type=int, default=12, help='每天的时间块条数')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    count = write_day_files(args.data_dir, generate_days(args.years, args.blocks, args.seed))
+    print(f"已生成 {count} 天到 {args.data_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,11 +8,15 @@ setup(
     packages=find_packages(),
     install_requires=[
         'Pillow',
-        'transformers',
     ],
+    extras_require={
+        'fast': ['numpy'],
+        'transformers': ['transformers'],
+    },
     entry_points={
         'console_scripts': [
             'time-tracker=time_tracker.run:main',
+            'time-tracker-cli=time_tracker.cli:main',
         ],
     },
     python_requires='>=3.8',
@@ -0,0 +1,231 @@
+"""
+命令行入口（无界面）
+
+只依赖 time_tracker.core，不导入 tkinter / PIL / transformers，适合脚本和定时任务。
+用法: python -m time_tracker.cli <子命令> ...
+"""
+import sys
+import argparse
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from .core.analyzer import NaturalLanguageParser
+from .core.archive import TimeBlockArchive
+from .core.export import EXPORT_LAYOUTS, DEFAULT_WORKERS, export_markdown, write_markdown, write_time_blocks_csv
+from .core.fileio import FSYNC_POLICIES, atomic_open
+from .core.importer import BulkImporter, IMPORT_FORMATS, DEFAULT_BATCH_ROWS
+from .core.sentiment import SentimentWorker, SENTIMENT_BACKENDS, get_sentiment_backend
+from .core.stats import TimeStatsEngine
+from .core.storage import STORAGE_BACKENDS, get_storage_backend, migrate_storage
+
+logger = logging.getLogger(__name__)
+
+
+def valid_date(value):
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式不正确: {value}")
+    return value
+
+
+def open_store(args):
+    return get_storage_backend(args.data_dir, args.storage, fsync=args.fsync)
+
+
+def format_minutes(minutes):
+    return f"{minutes // 60}小时{minutes % 60}分钟"
+
+
+def cmd_add_block(args):
+    store = open_store(args)
+    lines = []
+    for text in args.blocks:
+        line = NaturalLanguageParser.normalize_line(text)
+        if line is None:
+            print(f"无法识别的时间块: {text}", file=sys.stderr)
+            return 1
+        lines.append(line)
+    added = store.add_time_blocks(args.date, lines)
+    print(f"{args.date}: 新增 {added} 条时间块")
+    return 0
+
+
+def cmd_stats(args):
+    store = open_store(args)
+    with TimeStatsEngine.from_data_dir(args.data_dir, store=store) as engine:
+        if args.by == 'hour':
+            items = [(f"{h:02d}时", mins) for h, mins in enumerate(engine.by_hour(args.start, args.end))]
+        elif args.by == 'weekday':
+            names = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+            items = list(zip(names, engine.by_weekday(args.start, args.end)))
+        elif args.by == 'activity':
+            items = sorted(engine.by_activity(args.start, args.end).items(), key=lambda kv: -kv[1])
+        else:
+            items = sorted(engine.by_period(args.by, args.start, args.end).items())
+    total = 0
+    for key, mins in items:
+        total += mins
+        print(f"{key}\t{mins}\t{format_minutes(mins)}")
+    print(f"合计\t{total}\t{format_minutes(total)}")
+    return 0
+
+
+def cmd_export(args):
+    store = open_store(args)
+    if args.format == 'csv':
+        if args.output:
+            with atomic_open(args.output, fsync=store.fsync, newline='') as f:
+                rows = write_time_blocks_csv(store, f, args.start, args.end)
+            print(f"已导出 {rows} 条时间块到 {args.output}", file=sys.stderr)
+        else:
+            write_time_blocks_csv(store, sys.stdout, args.start, args.end)
+    elif args.output:
+        days = export_markdown(store, args.output, args.layout, args.start, args.end,
+                               workers=args.workers, fsync=store.fsync)
+        print(f"已导出 {days} 天到 {args.output}", file=sys.stderr)
+    else:
+        write_markdown(store, sys.stdout, args.start, args.end, workers=args.workers)
+    return 0
+
+
+def cmd_import(args):
+    store = open_store(args)
+
+    def report(progress):
+        print(f"已读取 {progress.rows} 行，新增 {progress.imported} 条，重复 {progress.duplicates} 条，"
+              f"跳过 {progress.skipped} 条，{progress.rate:.0f} 行/秒", file=sys.stderr)
+
+    importer = BulkImporter(store, batch_rows=args.batch_rows, on_progress=report)
+    for path in args.files:
+        importer.import_file(path, args.format, args.date)
+    store.close()
+    progress = importer.progress
+    print(f"导入 {progress.days} 天，新增 {progress.imported} 条时间块"
+          f"（重复 {progress.duplicates} 条，无法识别 {progress.skipped} 条）")
+    return 0
+
+
+def cmd_reindex(args):
+    store = open_store(args)
+    dates = store.reindex()
+    with TimeBlockArchive.build(args.data_dir, store) as archive:
+        rows = len(archive)
+    indexed = store.rebuild_search_index()
+    print(f"日期清单 {dates} 天，时间块归档 {rows} 行，搜索索引 {indexed} 天")
+    return 0
+
+
+def cmd_search(args):
+    store = open_store(args)
+    results = store.search(' '.join(args.query), args.limit, args.start, args.end)
+    for result in results:
+        print(f"{result['date']}\t{result['snippet']}")
+    if not results:
+        print("没有找到匹配的记录", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_sentiment(args):
+    store = open_store(args)
+    counts = {}
+    worker = SentimentWorker(args.data_dir, backend=get_sentiment_backend(args.backend),
+                             coalesce_delay=0, batch_size=args.batch_size,
+                             on_result=lambda date, result: counts.update({result['label']: counts.get(result['label'], 0) + 1}))
+    dates = [d for d in store.dates(args.start, args.end) if store.summary(d).get('has_diary')]
+    queued = worker.backfill((date, store.load_day(date).diary) for date in dates)
+    worker.wait_idle()
+    worker.stop()
+    analyzed = sum(counts.values())
+    print(f"有日记 {len(dates)} 天，新分析 {analyzed} 篇，其余命中缓存")
+    for label, count in sorted(counts.items()):
+        print(f"{label}\t{count}")
+    if analyzed < queued:
+        print(f"{queued - analyzed} 篇分析失败，详见日志", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_migrate(args):
+    source = open_store(args)
+    if source.name == args.to:
+        print(f"当前已是 {args.to} 存储", file=sys.stderr)
+        return 1
+    target = get_storage_backend(args.data_dir, args.to, fsync=args.fsync)
+    days = migrate_storage(source, target, args.start, args.end)
+    target.close()
+    print(f"已从 {source.name} 导入 {days} 天到 {args.to}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m time_tracker.cli', description='时间记录器命令行工具')
+    parser.add_argument('--data-dir', type=Path, default=Path.cwd() / "data", help='数据目录，默认 ./data')
+    parser.add_argument('--storage', choices=STORAGE_BACKENDS,
+                        help='存储后端，默认读取环境变量 TIME_TRACKER_STORAGE，未设置时数据目录有 SQLite 数据库则用 sqlite，否则 json')
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, help='写入时的 fsync 策略，默认读取环境变量 TIME_TRACKER_FSYNC，未设置时为 file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('add-block', help='追加时间块，支持自然语言')
+    p.add_argument('blocks', nargs='+', help="如 '08:00 睡觉 8小时' 或 '下午读了2小时书'")
+    p.add_argument('--date', type=valid_date, default=datetime.now().strftime("%Y-%m-%d"))
+    p.set_defaults(func=cmd_add_block)
+
+    p = subparsers.add_parser('stats', help='历史统计')
+    p.add_argument('--by', choices=['day', 'week', 'month', 'year', 'activity', 'weekday', 'hour'], default='day')
+    p.add_argument('--start', type=valid_date)
+    p.add_argument('--end', type=valid_date)
+    p.set_defaults(func=cmd_stats)
+
+    p = subparsers.add_parser('export', help='导出 Markdown 或时间块 CSV')
+    p.add_argument('--format', choices=['md', 'csv'], default='md')
+    p.add_argument('--start', type=valid_date)
+    p.add_argument('--end', type=valid_date)
+    p.add_argument('-o', '--output', type=Path, help='输出文件或目录，默认标准输出')
+    p.add_argument('--layout', choices=EXPORT_LAYOUTS,
+                   help='Markdown 的导出方式，默认按 -o 推断：.md 合并为一个文件，.zip 打包，其余为每天一个文件的目录')
+    p.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='读取和渲染的线程数')
+    p.set_defaults(func=cmd_export)
+
+    p = subparsers.add_parser('import', help='批量导入其他工具的时间记录（CSV、文本或 JSON），重复的行自动跳过')
+    p.add_argument('files', nargs='+', type=Path)
+    p.add_argument('--format', choices=IMPORT_FORMATS, help='默认按扩展名判断：.csv、.json/.jsonl，其余按文本')
+    p.add_argument('--date', type=valid_date, help='文本中没有日期的行使用的日期')
+    p.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='每批写入的行数')
+    p.set_defaults(func=cmd_import)
+
+    p = subparsers.add_parser('sentiment', help='批量补算历史日记的情感（结果写入缓存）')
+    p.add_argument('--start', type=valid_date)
+    p.add_argument('--end', type=valid_date)
+    p.add_argument('--backend', choices=sorted(SENTIMENT_BACKENDS), help='默认读取环境变量 TIME_TRACKER_SENTIMENT，未设置时为 lexicon')
+    p.add_argument('--batch-size', type=int, default=32)
+    p.set_defaults(func=cmd_sentiment)
+
+    p = subparsers.add_parser('search', help='全文搜索日记和活动，按相关度列出日期和摘要')
+    p.add_argument('query', nargs='+')
+    p.add_argument('--start', type=valid_date)
+    p.add_argument('--end', type=valid_date)
+    p.add_argument('--limit', type=int, default=20)
+    p.set_defaults(func=cmd_search)
+
+    p = subparsers.add_parser('reindex', help='整理时间块日志和索引，重建统计归档和搜索索引')
+    p.set_defaults(func=cmd_reindex)
+
+    p = subparsers.add_parser('migrate', help='把现有数据批量导入另一种存储后端')
+    p.add_argument('--to', choices=STORAGE_BACKENDS, default='sqlite')
+    p.add_argument('--start', type=valid_date)
+    p.add_argument('--end', type=valid_date)
+    p.set_defaults(func=cmd_migrate)
+    return parser
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
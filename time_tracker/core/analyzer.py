@@ -1,99 +1,559 @@
 import re
+import os
 import csv
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional, Tuple
 from .models import TimeBlock
+from .fileio import atomic_open, check_fsync_policy, sync_file
+
+logger = logging.getLogger(__name__)
+
+TIME_PATTERN = re.compile(r'^(\d{1,2}): ?(\d{2})$')
+# 'HH: MM' 冒号后带空格的旧写法，拆分前先合并成 'HH:MM'
+SPACED_CLOCK = re.compile(r'^(\d{1,2}):\s+(?=\d{2}\s)')
+DURATION_PATTERN = re.compile(r'^(?:(\d+(?:\.\d+)?)个?小时)?(?:(\d+)(?:分钟|min))?$')
 
 class TimeBlockUtils:
     @staticmethod
     def parse_time_blocks(time_blocks: str, date: str) -> List[TimeBlock]:
         blocks = []
         for line in time_blocks.splitlines():
-            parts = line.strip().split()
-            if len(parts) >= 3:
-                time = parts[0]
-                activity = ' '.join(parts[1:-1])
-                duration = parts[-1]
-                blocks.append(TimeBlock(time=time, activity=activity, duration=duration, date=date))
+            block = TimeBlockUtils.parse_time_block_line(line, date)
+            if block:
+                blocks.append(block)
         return blocks
 
     @staticmethod
-    def load_timeblock_df(data_dir: Path) -> List[Dict]:
-        csvfile = data_dir / 'timeblocks.csv'
-        if csvfile.exists():
-            with open(csvfile, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                return list(reader)
-        return []
-
-    @staticmethod
-    def save_timeblock_df(data_dir: Path, rows: List[Dict]) -> None:
-        csvfile = data_dir / 'timeblocks.csv'
-        fieldnames = ['date', 'time', 'activity', 'duration']
-        
-        # 读取现有数据
-        existing_rows = []
-        if csvfile.exists():
-            with open(csvfile, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                existing_rows = list(reader)
-        
-        # 合并数据并去重
-        all_rows = existing_rows + rows
-        unique_rows = []
-        seen = set()
-        for row in all_rows:
-            key = (row['date'], row['time'], row['activity'])
-            if key not in seen:
-                seen.add(key)
-                unique_rows.append(row)
-        
-        # 保存数据
-        with open(csvfile, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+    def parse_time_block_line(line: str, date: str) -> Optional[TimeBlock]:
+        parts = SPACED_CLOCK.sub(r'\1:', line.strip()).split()
+        if len(parts) < 3:
+            return None
+        time = parts[0]
+        activity = ' '.join(parts[1:-1])
+        duration = parts[-1]
+        return TimeBlock(
+            time=time,
+            activity=activity,
+            duration=duration,
+            date=date,
+            start_minute=TimeBlockUtils.parse_start_minute(time),
+            duration_minutes=TimeBlockUtils.parse_duration_minutes(duration),
+        )
+
+    @staticmethod
+    def is_standard_line(line: str) -> bool:
+        """已是 'HH:MM 活动 时长' 格式：起始时间和时长都能按统计用的规则解析"""
+        block = TimeBlockUtils.parse_time_block_line(line, '')
+        return block is not None and block.start_minute is not None and block.duration_minutes is not None
+
+    @staticmethod
+    def counted_minutes(start_minute: Optional[int], duration_minutes: Optional[int]) -> int:
+        """计入统计的分钟数：起始时间和时长都能解析时才算，否则为 0"""
+        if start_minute is None or not duration_minutes:
+            return 0
+        return duration_minutes
+
+    @staticmethod
+    def parse_start_minute(time: str) -> Optional[int]:
+        """'HH:MM' -> 当天第几分钟"""
+        m = TIME_PATTERN.match(time.strip())
+        if not m:
+            return None
+        hour, minute = int(m.group(1)), int(m.group(2))
+        if hour > 23 or minute > 59:
+            return None
+        return hour * 60 + minute
+
+    @staticmethod
+    def parse_duration_minutes(duration: str) -> Optional[int]:
+        """'8小时' / '40min' / '1小时20分钟' -> 分钟数"""
+        m = DURATION_PATTERN.match(duration.strip())
+        if not m or not any(m.groups()):
+            return None
+        hours, minutes = m.groups()
+        return round(float(hours or 0) * 60) + int(minutes or 0)
+
+    @staticmethod
+    def load_timeblock_df(data_dir: Path, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        """读取时间块行，start/end 为闭区间的 YYYY-MM-DD，只打开涉及到的月份分区"""
+        return TimeBlockJournal.for_dir(data_dir).load(start, end)
+
+    @staticmethod
+    def row_date(row) -> str:
+        """时间块行（dict 或 TimeBlock）的日期"""
+        return row['date'] if isinstance(row, dict) else row.date
+
+    @staticmethod
+    def save_timeblock_df(data_dir: Path, rows: List[Dict], replace_dates: Iterable[str] = ()) -> None:
+        """追加时间块行；replace_dates 中的日期以 rows 为该日的全部行，删掉的行随之作废"""
+        TimeBlockJournal.for_dir(data_dir).append(rows, replace_dates)
+
+    @staticmethod
+    def compact_timeblock_df(data_dir: Path, background: bool = False) -> None:
+        journal = TimeBlockJournal.for_dir(data_dir)
+        if background:
+            journal.compact_async()
+        else:
+            journal.compact()
+
+
+class TimeBlockJournal:
+    """按月分区的时间块存储与追加式日志
+
+    快照按月份拆分为 timeblocks/YYYY-MM.csv。保存时只把当天新增或变化的行
+    追加到 timeblocks.journal.csv，由合并步骤把日志折叠进对应月份的分区。
+    去重键为 (date, time, activity)，日志中较新的行覆盖较旧的行。
+    整天保存时若有行被删掉或改名，先写一条该日期的替换标记（time 为空、duration 为
+    REPLACE_MARK）再写当天的全部行；读取和合并时标记之前该日期的行全部作废。
+    旧版单文件 timeblocks.csv 在首次使用时迁移为分区。
+    """
+
+    FIELDNAMES = ['date', 'time', 'activity', 'duration', 'start_minute', 'duration_minutes']
+    TEXT_FIELDS = ['date', 'time', 'activity', 'duration']
+    PARTITION_DIR = 'timeblocks'
+    LEGACY_FILE = 'timeblocks.csv'
+    MIGRATED_FILE = 'timeblocks.legacy.csv'
+    JOURNAL_FILE = 'timeblocks.journal.csv'
+    PENDING_FILE = 'timeblocks.journal.compacting.csv'
+    COMPACT_THRESHOLD = 5000  # 日志超过该行数时在后台合并
+    REPLACE_MARK = '#replace'
+    MAX_INSTANCES = 8         # 常驻进程里最多缓存几个数据目录的实例
+    MAX_WRITTEN_DATES = 400   # 每个实例最多记住多少天的已写入行
+
+    _instances: 'OrderedDict[Path, TimeBlockJournal]' = OrderedDict()
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def for_dir(cls, data_dir: Path) -> 'TimeBlockJournal':
+        key = Path(data_dir).resolve()
+        with cls._instances_lock:
+            journal = cls._instances.get(key)
+            if journal is None:
+                journal = cls._instances[key] = cls(key)
+                # 按最近使用淘汰，正在后台合并的实例留着，免得同一目录出现两个实例
+                for old in list(cls._instances)[:-1]:
+                    if len(cls._instances) <= cls.MAX_INSTANCES:
+                        break
+                    if not cls._instances[old]._compacting():
+                        del cls._instances[old]
+            else:
+                cls._instances.move_to_end(key)
+            return journal
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.partition_dir = self.data_dir / self.PARTITION_DIR
+        self.legacy = self.data_dir / self.LEGACY_FILE
+        self.journal = self.data_dir / self.JOURNAL_FILE
+        self.pending = self.data_dir / self.PENDING_FILE
+        self.fsync = check_fsync_policy()
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._compact_thread = None
+        self._journal_rows = None
+        self._journal_checked = False
+        # 本进程内每个日期已写入的 {key: row}，用于只追加变化的行
+        # 按最近使用排序，超过 MAX_WRITTEN_DATES 天时淘汰最旧的（之后再保存那天会写替换标记）
+        self._written: 'OrderedDict[str, Dict[Tuple, Dict]]' = OrderedDict()
+        # 整天写过（_written 即该日全部行）的日期，再次整天保存时只有删行才需要替换标记
+        self._complete = set()
+
+    @staticmethod
+    def row_key(row: Dict) -> Tuple:
+        return (row['date'], row['time'], row['activity'])
+
+    @classmethod
+    def is_replace_mark(cls, row: Dict) -> bool:
+        return not row['time'] and row['duration'] == cls.REPLACE_MARK
+
+    @classmethod
+    def replace_mark(cls, date: str) -> Dict:
+        return {'date': date, 'time': '', 'activity': '', 'duration': cls.REPLACE_MARK,
+                'start_minute': None, 'duration_minutes': None}
+
+    @classmethod
+    def _fold(cls, by_date: Dict[str, Dict[Tuple, Dict]], rows: Iterable[Dict]) -> None:
+        """按顺序把 rows 合并进 {日期: {键: 行}}，遇到替换标记时清空该日期"""
+        for row in rows:
+            if cls.is_replace_mark(row):
+                by_date[row['date']] = {}
+            else:
+                by_date.setdefault(row['date'], {})[cls.row_key(row)] = row
+
+    def partition_path(self, month: str) -> Path:
+        return self.partition_dir / f"{month}.csv"
+
+    @staticmethod
+    def _int_field(value) -> Optional[int]:
+        if value is None or value == '':
+            return None
+        return int(value)
+
+    def _normalize(self, row) -> Dict:
+        """统一为 FIELDNAMES 的 dict，整数列缺失时（旧数据）从文本列解析"""
+        if is_dataclass(row):
+            row = asdict(row)
+        normalized = {name: row.get(name, '') for name in self.TEXT_FIELDS}
+        start_minute = self._int_field(row.get('start_minute'))
+        if start_minute is None:
+            start_minute = TimeBlockUtils.parse_start_minute(normalized['time'])
+        duration_minutes = self._int_field(row.get('duration_minutes'))
+        if duration_minutes is None:
+            duration_minutes = TimeBlockUtils.parse_duration_minutes(normalized['duration'])
+        normalized['start_minute'] = start_minute
+        normalized['duration_minutes'] = duration_minutes
+        return normalized
+
+    def _read_rows(self, csvfile: Path) -> List[Dict]:
+        if not csvfile.exists():
+            return []
+        with open(csvfile, 'r', encoding='utf-8', newline='') as f:
+            return [self._normalize(row) for row in csv.DictReader(f)]
+
+    def _upgrade_journal(self) -> None:
+        """旧表头的日志先合并掉，避免追加的行与表头错位"""
+        if self._journal_checked:
+            return
+        if self.journal.exists():
+            with open(self.journal, 'r', encoding='utf-8', newline='') as f:
+                header = next(csv.reader(f), None)
+            if header and header != self.FIELDNAMES:
+                self.compact()
+        self._journal_checked = True
+
+    def _write_rows(self, csvfile: Path, rows: Iterable[Dict]) -> None:
+        with atomic_open(csvfile, fsync=self.fsync, newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.FIELDNAMES)
             writer.writeheader()
-            writer.writerows(unique_rows)
+            writer.writerows(rows)
+
+    def _count_journal_rows(self) -> int:
+        if not self.journal.exists():
+            return 0
+        with open(self.journal, 'r', encoding='utf-8') as f:
+            return max(sum(1 for _ in f) - 1, 0)
+
+    def _merge_into_partitions(self, rows: Iterable[Dict]) -> None:
+        by_month: Dict[str, List[Dict]] = {}
+        for row in rows:
+            by_month.setdefault(row['date'][:7], []).append(row)
+        self.partition_dir.mkdir(exist_ok=True)
+        for month, month_rows in by_month.items():
+            partition = self.partition_path(month)
+            merged: Dict[str, Dict[Tuple, Dict]] = {}
+            self._fold(merged, self._read_rows(partition))
+            self._fold(merged, month_rows)
+            # 替换标记在这里生效，分区里只留下实际的行
+            self._write_rows(partition, (row for date in sorted(merged) for row in merged[date].values()))
+
+    def migrate(self) -> None:
+        """把旧版单文件 timeblocks.csv 拆分为月份分区"""
+        with self._compact_lock:
+            if not self.legacy.exists():
+                return
+            self._merge_into_partitions(self._read_rows(self.legacy))
+            os.replace(self.legacy, self.data_dir / self.MIGRATED_FILE)
+            logger.info(f"已将 {self.legacy} 迁移为按月分区")
+
+    def partitions(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Path]:
+        if not self.partition_dir.exists():
+            return []
+        first = start[:7] if start else None
+        last = end[:7] if end else None
+        paths = []
+        for path in sorted(self.partition_dir.glob('*.csv')):
+            month = path.stem
+            if (first is None or month >= first) and (last is None or month <= last):
+                paths.append(path)
+        return paths
+
+    def month_signatures(self) -> Dict[str, List]:
+        """每个月份的 [分区 mtime, 大小]，日志里出现过的月份再加上日志文件的签名
+
+        用于判断派生数据中哪些月份已过期；每次保存只会让日志涉及的月份失效。
+        """
+        if self.legacy.exists():
+            self.migrate()
+        signatures: Dict[str, List] = {}
+        for path in self.partitions():
+            st = path.stat()
+            signatures[path.stem] = [st.st_mtime_ns, st.st_size]
+        for path in (self.pending, self.journal):
+            if not path.exists():
+                continue
+            st = path.stat()
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                months = {row['date'][:7] for row in csv.DictReader(f) if row.get('date')}
+            for month in months:
+                signatures.setdefault(month, []).append([path.name, st.st_mtime_ns, st.st_size])
+        return signatures
+
+    def append(self, rows: Iterable, replace_dates: Iterable[str] = ()) -> int:
+        """追加新增或变化的行，返回实际写入的行数（含替换标记）
+
+        replace_dates 中的日期以 rows 里的行为该日的全部时间块：与本进程上次写入的相比有行
+        被删掉或改名，或本进程还没整天写过这一天时，写替换标记和这一天的全部行。
+        """
+        if self.legacy.exists():
+            self.migrate()
+        self._upgrade_journal()
+        replacing: Dict[str, Dict[Tuple, Dict]] = {date: {} for date in replace_dates}
+        changed = []
+        with self._lock:
+            for row in rows:
+                row = self._normalize(row)
+                if row['date'] in replacing:
+                    replacing[row['date']][self.row_key(row)] = row
+                    continue
+                written = self._remember(row['date'])
+                key = self.row_key(row)
+                if written.get(key) != row:
+                    written[key] = row
+                    changed.append(row)
+            for date, day_rows in replacing.items():
+                written = self._written.get(date)
+                if date in self._complete and written is not None and written.keys() <= day_rows.keys():
+                    changed.extend(row for key, row in day_rows.items() if written.get(key) != row)
+                else:
+                    changed.append(self.replace_mark(date))
+                    changed.extend(day_rows.values())
+                self._remember(date, day_rows)
+                self._complete.add(date)
+            self._trim_written()
+            if not changed:
+                return 0
+            if self._journal_rows is None:
+                self._journal_rows = self._count_journal_rows()
+            is_new = not self.journal.exists()
+            with open(self.journal, 'a', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.FIELDNAMES)
+                if is_new:
+                    writer.writeheader()
+                writer.writerows(changed)
+                sync_file(f, self.fsync)
+            self._journal_rows += len(changed)
+            need_compact = self._journal_rows >= self.COMPACT_THRESHOLD
+        if need_compact:
+            self.compact_async()
+        return len(changed)
+
+    def _remember(self, date: str, rows: Optional[Dict[Tuple, Dict]] = None) -> Dict[Tuple, Dict]:
+        """取出（rows 给出时替换）某天的已写入行，并标为最近使用；调用方持有 _lock"""
+        if rows is not None:
+            self._written[date] = rows
+        else:
+            rows = self._written.setdefault(date, {})
+        self._written.move_to_end(date)
+        return rows
+
+    def _trim_written(self) -> None:
+        while len(self._written) > self.MAX_WRITTEN_DATES:
+            date, _ = self._written.popitem(last=False)
+            self._complete.discard(date)
+
+    def _compacting(self) -> bool:
+        return self._compact_thread is not None and self._compact_thread.is_alive()
+
+    def forget(self, dates: Iterable[str]) -> None:
+        """丢掉这些日期的已写入记录；批量导入后调用，免得内存随导入的天数增长"""
+        with self._lock:
+            for date in dates:
+                self._written.pop(date, None)
+                self._complete.discard(date)
+
+    def load(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        if self.legacy.exists():
+            self.migrate()
+        merged: Dict[str, Dict[Tuple, Dict]] = {}
+        for csvfile in self.partitions(start, end) + [self.pending, self.journal]:
+            self._fold(merged, (row for row in self._read_rows(csvfile)
+                                if (start is None or row['date'] >= start) and (end is None or row['date'] <= end)))
+        return [row for date in sorted(merged) for row in merged[date].values()]
+
+    def compact(self) -> None:
+        """把日志折叠进对应月份的分区"""
+        if self.legacy.exists():
+            self.migrate()
+        with self._compact_lock:
+            with self._lock:
+                # 上次合并中断时 pending 仍在，先把它合并完
+                if not self.pending.exists():
+                    if not self.journal.exists():
+                        return
+                    os.replace(self.journal, self.pending)
+                    self._journal_rows = 0
+            self._merge_into_partitions(self._read_rows(self.pending))
+            self.pending.unlink()
+
+    def compact_async(self) -> None:
+        if self._compacting():
+            return
+        self._compact_thread = threading.Thread(target=self._compact_safely, daemon=True)
+        self._compact_thread.start()
+
+    def _compact_safely(self) -> None:
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"合并时间块日志失败: {e}", exc_info=True)
+
+
+_PERIOD = r'早上|早晨|上午|中午|下午|晚上|凌晨'
+_CLOCK = r'(?:(\d{1,2})[:：](\d{2})|(\d{1,2})点(?:(半)|(\d{1,2})分?)?)'
+_CLOCK_GROUPS = 5
+
+NATURAL_PATTERN = re.compile(
+    r'(?P<range>' + _CLOCK + r'\s*(?:到|至|~|～|-|—)\s*(?:(' + _PERIOD + r')\s*)?' + _CLOCK + r')'
+    r'|(?P<clock>' + _CLOCK + r')'
+    r'|(?P<period>' + _PERIOD + r')'
+    r'|(?P<duration>(?:(\d+(?:\.\d+)?)个?小时(?:(\d+)(?:分钟|min))?|(\d+)(?:分钟|min)|半个?小时))'
+)
+ACTIVITY_STRIP = ' \t，,。.、：:;；'
 
 class NaturalLanguageParser:
+    """自然语言时间块解析
+
+    支持时间段（'下午'）、钟点（'9点半'、'14:30'、'下午3点'）、区间（'9点到11点'）
+    和复合时长（'1小时20分钟'、'半小时'）。所有模式预编译为一个正则，每行只扫描一遍。
+    已是 'HH:MM 活动 时长' 标准格式的行返回 None。
+    """
+
+    PERIOD_DEFAULTS = {
+        '早上': 7 * 60,
+        '早晨': 7 * 60,
+        '上午': 9 * 60,
+        '中午': 12 * 60,
+        '下午': 14 * 60,
+        '晚上': 20 * 60,
+        '凌晨': 0,
+    }
+    DEFAULT_DURATION = 30
+
     @staticmethod
-    def parse_natural_timeblock(text: str) -> str:
-        # 匹配时间
-        time_patterns = {
-            r'早上|早晨': '07:00',
-            r'上午': '09:00',
-            r'中午': '12:00',
-            r'下午': '14:00',
-            r'晚上': '20:00',
-            r'凌晨': '00:00'
-        }
-        
-        # 匹配时长
-        duration_pattern = r'(\d+)(?:个)?(小时|分钟|min)'
-        
-        # 提取时间
-        time = None
-        for pattern, default_time in time_patterns.items():
-            if re.search(pattern, text):
-                time = default_time
-                break
-        
-        # 提取时长
-        duration_match = re.search(duration_pattern, text)
-        if duration_match:
-            num, unit = duration_match.groups()
-            if unit in ['小时', '个']:
-                duration = f"{num}小时"
-            else:
-                duration = f"{num}min"
+    def _clock_minute(groups, offset: int, period: Optional[str]) -> Optional[int]:
+        hour, minute, hour_cn, half, minute_cn = groups[offset:offset + _CLOCK_GROUPS]
+        if hour is not None:
+            hour, minute = int(hour), int(minute)
         else:
-            duration = "30min"
-        
-        # 提取活动（简单处理：去除时间和时长后的剩余文本）
-        activity = text
-        for pattern in time_patterns.keys():
-            activity = re.sub(pattern, '', activity)
-        activity = re.sub(duration_pattern, '', activity).strip()
-        
-        if time and activity and duration:
-            return f"{time} {activity} {duration}"
-        return None 
\ No newline at end of file
+            hour = int(hour_cn)
+            minute = 30 if half else int(minute_cn or 0)
+        if period in ('下午', '晚上') and hour < 12:
+            hour += 12
+        elif period == '中午' and hour < 6:
+            hour += 12
+        if hour > 24 or minute > 59:
+            return None
+        return (hour * 60 + minute) % (24 * 60)
+
+    @staticmethod
+    def format_duration(minutes: int) -> str:
+        if minutes and minutes % 60 == 0:
+            return f"{minutes // 60}小时"
+        return f"{minutes}min"
+
+    @staticmethod
+    def parse_natural_timeblock(text: str) -> Optional[str]:
+        text = text.strip()
+        if not text or TimeBlockUtils.is_standard_line(text):
+            return None
+        period = None
+        range_minutes = None
+        duration = None
+        pending_clock = None
+        kept = []
+        last = 0
+        for m in NATURAL_PATTERN.finditer(text):
+            kind = m.lastgroup
+            if kind == 'duration':
+                if duration is None:
+                    hours, minutes, only_minutes = m.group(m.lastindex + 1, m.lastindex + 2, m.lastindex + 3)
+                    if only_minutes is not None:
+                        duration = int(only_minutes)
+                    elif hours is not None:
+                        duration = round(float(hours) * 60) + int(minutes or 0)
+                    else:
+                        duration = 30
+                # 时长保留在活动描述中
+                continue
+            kept.append(text[last:m.start()])
+            last = m.end()
+            if kind == 'period':
+                if period is None:
+                    period = m.group('period')
+            elif pending_clock is None:
+                pending_clock = m
+        kept.append(text[last:])
+        start = None
+        if pending_clock is not None:
+            groups = pending_clock.groups()
+            offset = pending_clock.lastindex
+            start = NaturalLanguageParser._clock_minute(groups, offset, period)
+            if pending_clock.lastgroup == 'range' and start is not None:
+                end_period = groups[offset + _CLOCK_GROUPS] or period
+                end = NaturalLanguageParser._clock_minute(groups, offset + _CLOCK_GROUPS + 1, end_period)
+                if end is not None:
+                    range_minutes = (end - start) % (24 * 60)
+        if start is None and period is not None:
+            start = NaturalLanguageParser.PERIOD_DEFAULTS[period]
+        activity = ''.join(kept).strip(ACTIVITY_STRIP)
+        if start is None or not activity:
+            return None
+        minutes = range_minutes or duration or NaturalLanguageParser.DEFAULT_DURATION
+        return f"{start // 60:02d}:{start % 60:02d} {activity} {NaturalLanguageParser.format_duration(minutes)}"
+
+    @staticmethod
+    def normalize_line(line: str) -> Optional[str]:
+        """自然语言或标准格式的一行 -> 标准格式 'HH:MM 活动 时长'，无法识别时返回 None"""
+        std_line = NaturalLanguageParser.parse_natural_timeblock(line) or line.strip()
+        block = TimeBlockUtils.parse_time_block_line(std_line, '')
+        if block is None or block.start_minute is None or block.duration_minutes is None:
+            return None
+        return std_line
+
+    @staticmethod
+    def parse_many(lines: Iterable[str]) -> List[Optional[str]]:
+        """批量解析多行文本，逐行返回标准格式或 None
+
+        只是逐行调用 parse_natural_timeblock 的便捷写法，没有额外的批量加速：
+        把多行拼起来跑一遍 finditer 再按行切分实测并不更快，瓶颈在逐行的标准格式判断和结果组装。
+        """
+        parse = NaturalLanguageParser.parse_natural_timeblock
+        return [parse(line) for line in lines]
+
+
+class TimeBlockLineChecker:
+    """逐行校验时间块，结果按行内容缓存
+
+    check(line) 返回 (是否有效, 标准格式)：空行和已是标准格式的行第二项为 None，
+    可识别的自然语言返回换算后的标准格式。同样内容的行只解析一次，
+    界面上编辑一行只需要重新解析这一行。
+    """
+
+    MAX_CACHE = 4096
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[bool, Optional[str]]] = {}
+        self.parsed = 0
+
+    def check(self, line: str) -> Tuple[bool, Optional[str]]:
+        key = line.strip()
+        result = self._cache.get(key)
+        if result is None:
+            self.parsed += 1
+            if not key or TimeBlockUtils.is_standard_line(key):
+                # 统计能解析出起始时间和时长的行原样保留，如 '08:00 睡觉 30分钟'
+                result = (True, None)
+            else:
+                normalized = NaturalLanguageParser.normalize_line(key)
+                if normalized is None:
+                    result = (False, None)
+                else:
+                    result = (True, None if normalized == key else normalized)
+            if len(self._cache) >= self.MAX_CACHE:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
@@ -0,0 +1,260 @@
+import os
+import json
+import mmap
+import bisect
+import logging
+from array import array
+from datetime import date as Date
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from .analyzer import TimeBlockUtils, TimeBlockJournal
+
+logger = logging.getLogger(__name__)
+
+_numpy = None
+
+
+def load_numpy():
+    """按需导入 numpy（可选依赖，导入较慢），未安装时返回 None 并退回 array/memoryview"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+class TimeBlockArchive:
+    """列式、内存映射的时间块归档，用于多年范围的统计
+
+    每一列是一个定长类型数组文件，按日期排序：
+    date（日期序数）、start（开始分钟，未知为 -1）、duration（分钟）、
+    activity（活动字典编码 id）。读取时直接映射为 numpy 视图或 memoryview，
+    不会为每一行创建 dict。
+    """
+
+    DIRNAME = 'timeblocks.archive'
+    META_FILE = 'meta.json'
+    COLUMNS = {
+        'date': 'i',
+        'start': 'h',
+        'duration': 'i',
+        'activity': 'i',
+    }
+
+    def __init__(self, archive_dir: Path):
+        self.archive_dir = Path(archive_dir)
+        with open(self.archive_dir / self.META_FILE, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.activities: List[str] = self.meta['activities']
+        self._maps = []
+        self.columns = {name: self._map_column(name, typecode) for name, typecode in self.COLUMNS.items()}
+
+    @property
+    def dates(self):
+        return self.columns['date']
+
+    @property
+    def starts(self):
+        return self.columns['start']
+
+    @property
+    def durations(self):
+        return self.columns['duration']
+
+    @property
+    def activity_ids(self):
+        return self.columns['activity']
+
+    def __len__(self) -> int:
+        return self.meta['rows']
+
+    def _map_column(self, name: str, typecode: str):
+        np = load_numpy()
+        path = self.archive_dir / f"{name}.bin"
+        if self.meta['rows'] == 0:
+            return np.zeros(0, dtype=typecode) if np is not None else memoryview(array(typecode))
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        if np is not None:
+            return np.frombuffer(mm, dtype=typecode)
+        return memoryview(mm).cast(typecode)
+
+    def close(self) -> None:
+        """先释放列视图再关闭映射；外部仍持有视图时 mmap.close 抛出 BufferError，不能吞掉，
+        否则文件一直处于映射状态，Windows 上之后的 os.replace 会失败"""
+        for name in list(self.columns):
+            self._release(self.columns.pop(name))
+        maps, self._maps = self._maps, []
+        for mm in maps:
+            mm.close()
+
+    @staticmethod
+    def _release(column) -> None:
+        if isinstance(column, memoryview):
+            column.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def source_months(data_dir: Path, store=None) -> Dict[str, List]:
+        """每个月份的源数据版本；store 为存储后端（见 core.storage）时由它提供，否则看 CSV 分区和日志"""
+        if store is not None:
+            return store.time_block_months()
+        return TimeBlockJournal.for_dir(data_dir).month_signatures()
+
+    @staticmethod
+    def _load_rows(data_dir: Path, store, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        if store is not None:
+            return store.load_time_blocks(start, end)
+        return TimeBlockUtils.load_timeblock_df(data_dir, start, end)
+
+    @classmethod
+    def _read_columns(cls, archive_dir: Path) -> Dict[str, array]:
+        columns = {}
+        for name, typecode in cls.COLUMNS.items():
+            values = array(typecode)
+            values.frombytes((archive_dir / f"{name}.bin").read_bytes())
+            columns[name] = values
+        return columns
+
+    @classmethod
+    def build(cls, data_dir: Path, store=None, previous: Optional[Dict] = None) -> 'TimeBlockArchive':
+        """从时间块数据重建归档，默认读取按月分区的 CSV，给出 store 时从存储后端读取
+
+        previous 为旧归档的 meta 时只重新读取版本有变化的月份，其余月份直接复制旧的列。
+        """
+        data_dir = Path(data_dir)
+        archive_dir = data_dir / cls.DIRNAME
+        archive_dir.mkdir(exist_ok=True)
+        months = cls.source_months(data_dir, store)
+        old_months = previous.get('months', {}) if previous else {}
+        old_ranges = previous.get('ranges', {}) if previous else {}
+        changed = {month for month in months if month not in old_ranges or months[month] != old_months.get(month)}
+        incremental = previous is not None and len(changed) < len(months)
+        by_month: Dict[str, List[Dict]] = {}
+        if incremental:
+            old_columns = cls._read_columns(archive_dir)
+            activities = list(previous['activities'])
+            for month in changed:
+                by_month[month] = cls._load_rows(data_dir, store, f"{month}-01", f"{month}-31")
+        else:
+            old_columns, activities, changed = None, [], set(months)
+            for row in cls._load_rows(data_dir, store):
+                by_month.setdefault(row['date'][:7], []).append(row)
+        activity_ids = {name: i for i, name in enumerate(activities)}
+        ordinals: Dict[str, int] = {}
+        columns = {name: array(typecode) for name, typecode in cls.COLUMNS.items()}
+        ranges = {}
+        for month in sorted(set(months) | set(by_month)):
+            lo = len(columns['date'])
+            if old_columns is None or month in changed:
+                for row in by_month.get(month, ()):
+                    duration = row['duration_minutes']
+                    if duration is None:
+                        continue
+                    try:
+                        ordinal = ordinals.get(row['date']) or Date.fromisoformat(row['date']).toordinal()
+                    except ValueError:
+                        continue
+                    ordinals[row['date']] = ordinal
+                    start = row['start_minute']
+                    columns['date'].append(ordinal)
+                    columns['start'].append(-1 if start is None else start)
+                    columns['duration'].append(duration)
+                    columns['activity'].append(activity_ids.setdefault(row['activity'], len(activity_ids)))
+            else:
+                old_lo, old_hi = old_ranges[month]
+                for name, values in columns.items():
+                    values.extend(old_columns[name][old_lo:old_hi])
+            ranges[month] = [lo, len(columns['date'])]
+        for name, values in columns.items():
+            tmpfile = archive_dir / f"{name}.bin.tmp"
+            with open(tmpfile, 'wb') as f:
+                values.tofile(f)
+            os.replace(tmpfile, archive_dir / f"{name}.bin")
+        meta = {
+            'rows': len(columns['date']),
+            'activities': list(activity_ids),
+            'months': months,
+            'ranges': ranges,
+        }
+        tmpfile = archive_dir / f"{cls.META_FILE}.tmp"
+        with open(tmpfile, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmpfile, archive_dir / cls.META_FILE)
+        logger.info(f"时间块归档已更新: 重新读取 {len(changed)}/{len(ranges)} 个月，共 {meta['rows']} 行")
+        return cls(archive_dir)
+
+    @classmethod
+    def open(cls, data_dir: Path, refresh: bool = True, store=None) -> 'TimeBlockArchive':
+        """打开归档；refresh 为 True 时若源数据有变化则先更新变化的月份"""
+        archive_dir = Path(data_dir) / cls.DIRNAME
+        meta_file = archive_dir / cls.META_FILE
+        if not meta_file.exists():
+            return cls.build(data_dir, store)
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if 'ranges' not in meta:  # 旧格式的归档没有按月的行范围
+            return cls.build(data_dir, store)
+        # 在映射之前比较并改写列文件，改写时没有打开的映射
+        if refresh and meta['months'] != cls.source_months(data_dir, store):
+            return cls.build(data_dir, store, previous=meta)
+        return cls(archive_dir)
+
+    def slice_for(self, start: Optional[str] = None, end: Optional[str] = None) -> slice:
+        """日期闭区间对应的行切片（各列按日期排序）"""
+        np = load_numpy()
+        dates = self.dates
+        lo, hi = 0, len(self)
+        if np is not None:
+            if start:
+                lo = int(np.searchsorted(dates, Date.fromisoformat(start).toordinal(), 'left'))
+            if end:
+                hi = int(np.searchsorted(dates, Date.fromisoformat(end).toordinal(), 'right'))
+        else:
+            if start:
+                lo = bisect.bisect_left(dates, Date.fromisoformat(start).toordinal())
+            if end:
+                hi = bisect.bisect_right(dates, Date.fromisoformat(end).toordinal())
+        return slice(lo, hi)
+
+    def total_minutes(self, start: Optional[str] = None, end: Optional[str] = None) -> int:
+        np = load_numpy()
+        durations = self.durations[self.slice_for(start, end)]
+        if np is not None:
+            return int(durations.sum(dtype=np.int64))
+        return sum(durations)
+
+    def minutes_by_activity(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, int]:
+        np = load_numpy()
+        rng = self.slice_for(start, end)
+        if np is not None:
+            sums = np.bincount(self.activity_ids[rng], weights=self.durations[rng], minlength=len(self.activities))
+            totals = sums.astype(np.int64).tolist()
+        else:
+            totals = [0] * len(self.activities)
+            for activity_id, duration in zip(self.activity_ids[rng], self.durations[rng]):
+                totals[activity_id] += duration
+        return {name: total for name, total in zip(self.activities, totals) if total}
+
+    def minutes_by_weekday(self, start: Optional[str] = None, end: Optional[str] = None) -> List[int]:
+        """按星期几（周一为 0）统计分钟数"""
+        np = load_numpy()
+        rng = self.slice_for(start, end)
+        if np is not None:
+            weekdays = (self.dates[rng] + 6) % 7
+            sums = np.bincount(weekdays, weights=self.durations[rng], minlength=7)
+            return sums.astype(np.int64).tolist()
+        totals = [0] * 7
+        for ordinal, duration in zip(self.dates[rng], self.durations[rng]):
+            totals[(ordinal + 6) % 7] += duration
+        return totals
@@ -0,0 +1,158 @@
+"""
+导出
+
+按日期区间（或全部历史）导出 Markdown：合并为一个文件、每天一个文件或打包成 zip。
+日数据在线程池中读取并渲染，主线程按日期顺序逐天写出；同时在途的天数有上限，
+导出一整年也不会把所有日子同时放进内存。只依赖存储层接口，界面和命令行共用。
+"""
+import csv
+import logging
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, TextIO, Tuple
+
+from .fileio import atomic_open, atomic_write_text, DEFAULT_FSYNC
+from .models import TimeTrackerData
+
+logger = logging.getLogger(__name__)
+
+EXPORT_LAYOUTS = ('single', 'per-day', 'zip')
+CSV_FIELDS = ['date', 'time', 'activity', 'duration', 'duration_minutes']
+DEFAULT_WORKERS = 4
+
+
+def render_day_markdown(data: TimeTrackerData) -> str:
+    tasks_md = "\n".join([f"- [{'x' if t.done else ' '}] {t.text}" for t in data.tasks])
+    return f"""# {data.date} 时间记录\n\n## 时间块\n{data.time_blocks}\n\n## 今日总结\n{data.diary}\n\n## 今日待办\n{tasks_md}\n\n## 心情\n{data.mood}\n"""
+
+
+def parse_date_range(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """解析导出范围：'all'/'全部' 为全部历史，'2025-01-01~2025-03-31' 为闭区间，单个日期只导出当天
+
+    任一端留空表示不限，如 '2025-01-01~'。格式不对时抛出 ValueError。
+    """
+    text = text.strip()
+    if text.lower() in ('', 'all', '全部'):
+        return None, None
+    start, sep, end = text.replace('～', '~').partition('~')
+    if not sep:
+        end = start
+    start, end = start.strip() or None, end.strip() or None
+    for value in (start, end):
+        if value is not None:
+            datetime.strptime(value, "%Y-%m-%d")
+    if start and end and start > end:
+        raise ValueError(f"起始日期晚于结束日期: {text}")
+    return start, end
+
+
+def guess_layout(path: Path) -> str:
+    """按输出路径推断导出方式：.zip 打包，.md 合并为一个文件，其余视为目录"""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.zip':
+        return 'zip'
+    if suffix == '.md':
+        return 'single'
+    return 'per-day'
+
+
+def iter_rendered_days(store, dates: Iterable[str], workers: int = DEFAULT_WORKERS,
+                       render: Callable[[TimeTrackerData], str] = render_day_markdown) -> Iterator[Tuple[str, str]]:
+    """按 dates 的顺序逐天产出 (日期, 渲染结果)，不存在的日期跳过
+
+    读取和渲染在线程池中进行，最多同时有 workers * 2 天在途。
+    """
+    def load(date):
+        data = store.load_day(date)
+        return None if data is None else render(data)
+
+    store.flush()  # 排队中的保存先落盘，工作线程里就不必再等
+    window = max(1, workers) * 2
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='export') as pool:
+        pending = deque()
+        dates = iter(dates)
+        for date in dates:
+            pending.append((date, pool.submit(load, date)))
+            if len(pending) >= window:
+                break
+        while pending:
+            date, future = pending.popleft()
+            text = future.result()
+            next_date = next(dates, None)
+            if next_date is not None:
+                pending.append((next_date, pool.submit(load, next_date)))
+            if text is not None:
+                yield date, text
+
+
+def export_markdown(store, target: Path, layout: Optional[str] = None, start: Optional[str] = None,
+                    end: Optional[str] = None, dates: Optional[Iterable[str]] = None,
+                    workers: int = DEFAULT_WORKERS, fsync: str = DEFAULT_FSYNC,
+                    on_progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """把 start~end（或指定的 dates）导出到 target，返回导出的天数
+
+    layout 为 single（一个 .md）、per-day（target 为目录，每天一个 .md）或 zip，
+    省略时按 target 的扩展名推断。单文件和 zip 先写临时文件，完成后才替换 target。
+    on_progress(已完成, 总数) 在调用线程中回调。
+    """
+    target = Path(target)
+    layout = layout or guess_layout(target)
+    if layout not in EXPORT_LAYOUTS:
+        raise ValueError(f"未知的导出方式: {layout}（可选: {', '.join(EXPORT_LAYOUTS)}）")
+    dates = list(dates) if dates is not None else store.dates(start, end)
+    days = iter_rendered_days(store, dates, workers)
+    count = 0
+
+    def progress():
+        if on_progress:
+            on_progress(count, len(dates))
+
+    if layout == 'per-day':
+        target.mkdir(parents=True, exist_ok=True)
+        for date, text in days:
+            atomic_write_text(target / f"{date}.md", text, fsync=fsync)
+            count += 1
+            progress()
+    elif layout == 'zip':
+        with atomic_open(target, fsync=fsync, mode='wb') as f:
+            with zipfile.ZipFile(f, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                for date, text in days:
+                    zf.writestr(f"{date}.md", text)
+                    count += 1
+                    progress()
+    else:
+        with atomic_open(target, fsync=fsync) as f:
+            for date, text in days:
+                if count:
+                    f.write("\n")
+                f.write(text)
+                count += 1
+                progress()
+    logger.info(f"已导出 {count} 天到 {target}")
+    return count
+
+
+def write_markdown(store, out: TextIO, start: Optional[str] = None, end: Optional[str] = None,
+                   workers: int = DEFAULT_WORKERS) -> int:
+    """逐天写到已打开的文本流（如标准输出），返回天数"""
+    count = 0
+    for date, text in iter_rendered_days(store, store.dates(start, end), workers):
+        if count:
+            out.write("\n")
+        out.write(text)
+        count += 1
+    return count
+
+
+def write_time_blocks_csv(store, out: TextIO, start: Optional[str] = None, end: Optional[str] = None) -> int:
+    """时间块行按月读取、逐行写成 CSV，返回行数"""
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for row in store.iter_time_blocks(start, end):
+        writer.writerow(row)
+        count += 1
+    return count
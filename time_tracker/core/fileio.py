@@ -0,0 +1,76 @@
+"""
+原子写文件
+
+先写到同目录下的临时文件，再 os.replace 覆盖目标：写到一半崩溃时目标文件要么是旧内容，
+要么是新内容，不会被截断。fsync 策略：
+- always: 同步文件内容和所在目录，重命名本身也保证落盘
+- file: 只同步文件内容（默认）
+- never: 交给操作系统回写，最快，断电时可能丢失最近的修改
+策略可由参数指定，也可以通过环境变量 TIME_TRACKER_FSYNC 设置。
+"""
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+FSYNC_POLICIES = ('always', 'file', 'never')
+DEFAULT_FSYNC = 'file'
+FSYNC_ENV = 'TIME_TRACKER_FSYNC'
+
+
+def check_fsync_policy(fsync: Optional[str] = None) -> str:
+    """校验策略名；为 None 时读取环境变量，未设置则用默认策略"""
+    fsync = fsync or os.environ.get(FSYNC_ENV) or DEFAULT_FSYNC
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f"未知的 fsync 策略: {fsync}（可选: {', '.join(FSYNC_POLICIES)}）")
+    return fsync
+
+
+def fsync_dir(directory: Path) -> None:
+    """同步目录项，让 rename 落盘；Windows 不支持打开目录，直接跳过"""
+    if os.name == 'nt':
+        return
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_file(f, fsync: str = DEFAULT_FSYNC) -> None:
+    """按策略把已打开文件的缓冲刷到磁盘"""
+    f.flush()
+    if fsync != 'never':
+        os.fsync(f.fileno())
+
+
+@contextmanager
+def atomic_open(path: Path, fsync: str = DEFAULT_FSYNC, mode: str = 'w', encoding: str = 'utf-8', newline=None):
+    """以写模式打开临时文件，with 块正常结束后才替换目标文件，异常时目标保持不变"""
+    path = Path(path)
+    fsync = check_fsync_policy(fsync)
+    # 临时文件名带进程和线程号，多个写入方不会互相覆盖
+    tmpname = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if 'b' in mode:
+            f = open(tmpname, mode)
+        else:
+            f = open(tmpname, mode, encoding=encoding, newline=newline)
+        with f:
+            yield f
+            sync_file(f, fsync)
+        os.replace(tmpname, path)
+    except BaseException:
+        try:
+            os.unlink(tmpname)
+        except FileNotFoundError:
+            pass
+        raise
+    if fsync == 'always':
+        fsync_dir(path.parent)
+
+
+def atomic_write_text(path: Path, text: str, fsync: str = DEFAULT_FSYNC, newline=None) -> None:
+    with atomic_open(path, fsync=fsync, newline=newline) as f:
+        f.write(text)
@@ -0,0 +1,257 @@
+"""
+批量导入外部时间记录
+
+支持三种输入，都按行流式读取：
+- csv: 带表头，列名 date/time/activity/duration（也认 start、task、name、minutes 等常见写法）
+- text: 每行一条 'HH:MM 活动 时长' 或自然语言；单独一行日期（可带 '#'）切换当前日期，
+  行首带日期的行只作用于该行
+- json: JSON Lines（每行一个对象）或 JSON 数组；对象可以是一条时间块，也可以是本程序的日文件
+CSV/JSON 记录直接由各列拼成 'HH:MM 活动 时长'（'01:30' 这类时长换算为分钟），拼不出标准格式的
+记录跳过；只有自由文本行经 TimeBlockLineChecker（即 NaturalLanguageParser）换算。按日期攒够一批后
+合并进已有的日数据，交给存储后端的 bulk_import 一次写入。去重键为 (日期, 时间, 活动)，与后端里
+已存的时间块比较，重复导入同一文件或中途中断后重跑都不会产生重复行，删掉的行再导入会重新写入；
+内存占用只与批大小有关。
+"""
+import csv
+import functools
+import itertools
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+from .models import TimeBlock, TimeTrackerData
+from .analyzer import TimeBlockUtils, TimeBlockLineChecker, NaturalLanguageParser
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'text', 'json')
+DEFAULT_BATCH_ROWS = 50000
+
+CSV_COLUMNS = {
+    'date': ('date', 'day', '日期'),
+    'time': ('time', 'start', 'start_time', '开始', '时间'),
+    'activity': ('activity', 'task', 'name', 'title', '活动', '事项'),
+    'duration': ('duration', 'minutes', 'duration_minutes', '时长'),
+}
+DATE_LINE = re.compile(r'^#*\s*(\d{4}-\d{2}-\d{2})\s*(?:时间记录)?$')
+DATED_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2})[\sT,]+(.+)$')
+CLOCK = re.compile(r'(\d{1,2}:\d{2})')  # 也能从 '2024-03-18 08:00:00' 中取出钟点
+CLOCK_DURATION = re.compile(r'^(\d{1,3}):([0-5]\d)$')  # 'H:MM' 形式的时长
+
+
+def detect_format(path: Path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        return 'csv'
+    if suffix in ('.json', '.jsonl', '.ndjson'):
+        return 'json'
+    return 'text'
+
+
+@functools.lru_cache(maxsize=4096)  # 同一天的行通常连在一起，strptime 较慢
+def valid_date(value) -> Optional[str]:
+    try:
+        return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _pick(row: Dict, field: str) -> str:
+    for name in CSV_COLUMNS[field]:
+        value = row.get(name)
+        if value not in (None, ''):
+            return str(value).strip()
+    return ''
+
+
+def _record_duration(value: str) -> Optional[str]:
+    """记录里的时长 -> 标准格式的时长：纯数字按分钟，'01:30' 按时:分，其余须能按标准格式解析"""
+    if value.isdigit():
+        return f"{value}min"
+    m = CLOCK_DURATION.match(value)
+    if m:
+        return NaturalLanguageParser.format_duration(int(m.group(1)) * 60 + int(m.group(2)))
+    return value if TimeBlockUtils.parse_duration_minutes(value) is not None else None
+
+
+def _record_text(row: Dict) -> Optional[str]:
+    """一条时间块记录 -> 'HH:MM 活动 时长'，缺少钟点、活动或时长无法识别时返回 None"""
+    clock = CLOCK.search(_pick(row, 'time'))
+    activity = _pick(row, 'activity')
+    duration = _record_duration(_pick(row, 'duration'))
+    if not clock or not activity or not duration:
+        return None
+    return f"{clock.group(1)} {activity} {duration}"
+
+
+def iter_csv(f: TextIO) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+    for row in csv.DictReader(f):
+        row = {(k or '').strip().lower(): v for k, v in row.items()}
+        yield valid_date(_pick(row, 'date')), _record_text(row)
+
+
+def iter_text(f: TextIO, date: Optional[str] = None) -> Iterator[Tuple[Optional[str], str]]:
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        m = DATE_LINE.match(line)
+        if m and valid_date(m.group(1)):
+            date = m.group(1)
+            continue
+        m = DATED_LINE.match(line)
+        if m and valid_date(m.group(1)):
+            yield m.group(1), m.group(2)
+        else:
+            yield date, line
+
+
+def _json_records(obj) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+    if not isinstance(obj, dict):
+        yield None, str(obj)
+        return
+    date = valid_date(_pick(obj, 'date'))
+    if 'time_blocks' in obj:  # 本程序的日文件
+        for line in str(obj['time_blocks']).splitlines():
+            if line.strip():
+                yield date, line
+    else:
+        yield date, _record_text(obj)
+
+
+def iter_json(f: TextIO) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+    """JSON Lines 逐行解析；跨多行的 JSON 数组或对象只能整体读入后解析"""
+    first = f.readline()
+    stripped = first.strip()
+    try:
+        json.loads(stripped)
+        whole_document = False
+    except ValueError:
+        whole_document = stripped.startswith(('[', '{'))
+    if whole_document:
+        doc = json.loads(first + f.read())
+        if isinstance(doc, dict):
+            doc = doc.get('days') or doc.get('records') or [doc]
+        for obj in doc:
+            yield from _json_records(obj)
+        return
+    for line in itertools.chain([first], f):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            doc = json.loads(line)
+        except ValueError:
+            yield None, line
+            continue
+        for obj in (doc if isinstance(doc, list) else [doc]):
+            yield from _json_records(obj)
+
+
+@dataclass
+class ImportProgress:
+    rows: int = 0          # 已读取的行
+    imported: int = 0      # 新写入的时间块
+    duplicates: int = 0    # 去重跳过
+    skipped: int = 0       # 无法识别或缺少日期
+    days: int = 0          # 写入过的天数（按批累计）
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """每秒处理的行数"""
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class BulkImporter:
+    """把 (日期, 文本行) 流按批写入存储后端
+
+    on_progress(ImportProgress) 在每批写入后回调。
+    """
+
+    def __init__(self, store, batch_rows: int = DEFAULT_BATCH_ROWS,
+                 on_progress: Optional[Callable[[ImportProgress], None]] = None):
+        self.store = store
+        self.batch_rows = batch_rows
+        self.on_progress = on_progress
+        self.checker = TimeBlockLineChecker()
+        self.progress = ImportProgress()
+
+    def import_file(self, path: Path, fmt: Optional[str] = None, date: Optional[str] = None) -> ImportProgress:
+        """date 为文本中没有日期的行使用的日期"""
+        fmt = fmt or detect_format(path)
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"未知的导入格式: {fmt}（可选: {', '.join(IMPORT_FORMATS)}）")
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            if fmt == 'csv':
+                records = iter_csv(f)
+            elif fmt == 'json':
+                records = iter_json(f)
+            else:
+                records = iter_text(f, date)
+            return self.import_records(records)
+
+    def import_records(self, records: Iterable[Tuple[Optional[str], Optional[str]]]) -> ImportProgress:
+        """text 为 None 表示记录无法拼成时间块（见 _record_text），计为跳过"""
+        started = time.perf_counter() - self.progress.elapsed
+        pending: Dict[str, Dict[Tuple[str, str], str]] = {}
+        pending_rows = 0
+        for date, text in records:
+            self.progress.rows += 1
+            parsed = self._parse(date, text)
+            if parsed is None:
+                self.progress.skipped += 1
+                continue
+            line, block = parsed
+            lines = pending.setdefault(date, {})
+            key = (block.time, block.activity)
+            if key in lines:
+                self.progress.duplicates += 1
+                continue
+            lines[key] = line
+            pending_rows += 1
+            if pending_rows >= self.batch_rows:
+                self._write_batch(pending, started)
+                pending, pending_rows = {}, 0
+        self._write_batch(pending, started)
+        logger.info(f"导入完成: {self.progress}")
+        return self.progress
+
+    def _parse(self, date: Optional[str], text: Optional[str]) -> Optional[Tuple[str, TimeBlock]]:
+        if not date or not text or not text.strip():
+            return None
+        line = text.strip()
+        if not TimeBlockUtils.is_standard_line(line):
+            # 只有自由文本才交给自然语言解析，换算不出时长的行跳过
+            _, normalized = self.checker.check(line)
+            if not normalized:
+                return None
+            line = normalized
+        block = TimeBlockUtils.parse_time_block_line(line, date)
+        if block is None or block.start_minute is None or block.duration_minutes is None:
+            return None
+        return line, block
+
+    def _write_batch(self, pending: Dict[str, Dict[Tuple[str, str], str]], started: float) -> None:
+        days = []
+        for date in sorted(pending):
+            data = self.store.load_day(date) or TimeTrackerData(date=date)
+            # 与已存的时间块按 (时间, 活动) 去重：之前导入过的、手动记过的都算重复
+            existing = {(b.time, b.activity) for b in TimeBlockUtils.parse_time_blocks(data.time_blocks, date)}
+            new_lines = [line for key, line in pending[date].items() if key not in existing]
+            self.progress.duplicates += len(pending[date]) - len(new_lines)
+            if not new_lines:
+                continue
+            data.time_blocks = '\n'.join(([data.time_blocks.rstrip()] if data.time_blocks.strip() else []) + new_lines)
+            self.progress.imported += len(new_lines)
+            days.append(data)
+        if days:
+            self.progress.days += self.store.bulk_import(days, [])
+        self.progress.elapsed = time.perf_counter() - started
+        if self.on_progress:
+            self.on_progress(self.progress)
@@ -0,0 +1,209 @@
+import os
+import re
+import json
+import time
+import bisect
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Iterable, Optional, Tuple
+
+from .models import TimeTrackerData, TaskItem
+from .analyzer import TimeBlockUtils
+from .taskops import TaskOpsLog
+
+logger = logging.getLogger(__name__)
+
+DAY_FILE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}\.json$')
+
+
+class DateManifest:
+    """data 目录的日期清单
+
+    记录每个 YYYY-MM-DD.json 的 mtime、大小、已记录分钟数、任务数和心情，
+    由 save_data 增量更新，可随时从头重建。日历视图、跳转到下一个有记录的日期、
+    区间统计都可以直接查清单，不必逐个打开日文件。
+
+    更新先记在内存里，清单文件至多每 SAVE_INTERVAL 秒重写一次，其余留给 flush
+    （存储关闭时调用）。有未写出的更新时存在 manifest.dirty 标记，异常退出后
+    下次打开会据此按 mtime 重新同步。
+    """
+
+    MANIFEST_FILE = 'manifest.json'
+    DIRTY_FILE = 'manifest.dirty'
+    VERSION = 1
+    SAVE_INTERVAL = 30.0
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.path = self.data_dir / self.MANIFEST_FILE
+        self.dirty_path = self.data_dir / self.DIRTY_FILE
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        self._dates: List[str] = []
+        self._dirty = False
+        self._saved_at = 0.0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != self.VERSION:
+                raise ValueError(f"不支持的清单版本 {manifest.get('version')}")
+            self.entries = manifest.get('dates', {})
+            self._dates = sorted(self.entries)
+        except FileNotFoundError:
+            if self.data_dir.exists():
+                self.rebuild()
+        except (OSError, ValueError) as e:
+            logger.warning(f"日期清单损坏，将重建: {e}")
+            self.rebuild()
+        else:
+            if self.dirty_path.exists():
+                logger.info("日期清单上次未写完，重新同步")
+                self._dirty = True
+                self.sync()
+
+    @staticmethod
+    def summarize(data: TimeTrackerData) -> Dict:
+        # 与 IncrementalTimeStats 口径一致：起始时间无法解析的行不计入
+        blocks = TimeBlockUtils.parse_time_blocks(data.time_blocks, data.date)
+        return {
+            'minutes': sum(TimeBlockUtils.counted_minutes(b.start_minute, b.duration_minutes) for b in blocks),
+            'tasks': len(data.tasks),
+            'tasks_done': sum(1 for t in data.tasks if t.done),
+            'mood': data.mood,
+            'has_diary': bool(data.diary.strip()),
+        }
+
+    @staticmethod
+    def _read_day(path: Path) -> TimeTrackerData:
+        with open(path, 'r', encoding='utf-8') as f:
+            d = json.load(f)
+        d['tasks'] = [TaskItem(**t) for t in d.get('tasks', [])]
+        TaskOpsLog.apply(d['tasks'], TaskOpsLog.read(TaskOpsLog.path(path.parent, d['date'])))
+        return TimeTrackerData(**d)
+
+    def _entry(self, data: TimeTrackerData, path: Path) -> Dict:
+        st = path.stat()
+        entry = {'mtime': st.st_mtime_ns, 'size': st.st_size}
+        entry.update(self.summarize(data))
+        return entry
+
+    def _save(self) -> None:
+        tmpfile = self.path.with_name(self.path.name + '.tmp')
+        with open(tmpfile, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'dates': self.entries}, f, ensure_ascii=False)
+        os.replace(tmpfile, self.path)
+        self._saved_at = time.monotonic()
+        if self._dirty:
+            self._dirty = False
+            self.dirty_path.unlink(missing_ok=True)
+
+    def _changed(self) -> None:
+        """记下一次更新，距上次写出超过 SAVE_INTERVAL 时才重写清单文件（调用方持有锁）"""
+        if not self._dirty:
+            self._dirty = True
+            self.dirty_path.touch()
+        if time.monotonic() - self._saved_at >= self.SAVE_INTERVAL:
+            self._save()
+
+    def flush(self) -> None:
+        """写出尚未落盘的更新"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def update(self, data: TimeTrackerData, path: Optional[Path] = None) -> Dict:
+        """保存某一天后更新它的条目"""
+        path = path or self.data_dir / f"{data.date}.json"
+        with self._lock:
+            entry = self._entry(data, path)
+            if data.date not in self.entries:
+                bisect.insort(self._dates, data.date)
+            self.entries[data.date] = entry
+            self._changed()
+        return entry
+
+    def update_many(self, items: Iterable[Tuple[TimeTrackerData, Path]]) -> int:
+        """批量导入后一次性更新多天的条目，清单文件只写一次"""
+        count = 0
+        with self._lock:
+            for data, path in items:
+                if data.date not in self.entries:
+                    bisect.insort(self._dates, data.date)
+                self.entries[data.date] = self._entry(data, path)
+                count += 1
+            if count:
+                self._save()
+        return count
+
+    def update_tasks(self, date: str, tasks: List[TaskItem]) -> None:
+        """只更新任务计数（任务勾选走增量日志，日文件本身没变）"""
+        with self._lock:
+            entry = self.entries.get(date)
+            if entry is None:
+                return
+            entry['tasks'] = len(tasks)
+            entry['tasks_done'] = sum(1 for t in tasks if t.done)
+            self._changed()
+
+    def remove(self, date: str) -> None:
+        with self._lock:
+            if self.entries.pop(date, None) is not None:
+                self._dates.remove(date)
+                self._changed()
+
+    def _scan(self, full: bool) -> int:
+        found = {}
+        with os.scandir(self.data_dir) as it:
+            for entry in it:
+                if DAY_FILE_PATTERN.match(entry.name):
+                    found[entry.name[:-5]] = entry
+        changed = 0
+        with self._lock:
+            for date in [d for d in self.entries if d not in found]:
+                del self.entries[date]
+                changed += 1
+            for date, dir_entry in found.items():
+                st = dir_entry.stat()
+                old = self.entries.get(date)
+                if not full and old and old['mtime'] == st.st_mtime_ns and old['size'] == st.st_size:
+                    continue
+                path = Path(dir_entry.path)
+                try:
+                    self.entries[date] = self._entry(self._read_day(path), path)
+                    changed += 1
+                except (OSError, ValueError, TypeError, KeyError) as e:
+                    logger.warning(f"跳过无法读取的日文件 {path}: {e}")
+            self._dates = sorted(self.entries)
+            if changed or self._dirty or not self.path.exists():
+                self._save()
+        return changed
+
+    def rebuild(self) -> int:
+        """从头扫描 data 目录重建清单，返回条目数"""
+        self.entries = {}
+        self._scan(full=True)
+        return len(self.entries)
+
+    def sync(self) -> int:
+        """只重新读取 mtime 或大小有变化的日文件，返回变化的条目数"""
+        return self._scan(full=False)
+
+    def dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        lo = bisect.bisect_left(self._dates, start) if start else 0
+        hi = bisect.bisect_right(self._dates, end) if end else len(self._dates)
+        return self._dates[lo:hi]
+
+    def get(self, date: str) -> Optional[Dict]:
+        return self.entries.get(date)
+
+    def next_date(self, date: str) -> Optional[str]:
+        idx = bisect.bisect_right(self._dates, date)
+        return self._dates[idx] if idx < len(self._dates) else None
+
+    def prev_date(self, date: str) -> Optional[str]:
+        idx = bisect.bisect_left(self._dates, date)
+        return self._dates[idx - 1] if idx > 0 else None
+
+    def total_minutes(self, start: Optional[str] = None, end: Optional[str] = None) -> int:
+        return sum(self.entries[d]['minutes'] for d in self.dates(start, end))
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 @dataclass
@@ -20,4 +20,6 @@ class TimeBlock:
     time: str
     activity: str
     duration: str
-    date: str = field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d")) 
\ No newline at end of file
+    date: str = field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d"))
+    start_minute: Optional[int] = None
+    duration_minutes: Optional[int] = None 
\ No newline at end of file
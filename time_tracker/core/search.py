@@ -0,0 +1,206 @@
+"""
+日记全文搜索
+
+倒排索引存在 data/search.sqlite3：postings 表以 (词, 日期) 为主键记录词频，docs 表保存每天
+参与索引的文本（日记和活动名）用于生成摘要。中文按相邻两字切分（bigram），每段末尾的
+单字另记一条，因此单字查询可以用词的前缀范围命中；英文和数字按整词、小写。
+保存某一天时只重建这一天的倒排记录（按日期索引删除旧记录），内容没有变化时直接跳过；全量重建见 rebuild。
+查询的所有词都要命中，结果按 BM25 打分排序。
+"""
+import logging
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .models import TimeTrackerData
+from .analyzer import TimeBlockUtils
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DB_FILE = 'search.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    date TEXT PRIMARY KEY,
+    diary TEXT NOT NULL,
+    activities TEXT NOT NULL,
+    length INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    date TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_date ON postings (date);
+"""
+
+CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]+')
+WORD_RE = re.compile(r'[0-9a-z]+')
+# 单字查询的前缀上界，大于任何以该字开头的词
+MAX_CHAR = '\U0010ffff'
+BM25_K1, BM25_B = 1.2, 0.75
+SNIPPET_CHARS = 24
+LOOKUP_CHUNK = 500  # IN (...) 每次最多带的日期数，低于 SQLite 的参数个数上限
+
+
+def tokenize(text: str) -> List[str]:
+    """中文按 bigram 切分（每段末尾的单字另记一条），英文数字按整词"""
+    tokens = []
+    for run in CJK_RE.findall(text):
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        tokens.append(run[-1])
+    tokens.extend(WORD_RE.findall(CJK_RE.sub(' ', text.lower())))
+    return tokens
+
+
+def query_terms(query: str) -> List[str]:
+    """查询切词：与 tokenize 相同，但多字中文段不需要末尾单字"""
+    terms = []
+    for run in CJK_RE.findall(query):
+        terms.extend([run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)])
+    terms.extend(WORD_RE.findall(CJK_RE.sub(' ', query.lower())))
+    return list(dict.fromkeys(terms))
+
+
+def activities_of(data: TimeTrackerData) -> str:
+    return ' '.join(dict.fromkeys(b.activity for b in TimeBlockUtils.parse_time_blocks(data.time_blocks, data.date)))
+
+
+def make_snippet(texts: Iterable[str], query: str, width: int = SNIPPET_CHARS) -> str:
+    """在第一段命中的文字里截取命中位置前后各 width 字，命中的部分用【】标出"""
+    words = [w.lower() for w in query.split()]
+    texts = [' '.join(t.split()) for t in texts if t and t.strip()]
+    for text in texts:
+        hits = [(pos, w) for pos, w in ((text.lower().find(w), w) for w in words) if pos >= 0]
+        if hits:
+            pos, word = min(hits)
+            start = max(0, pos - width)
+            end = min(len(text), pos + len(word) + width)
+            return ''.join(['…' if start else '', text[start:pos], '【', text[pos:pos + len(word)], '】',
+                            text[pos + len(word):end], '…' if end < len(text) else ''])
+    return texts[0][:width * 2] if texts else ''
+
+
+class SearchIndex:
+    """按天维护的倒排索引，连接在写线程和界面线程之间共用，由锁串行化"""
+
+    def __init__(self, data_dir: Path):
+        self.path = Path(data_dir) / SEARCH_DB_FILE
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        # 索引随时可以重建，不必每次提交都落盘
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def _write(self, date: str, diary: str, activities: str, replace: bool = True) -> None:
+        if replace:
+            self.conn.execute("DELETE FROM postings WHERE date = ?", (date,))
+        if not diary.strip() and not activities:
+            self.conn.execute("DELETE FROM docs WHERE date = ?", (date,))
+            return
+        counts = Counter(tokenize(diary) + tokenize(activities))
+        self.conn.execute("INSERT OR REPLACE INTO docs (date, diary, activities, length) VALUES (?, ?, ?, ?)",
+                          (date, diary, activities, sum(counts.values())))
+        self.conn.executemany("INSERT INTO postings (term, date, tf) VALUES (?, ?, ?)",
+                              [(term, date, tf) for term, tf in counts.items()])
+
+    def update(self, data: TimeTrackerData) -> bool:
+        """重建某一天的倒排记录；内容没变时跳过，返回是否写入"""
+        return self.update_many([data]) > 0
+
+    def update_many(self, days: Iterable[TimeTrackerData]) -> int:
+        """在一个事务内更新多天，返回实际写入的天数"""
+        docs = [(data.date, data.diary, activities_of(data)) for data in days]
+        written = 0
+        with self._lock, self.conn:
+            for date, diary, activities in docs:
+                row = self.conn.execute("SELECT diary, activities FROM docs WHERE date = ?", (date,)).fetchone()
+                if row == (diary, activities) or (row is None and not diary.strip() and not activities):
+                    continue
+                self._write(date, diary, activities)
+                written += 1
+        return written
+
+    def rebuild(self, days: Iterable[TimeTrackerData]) -> int:
+        """清空后在一个事务内重建，返回收录的天数"""
+        # 先在锁外读完，读取日数据时可能要等写线程，而写线程也会更新索引
+        docs = [(data.date, data.diary, activities_of(data)) for data in days]
+        with self._lock, self.conn:
+            # 先去掉日期索引，写完再建，比逐行维护快得多
+            self.conn.execute("DROP INDEX IF EXISTS postings_date")
+            self.conn.execute("DELETE FROM postings")
+            self.conn.execute("DELETE FROM docs")
+            for date, diary, activities in docs:
+                self._write(date, diary, activities, replace=False)
+            self.conn.execute("CREATE INDEX postings_date ON postings (date)")
+        with self._lock:
+            self.conn.execute("ANALYZE")
+        return len(self)
+
+    def _postings(self, term: str) -> Dict[str, int]:
+        if len(term) == 1 and CJK_RE.fullmatch(term):
+            cur = self.conn.execute(
+                "SELECT date, SUM(tf) FROM postings WHERE term >= ? AND term < ? GROUP BY date",
+                (term, term + MAX_CHAR))
+        else:
+            cur = self.conn.execute("SELECT date, tf FROM postings WHERE term = ?", (term,))
+        return dict(cur.fetchall())
+
+    def _lengths(self, dates: Iterable[str]) -> Dict[str, int]:
+        """只取候选日期的文档长度"""
+        dates = sorted(dates)
+        lengths = {}
+        for i in range(0, len(dates), LOOKUP_CHUNK):
+            chunk = dates[i:i + LOOKUP_CHUNK]
+            lengths.update(self.conn.execute(
+                f"SELECT date, length FROM docs WHERE date IN ({','.join('?' * len(chunk))})", chunk))
+        return lengths
+
+    def search(self, query: str, limit: int = 20, start: Optional[str] = None,
+               end: Optional[str] = None) -> List[Dict]:
+        """返回 [{'date', 'score', 'snippet'}]，按相关度降序；start/end 为日期闭区间"""
+        terms = query_terms(query)
+        if not terms:
+            return []
+        with self._lock:
+            n_docs, avg_len = self.conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+            if not n_docs:
+                return []
+            postings = []
+            for term in terms:
+                hits = self._postings(term)
+                if not hits:
+                    return []
+                postings.append(hits)
+            candidates = set.intersection(*(set(p) for p in postings))
+            candidates = {d for d in candidates if (start is None or d >= start) and (end is None or d <= end)}
+            if not candidates:
+                return []
+            lengths = self._lengths(candidates)
+            scores = {}
+            for hits in postings:
+                idf = math.log(1 + (n_docs - len(hits) + 0.5) / (len(hits) + 0.5))
+                for date in candidates:
+                    tf = hits[date]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[date] / avg_len)
+                    scores[date] = scores.get(date, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+            # 只为返回的结果取原文生成摘要
+            return [{'date': date, 'score': round(score, 4),
+                     'snippet': make_snippet(self.conn.execute(
+                         "SELECT diary, activities FROM docs WHERE date = ?", (date,)).fetchone(), query)}
+                    for date, score in ranked]
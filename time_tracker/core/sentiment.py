@@ -0,0 +1,330 @@
+import os
+import re
+import json
+import math
+import time
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'distilbert-base-uncased-finetuned-sst-2-english'
+BACKEND_ENV = 'TIME_TRACKER_SENTIMENT'
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class SentimentBackend(ABC):
+    """情感分析后端接口：analyze 批量返回 {'label': ..., 'score': ...}"""
+
+    name = ''
+
+    @abstractmethod
+    def analyze(self, texts: List[str], max_length: int = 512) -> List[Dict]:
+        ...
+
+
+class LexiconSentimentBackend(SentimentBackend):
+    """内置的中文词典/规则打分，无需下载模型，单篇日记耗时在微秒级
+
+    所有情感词编译成一个按长度优先的正则，逐个命中后只看紧挨在它前面的修饰词（最多两个，
+    如 '很不开心'、'不太顺利'）：否定词翻转，程度副词加权，累计得分的符号决定标签。
+    修饰词必须紧挨着，不会跨过标点或其他字，'未来很美好' 里的 '未' 不算否定；
+    '未来'、'无论' 这类以否定字开头的词也不算。
+    """
+
+    name = 'lexicon'
+
+    POSITIVE_WORDS = (
+        '开心 高兴 快乐 愉快 幸福 满足 满意 兴奋 激动 喜欢 喜悦 欣慰 感动 感激 感谢 温暖 轻松 放松 '
+        '舒服 舒适 顺利 成功 进步 收获 充实 期待 希望 自信 骄傲 美好 不错 很好 棒 优秀 完美 有趣 '
+        '好玩 甜 安心 平静 踏实 治愈 惊喜 爱 笑 赞 值得 精彩 痛快 乐观 积极 高效 专注 坚持 完成'
+    ).split()
+    NEGATIVE_WORDS = (
+        '难过 伤心 悲伤 痛苦 失望 沮丧 郁闷 烦躁 烦恼 焦虑 紧张 担心 害怕 恐惧 生气 愤怒 讨厌 '
+        '厌烦 无聊 孤独 寂寞 疲惫 累 困 崩溃 绝望 后悔 委屈 压抑 压力 心累 难受 糟糕 倒霉 失败 '
+        '拖延 迷茫 不安 无助 哭 丧 烦 惨 差劲 头疼 生病 失眠 内耗 自责 遗憾 空虚 低落 消极'
+    ).split()
+    # '别' 是劝阻（'别太难过'），不否定后面的情绪，不算否定词
+    NEGATIONS = ('不', '没', '没有', '未', '无', '毫不', '并不', '不太')
+    NOT_NEGATIONS = ('未来', '无比', '不错', '无论', '不过', '不管')
+    DEGREES = {
+        '极其': 2.0, '无比': 2.0, '非常': 1.8, '特别': 1.8, '超级': 1.8, '太': 1.6, '超': 1.6, '十分': 1.6,
+        '很': 1.4, '挺': 1.2, '比较': 1.1, '有点': 0.7, '有些': 0.7, '稍微': 0.6, '略': 0.6,
+    }
+    MAX_MODIFIERS = 2
+
+    def __init__(self):
+        polarity = {w: 1.0 for w in self.POSITIVE_WORDS}
+        polarity.update({w: -1.0 for w in self.NEGATIVE_WORDS})
+        self.polarity = polarity
+        words = sorted(polarity, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(map(re.escape, words)))
+        self.modifiers = sorted(list(self.NEGATIONS) + list(self.DEGREES), key=len, reverse=True)
+
+    def _in_compound(self, text: str, start: int, negation: str) -> bool:
+        """text[start:] 处的否定字是否属于 '未来'、'无论' 这类词"""
+        for word in self.NOT_NEGATIONS:
+            offset = word.find(negation)
+            if offset >= 0 and text.startswith(word, start - offset):
+                return True
+        return False
+
+    def _modifiers_before(self, text: str, pos: int, lo: int) -> List[str]:
+        """紧挨在 pos 之前的修饰词，从近到远；不越过 lo（上一个情感词的结尾）"""
+        found = []
+        while len(found) < self.MAX_MODIFIERS:
+            for mod in self.modifiers:
+                start = pos - len(mod)
+                if start >= lo and text.startswith(mod, start):
+                    break
+            else:
+                break
+            if mod in self.NEGATIONS and self._in_compound(text, start, mod):
+                break
+            found.append(mod)
+            pos = start
+        return found
+
+    def score(self, text: str) -> float:
+        total = 0.0
+        polarity = self.polarity
+        previous_end = 0
+        for m in self.pattern.finditer(text):
+            value = polarity[m.group()]
+            for mod in self._modifiers_before(text, m.start(), previous_end):
+                if mod in self.DEGREES:
+                    value *= self.DEGREES[mod]
+                else:
+                    value = -value
+            previous_end = m.end()
+            total += value
+        return total
+
+    def analyze(self, texts: List[str], max_length: int = 512) -> List[Dict]:
+        results = []
+        for text in texts:
+            total = self.score(text)
+            if total == 0:
+                results.append({'label': 'NEUTRAL', 'score': 0.5})
+                continue
+            confidence = 0.5 + 0.5 * math.tanh(abs(total) / 2)
+            results.append({'label': 'POSITIVE' if total > 0 else 'NEGATIVE', 'score': round(confidence, 4)})
+        return results
+
+
+class TransformersSentimentBackend(SentimentBackend):
+    """可选的 transformers 模型后端，首次 analyze 时才加载模型"""
+
+    name = 'transformers'
+
+    def __init__(self, model: str = DEFAULT_MODEL):
+        self.model = model
+        self.pipeline = None
+
+    def analyze(self, texts: List[str], max_length: int = 512) -> List[Dict]:
+        if self.pipeline is None:
+            from transformers import pipeline
+            self.pipeline = pipeline('sentiment-analysis', model=self.model)
+        # 按 token 截断，而不是按字符截断
+        return self.pipeline(texts, truncation=True, max_length=max_length)
+
+
+SENTIMENT_BACKENDS = {
+    LexiconSentimentBackend.name: LexiconSentimentBackend,
+    TransformersSentimentBackend.name: TransformersSentimentBackend,
+}
+
+
+def get_sentiment_backend(name: Optional[str] = None) -> SentimentBackend:
+    """按名称创建后端，默认读取环境变量 TIME_TRACKER_SENTIMENT，未设置时使用内置词典"""
+    name = name or os.environ.get(BACKEND_ENV) or LexiconSentimentBackend.name
+    try:
+        return SENTIMENT_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"未知的情感分析后端: {name}（可选: {', '.join(SENTIMENT_BACKENDS)}）")
+
+
+class SentimentWorker:
+    """常驻的日记情感分析线程
+
+    save_data 只把 (日期, 日记) 放进队列：同一日期的多次提交会合并为最后一次，
+    积攒的多篇日记在一次调用里交给后端批量分析。结果按“后端名:日记内容哈希”缓存并
+    持久化到 data/sentiment_cache.json，内容没变的日记不会重复分析。缓存文件在空闲时
+    至多每 save_interval 秒重写一次，stop 时写出剩余结果。
+    """
+
+    CACHE_FILE = 'sentiment_cache.json'
+
+    def __init__(self, data_dir: Path, backend: Optional[SentimentBackend] = None,
+                 on_result: Optional[Callable[[str, Dict], None]] = None,
+                 batch_size: int = 8, coalesce_delay: float = 0.5, max_length: int = 512,
+                 save_interval: float = 10.0):
+        self.data_dir = Path(data_dir)
+        self.cache_path = self.data_dir / self.CACHE_FILE
+        self.backend = backend or get_sentiment_backend()
+        self.on_result = on_result
+        self.batch_size = batch_size
+        self.coalesce_delay = coalesce_delay
+        self.max_length = max_length
+        self.save_interval = save_interval
+        self.unavailable = False
+        self._pending: Dict[str, str] = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stopped = False
+        self.cache: Dict[str, Dict] = self._load_cache()
+        self._cache_dirty = False
+        self._saved_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='sentiment-worker', daemon=True)
+        self._thread.start()
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"情感缓存损坏，已忽略: {e}")
+            return {}
+
+    def _save_cache(self) -> None:
+        tmpfile = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        with open(tmpfile, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f, ensure_ascii=False)
+        os.replace(tmpfile, self.cache_path)
+
+    def _flush_cache(self, force: bool = False) -> None:
+        """缓存有新结果时写盘；不带 force 时距上次写盘不足 save_interval 秒则跳过"""
+        if not self._cache_dirty or (not force and time.monotonic() - self._saved_at < self.save_interval):
+            return
+        try:
+            self._save_cache()
+        except OSError as e:
+            logger.warning(f"保存情感缓存失败: {e}")
+        self._cache_dirty = False
+        self._saved_at = time.monotonic()
+
+    def cache_key(self, text: str) -> str:
+        return f"{self.backend.name}:{text_hash(text)}"
+
+    def cached(self, text: str) -> Optional[Dict]:
+        return self.cache.get(self.cache_key(text))
+
+    def submit(self, date: str, text: str) -> None:
+        """提交一篇日记；已缓存的结果立即回调，不进入队列"""
+        text = text.strip()
+        if not text:
+            return
+        result = self.cached(text)
+        if result is not None:
+            self._emit(date, result)
+            return
+        with self._cond:
+            self._pending[date] = text
+            self._cond.notify()
+
+    def backfill(self, items: Iterable[Tuple[str, str]]) -> int:
+        """批量提交历史日记（跳过已缓存的），返回入队数量"""
+        # items 可能边读日数据边产出，在锁外取完，免得读盘期间挡住工作线程和 submit
+        todo = {}
+        for date, text in items:
+            text = text.strip()
+            if text and self.cache_key(text) not in self.cache:
+                todo[date] = text
+        if todo:
+            with self._cond:
+                self._pending.update(todo)
+                self._cond.notify()
+        return len(todo)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """等待队列清空且没有正在进行的推理"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while (self._pending or self._busy) and not self._stopped:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self) -> None:
+        """结束线程（正在分析的一批会做完），并写出缓存"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _emit(self, date: str, result: Dict) -> None:
+        if self.on_result:
+            try:
+                self.on_result(date, result)
+            except Exception as e:
+                logger.error(f"情感分析回调失败: {e}", exc_info=True)
+
+    def _take_batch(self) -> Optional[List[Tuple[str, str]]]:
+        """取下一批；停止时返回空列表，空闲到该写缓存时返回 None"""
+        with self._cond:
+            while not self._pending and not self._stopped:
+                if not self._cache_dirty:
+                    self._cond.wait()
+                    continue
+                remaining = self._saved_at + self.save_interval - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            if self._stopped:
+                return []
+        # 稍等片刻，把连续保存合并成一次
+        time.sleep(self.coalesce_delay)
+        with self._cond:
+            batch = list(self._pending.items())[:self.batch_size]
+            for date, _ in batch:
+                del self._pending[date]
+            self._busy = True
+            return batch
+
+    def _analyze(self, texts: List[str]) -> List[Dict]:
+        if self.unavailable:
+            raise RuntimeError(f"情感分析后端 {self.backend.name} 不可用")
+        try:
+            return self.backend.analyze(texts, max_length=self.max_length)
+        except ImportError:
+            # 可选依赖缺失（如未安装 transformers）后不再反复重试
+            self.unavailable = True
+            raise
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                self._flush_cache()
+                continue
+            if not batch:
+                self._flush_cache(force=True)
+                return
+            try:
+                todo = [(date, text) for date, text in batch if self.cache_key(text) not in self.cache]
+                if todo:
+                    results = self._analyze([text for _, text in todo])
+                    for (_, text), result in zip(todo, results):
+                        self.cache[self.cache_key(text)] = {'label': result['label'], 'score': float(result['score'])}
+                    self._cache_dirty = True
+                    self._flush_cache()
+                for date, text in batch:
+                    self._emit(date, self.cache[self.cache_key(text)])
+            except Exception as e:
+                logger.error(f"情感分析失败: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
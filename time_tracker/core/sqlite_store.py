@@ -0,0 +1,262 @@
+"""
+SQLite 存储后端
+
+全部数据放在 data/timetracker.sqlite3 一个文件里，使用 WAL 模式，读写互不阻塞。
+- days: 每天一行，date 为主键，保存时整行 UPSERT，摘要列（分钟数、任务数等）一并写入
+- tasks: (date, position) 为主键，勾选任务只更新一行
+- time_blocks: (date, time, activity) 为主键去重，另有 (activity, date) 索引
+日期区间查询、去重和按天覆盖都走索引。连接在界面线程和写线程之间共用，由锁串行化。
+"""
+import itertools
+import logging
+import sqlite3
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .models import TimeTrackerData, TaskItem
+from .analyzer import TimeBlockUtils, TimeBlockJournal
+from .storage import StorageBackend, SQLITE_DB_FILE
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    time_blocks TEXT NOT NULL DEFAULT '',
+    diary TEXT NOT NULL DEFAULT '',
+    mood TEXT NOT NULL DEFAULT '',
+    minutes INTEGER NOT NULL DEFAULT 0,
+    tasks INTEGER NOT NULL DEFAULT 0,
+    tasks_done INTEGER NOT NULL DEFAULT 0,
+    has_diary INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tasks (
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS time_blocks (
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    activity TEXT NOT NULL,
+    duration TEXT NOT NULL,
+    start_minute INTEGER,
+    duration_minutes INTEGER,
+    PRIMARY KEY (date, time, activity)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS time_blocks_activity ON time_blocks (activity, date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# fsync 策略 -> PRAGMA synchronous。WAL 下 NORMAL 断电可能丢最近的提交，但不会损坏数据库
+SYNCHRONOUS = {'always': 'EXTRA', 'file': 'FULL', 'never': 'NORMAL'}
+
+DAY_COLUMNS = ('date', 'time_blocks', 'diary', 'mood', 'minutes', 'tasks', 'tasks_done', 'has_diary')
+BLOCK_COLUMNS = tuple(TimeBlockJournal.FIELDNAMES)
+
+VERSION_KEY = 'timeblocks_version:'
+BULK_CHUNK = 500  # bulk_import 每个事务写入的天数
+
+# 日期区间的默认上下界，'9999' 大于任何 YYYY-MM-DD
+MIN_DATE, MAX_DATE = '', '9999'
+
+
+class SQLiteStore(StorageBackend):
+    name = 'sqlite'
+    DB_FILE = SQLITE_DB_FILE
+
+    @classmethod
+    def db_path(cls, data_dir: Path) -> Path:
+        return Path(data_dir) / cls.DB_FILE
+
+    def __init__(self, data_dir: Path, fsync: Optional[str] = None):
+        super().__init__(data_dir, fsync)
+        self.path = self.db_path(self.data_dir)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={SYNCHRONOUS[self.fsync]}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            self.conn.close()
+
+    @staticmethod
+    def _block_rows(data: TimeTrackerData) -> List[tuple]:
+        rows = {}
+        for block in TimeBlockUtils.parse_time_blocks(data.time_blocks, data.date):
+            row = asdict(block)
+            rows[(row['date'], row['time'], row['activity'])] = tuple(row[c] for c in BLOCK_COLUMNS)
+        return list(rows.values())
+
+    @staticmethod
+    def _day_row(data: TimeTrackerData, blocks: List[tuple]) -> tuple:
+        start_at, minutes_at = BLOCK_COLUMNS.index('start_minute'), BLOCK_COLUMNS.index('duration_minutes')
+        return (
+            data.date, data.time_blocks, data.diary, data.mood,
+            sum(TimeBlockUtils.counted_minutes(row[start_at], row[minutes_at]) for row in blocks),
+            len(data.tasks), sum(1 for t in data.tasks if t.done), int(bool(data.diary.strip())),
+        )
+
+    def _bump_versions(self, months: Iterable[str]) -> None:
+        """时间块有变化的月份版本号加一，统计归档据此只重建这些月份"""
+        self.conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+            [(f"{VERSION_KEY}{month}",) for month in sorted(set(months))])
+
+    def exists(self, date: str) -> bool:
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM days WHERE date = ?", (date,)).fetchone() is not None
+
+    def load_day(self, date: str) -> Optional[TimeTrackerData]:
+        self.flush()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT time_blocks, diary, mood FROM days WHERE date = ?", (date,)).fetchone()
+            if row is None:
+                return None
+            tasks = [TaskItem(text, bool(done)) for text, done in self.conn.execute(
+                "SELECT text, done FROM tasks WHERE date = ? ORDER BY position", (date,))]
+        return TimeTrackerData(date=date, time_blocks=row[0], diary=row[1], tasks=tasks, mood=row[2])
+
+    def save_day(self, data: TimeTrackerData) -> None:
+        blocks = self._block_rows(data)
+        placeholders = ', '.join('?' * len(DAY_COLUMNS))
+        updates = ', '.join(f"{c} = excluded.{c}" for c in DAY_COLUMNS[1:])
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"INSERT INTO days ({', '.join(DAY_COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(date) DO UPDATE SET {updates}", self._day_row(data, blocks))
+            self.conn.execute("DELETE FROM tasks WHERE date = ?", (data.date,))
+            self.conn.executemany(
+                "INSERT INTO tasks (date, position, text, done) VALUES (?, ?, ?, ?)",
+                [(data.date, i, t.text, int(t.done)) for i, t in enumerate(data.tasks)])
+            old = self.conn.execute(
+                f"SELECT {', '.join(BLOCK_COLUMNS)} FROM time_blocks WHERE date = ?", (data.date,)).fetchall()
+            # 时间块没变时不动表，也不让统计归档失效
+            if set(old) != set(blocks):
+                self.conn.execute("DELETE FROM time_blocks WHERE date = ?", (data.date,))
+                self.conn.executemany(
+                    f"INSERT INTO time_blocks ({', '.join(BLOCK_COLUMNS)}) VALUES ({', '.join('?' * len(BLOCK_COLUMNS))})",
+                    blocks)
+                self._bump_versions([data.date[:7]])
+        self.index_days([data])
+
+    def dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        with self._lock:
+            return [date for (date,) in self.conn.execute(
+                "SELECT date FROM days WHERE date BETWEEN ? AND ? ORDER BY date",
+                (start or MIN_DATE, end or MAX_DATE))]
+
+    def summary(self, date: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT minutes, tasks, tasks_done, mood, has_diary FROM days WHERE date = ?", (date,)).fetchone()
+        if row is None:
+            return None
+        return {'minutes': row[0], 'tasks': row[1], 'tasks_done': row[2], 'mood': row[3], 'has_diary': bool(row[4])}
+
+    def apply_task_ops(self, date: str, ops: List[Dict], tasks: Optional[List[TaskItem]]) -> None:
+        with self._lock, self.conn:
+            for op in ops:
+                done = int(bool(op.get('done')))
+                cur = self.conn.execute(
+                    "UPDATE tasks SET done = ? WHERE date = ? AND position = ? AND text = ?",
+                    (done, date, op.get('index'), op.get('text')))
+                if cur.rowcount == 0:
+                    # 序号对不上时按内容找第一条
+                    self.conn.execute(
+                        "UPDATE tasks SET done = ? WHERE date = ? AND position = "
+                        "(SELECT position FROM tasks WHERE date = ? AND text = ? ORDER BY position LIMIT 1)",
+                        (done, date, date, op.get('text')))
+            self.conn.execute(
+                "UPDATE days SET tasks_done = (SELECT COUNT(*) FROM tasks WHERE date = ? AND done) WHERE date = ?",
+                (date, date))
+
+    def load_time_blocks(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            cur = self.conn.execute(
+                f"SELECT {', '.join(BLOCK_COLUMNS)} FROM time_blocks WHERE date BETWEEN ? AND ? ORDER BY date",
+                (start or MIN_DATE, end or MAX_DATE))
+            return [dict(zip(BLOCK_COLUMNS, row)) for row in cur]
+
+    def time_block_months(self) -> Dict[str, List]:
+        with self._lock:
+            # 早期版本的数据库没有按月的版本号，这些月份记为 0
+            months = {month: [0] for (month,) in self.conn.execute(
+                "SELECT DISTINCT substr(date, 1, 7) FROM time_blocks")}
+            for key, value in self.conn.execute(
+                    "SELECT key, value FROM meta WHERE key LIKE ?", (f"{VERSION_KEY}%",)):
+                months[key[len(VERSION_KEY):]] = [int(value)]
+        return months
+
+    def reindex(self) -> int:
+        self.flush()
+        with self._lock:
+            self.conn.execute("ANALYZE")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return self.conn.execute("SELECT COUNT(*) FROM days").fetchone()[0]
+
+    def bulk_import(self, days: Iterable[TimeTrackerData], rows: Iterable[Dict]) -> int:
+        """分块写入，每 BULK_CHUNK 天一个事务，内存占用与总天数无关
+
+        每天的时间块由它的日文本重新解析，写入前先删掉该日期的旧行；rows 只补充没有日数据的
+        日期（如旧版只有时间块 CSV 的日子），不会把来源里过期的行带进来。
+        """
+        count = 0
+        imported = set()
+        for chunk in _chunks(days, BULK_CHUNK):
+            self._import_days(chunk)
+            imported.update(data.date for data in chunk)
+            count += len(chunk)
+        extra = 0
+        orphan_rows = (tuple(row.get(c) for c in BLOCK_COLUMNS) for row in rows if row.get('date') not in imported)
+        for chunk in _chunks(orphan_rows, BULK_CHUNK * 20):
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO time_blocks ({', '.join(BLOCK_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(BLOCK_COLUMNS))})", chunk)
+                self._bump_versions(row[0][:7] for row in chunk)
+            extra += len(chunk)
+        logger.info(f"已导入 {count} 天，另有 {extra} 条没有日数据的时间块")
+        return count
+
+    def _import_days(self, days: List[TimeTrackerData]) -> None:
+        day_rows, task_rows, block_rows = [], [], []
+        for data in days:
+            blocks = self._block_rows(data)
+            day_rows.append(self._day_row(data, blocks))
+            task_rows.extend((data.date, i, t.text, int(t.done)) for i, t in enumerate(data.tasks))
+            block_rows.extend(blocks)
+        dates = [(data.date,) for data in days]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO days ({', '.join(DAY_COLUMNS)}) VALUES ({', '.join('?' * len(DAY_COLUMNS))})",
+                day_rows)
+            self.conn.executemany("DELETE FROM tasks WHERE date = ?", dates)
+            self.conn.executemany("INSERT INTO tasks (date, position, text, done) VALUES (?, ?, ?, ?)", task_rows)
+            self.conn.executemany("DELETE FROM time_blocks WHERE date = ?", dates)
+            self.conn.executemany(
+                f"INSERT INTO time_blocks ({', '.join(BLOCK_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(BLOCK_COLUMNS))})", block_rows)
+            self._bump_versions(date[:7] for (date,) in dates)
+        self.index_days(days)
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[List]:
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
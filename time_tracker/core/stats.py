@@ -0,0 +1,190 @@
+from collections import Counter
+from datetime import date as Date
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from .models import TimeBlock
+from .analyzer import TimeBlockUtils
+from .archive import TimeBlockArchive, load_numpy
+
+
+class IncrementalTimeStats:
+    """单日时间块的增量统计
+
+    按行内容缓存解析结果，每次 update 只解析上次之后新增或改动的行，
+    并维护总时长与各活动时长的累计值。内容不变时 update 直接返回。
+    """
+
+    def __init__(self, date: str = ""):
+        self.version = 0
+        self.reset(date)
+
+    def reset(self, date: str = "") -> None:
+        self.date = date
+        self.total_minutes = 0
+        self.activity_minutes: Counter = Counter()
+        self._text: Optional[str] = None
+        self._lines: List[str] = []
+        self._line_counts: Counter = Counter()
+        self._cache: Dict[str, Optional[TimeBlock]] = {}
+        self.parsed_lines = 0  # 累计真正解析过的行数，便于观察缓存命中
+
+    @staticmethod
+    def _counted(block: Optional[TimeBlock]) -> bool:
+        return block is not None and TimeBlockUtils.counted_minutes(block.start_minute, block.duration_minutes) > 0
+
+    def _apply(self, line: str, count: int) -> None:
+        block = self._cache.get(line)
+        if block is None and line not in self._cache:
+            block = self._cache[line] = TimeBlockUtils.parse_time_block_line(line, self.date)
+            self.parsed_lines += 1
+        if self._counted(block):
+            self.total_minutes += block.duration_minutes * count
+            self.activity_minutes[block.activity] += block.duration_minutes * count
+            if self.activity_minutes[block.activity] <= 0:
+                del self.activity_minutes[block.activity]
+
+    def update(self, time_blocks: str, date: Optional[str] = None) -> bool:
+        """用最新文本更新统计，返回统计结果是否发生变化"""
+        date_changed = date is not None and date != self.date
+        if date_changed:
+            self.reset(date)
+        if time_blocks == self._text:
+            return False
+        self._text = time_blocks
+        lines = [line.strip() for line in time_blocks.splitlines()]
+        lines = [line for line in lines if line]
+        counts = Counter(lines)
+        old_total, old_activities = self.total_minutes, dict(self.activity_minutes)
+        for line, count in (self._line_counts - counts).items():
+            self._apply(line, -count)
+        for line, count in (counts - self._line_counts).items():
+            self._apply(line, count)
+        for line in self._line_counts.keys() - counts.keys():
+            self._cache.pop(line, None)
+        self._lines = lines
+        self._line_counts = counts
+        changed = date_changed or self.total_minutes != old_total or dict(self.activity_minutes) != old_activities
+        if changed:
+            self.version += 1
+        return changed
+
+    def blocks(self) -> List[TimeBlock]:
+        """按文本顺序返回计入统计的时间块（只查缓存，不重新解析）"""
+        return [self._cache[line] for line in self._lines if self._counted(self._cache[line])]
+
+    def distribution(self) -> List[Tuple[str, int]]:
+        """按时长降序的 (活动, 分钟数)"""
+        return self.activity_minutes.most_common()
+
+
+class TimeStatsEngine:
+    """基于列式归档的历史统计
+
+    按日、ISO 周、月、年、活动、小时分组汇总分钟数。有 numpy 时在整列上用
+    unique/bincount 批量计算，否则退回对 memoryview 的逐行循环。
+    """
+
+    PERIODS = ('day', 'week', 'month', 'year')
+
+    def __init__(self, archive: TimeBlockArchive):
+        self.archive = archive
+
+    @classmethod
+    def from_data_dir(cls, data_dir: Path, store=None) -> 'TimeStatsEngine':
+        return cls(TimeBlockArchive.open(data_dir, store=store))
+
+    def close(self) -> None:
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def period_key(ordinal: int, period: str) -> str:
+        day = Date.fromordinal(ordinal)
+        if period == 'day':
+            return day.isoformat()
+        if period == 'week':
+            year, week, _ = day.isocalendar()
+            return f"{year}-W{week:02d}"
+        if period == 'month':
+            return f"{day.year}-{day.month:02d}"
+        if period == 'year':
+            return str(day.year)
+        raise ValueError(f"不支持的统计周期: {period}")
+
+    def _columns(self, start: Optional[str], end: Optional[str]):
+        rng = self.archive.slice_for(start, end)
+        return self.archive.dates[rng], self.archive.durations[rng]
+
+    def by_period(self, period: str, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, int]:
+        """按周期汇总分钟数，键为 '2024-03-20' / '2024-W12' / '2024-03' / '2024'"""
+        if period not in self.PERIODS:
+            raise ValueError(f"不支持的统计周期: {period}")
+        np = load_numpy()
+        dates, durations = self._columns(start, end)
+        totals: Dict[str, int] = {}
+        if np is not None:
+            days, inverse = np.unique(dates, return_inverse=True)
+            keys = [self.period_key(int(ordinal), period) for ordinal in days]
+            key_ids: Dict[str, int] = {}
+            day_to_key = np.array([key_ids.setdefault(key, len(key_ids)) for key in keys], dtype=np.int64)
+            sums = np.bincount(day_to_key[inverse], weights=durations, minlength=len(key_ids))
+            for key, total in zip(key_ids, sums.astype(np.int64).tolist()):
+                totals[key] = total
+            return totals
+        key_cache: Dict[int, str] = {}
+        for ordinal, duration in zip(dates, durations):
+            key = key_cache.get(ordinal)
+            if key is None:
+                key = key_cache[ordinal] = self.period_key(ordinal, period)
+            totals[key] = totals.get(key, 0) + duration
+        return totals
+
+    def by_day(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, int]:
+        return self.by_period('day', start, end)
+
+    def by_week(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, int]:
+        return self.by_period('week', start, end)
+
+    def by_month(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, int]:
+        return self.by_period('month', start, end)
+
+    def by_year(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, int]:
+        return self.by_period('year', start, end)
+
+    def by_activity(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, int]:
+        return self.archive.minutes_by_activity(start, end)
+
+    def by_weekday(self, start: Optional[str] = None, end: Optional[str] = None) -> List[int]:
+        return self.archive.minutes_by_weekday(start, end)
+
+    def by_hour(self, start: Optional[str] = None, end: Optional[str] = None) -> List[int]:
+        """把每个时间块按分钟拆到一天中的 24 个小时，跨零点的部分计入次日对应小时"""
+        np = load_numpy()
+        rng = self.archive.slice_for(start, end)
+        starts, durations = self.archive.starts[rng], self.archive.durations[rng]
+        hours = [0] * 24
+        if np is not None:
+            known = starts >= 0
+            begin = starts[known].astype(np.int64)
+            finish = begin + durations[known]
+            if not len(begin):
+                return hours
+            for h in range(int(finish.max()) // 60 + 1):
+                overlap = np.minimum(finish, (h + 1) * 60) - np.maximum(begin, h * 60)
+                hours[h % 24] += int(overlap[overlap > 0].sum())
+            return hours
+        for begin, duration in zip(starts, durations):
+            if begin < 0:
+                continue
+            minute, finish = begin, begin + duration
+            while minute < finish:
+                boundary = min((minute // 60 + 1) * 60, finish)
+                hours[(minute // 60) % 24] += boundary - minute
+                minute = boundary
+        return hours
@@ -0,0 +1,438 @@
+import os
+import json
+import time
+import atexit
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import TimeTrackerData, TaskItem
+from .analyzer import TimeBlockUtils, TimeBlockJournal
+from .fileio import atomic_open, check_fsync_policy
+from .taskops import TaskOpsLog
+from .manifest import DateManifest
+
+logger = logging.getLogger(__name__)
+
+
+STORAGE_ENV = 'TIME_TRACKER_STORAGE'
+SQLITE_DB_FILE = 'timetracker.sqlite3'
+BACKEND_FILE = 'storage_backend'  # 数据目录选用的后端名，由迁移写入
+MIGRATE_CHUNK = 500  # 迁移时每批读写的天数
+
+
+class StorageBackend(ABC):
+    """存储后端接口
+
+    日数据（时间块文本、日记、任务、心情）和派生的时间块行都经由这里读写，界面和命令行
+    不关心底层是 JSON 文件还是数据库。子类实现读写，写后队列、任务勾选的批量提交等
+    通用逻辑在这里。
+    """
+
+    name = ''
+
+    def __init__(self, data_dir: Path, fsync: Optional[str] = None):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.fsync = check_fsync_policy(fsync)
+        self._writer = None
+        self._ops_lock = threading.Lock()
+        self._pending_ops = {}
+        self._search_lock = threading.Lock()
+        self._search = None
+
+    @staticmethod
+    def to_dict(data: TimeTrackerData) -> dict:
+        d = asdict(data)
+        d['tasks'] = [asdict(t) for t in data.tasks]
+        return d
+
+    @staticmethod
+    def from_dict(d: dict) -> TimeTrackerData:
+        d = dict(d)
+        d['tasks'] = [TaskItem(**t) for t in d.get('tasks', [])]
+        return TimeTrackerData(**d)
+
+    # 以下由具体后端实现
+
+    @abstractmethod
+    def exists(self, date: str) -> bool:
+        """这一天是否有记录"""
+
+    @abstractmethod
+    def load_day(self, date: str) -> Optional[TimeTrackerData]:
+        """读取某一天，不存在时返回 None；会先等待排队中的写入"""
+
+    @abstractmethod
+    def save_day(self, data: TimeTrackerData) -> None:
+        """整天覆盖保存，同时更新派生的时间块行"""
+
+    @abstractmethod
+    def dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """有记录的日期（升序），start/end 为闭区间"""
+
+    @abstractmethod
+    def summary(self, date: str) -> Optional[Dict]:
+        """某一天的摘要：minutes、tasks、tasks_done、mood、has_diary"""
+
+    @abstractmethod
+    def apply_task_ops(self, date: str, ops: List[Dict], tasks: Optional[List[TaskItem]]) -> None:
+        """持久化一批任务勾选（格式见 core.taskops）"""
+
+    @abstractmethod
+    def load_time_blocks(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        """时间块行（字段同 TimeBlockJournal.FIELDNAMES），按日期排序"""
+
+    @abstractmethod
+    def time_block_months(self) -> Dict[str, List]:
+        """每个月份时间块的版本标识，统计归档只重建标识变化的月份"""
+
+    @abstractmethod
+    def reindex(self) -> int:
+        """整理索引/日志，返回有记录的天数"""
+
+    def bulk_import(self, days: Iterable[TimeTrackerData], rows: Iterable[Dict]) -> int:
+        """批量写入多天数据和时间块行，返回天数；后端可以覆盖为更快的实现"""
+        count = 0
+        for data in days:
+            self.save_day(data)
+            count += 1
+        return count
+
+    # 通用逻辑
+
+    def iter_time_blocks(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Dict]:
+        """按月逐段读取时间块行（按日期排序），同一时刻只有一个月的行在内存里"""
+        for month in sorted(self.time_block_months()):
+            first, last = f"{month}-01", f"{month}-31"
+            if (start and last < start) or (end and first > end):
+                continue
+            yield from self.load_time_blocks(max(first, start or first), min(last, end or last))
+
+    @property
+    def writer(self) -> 'BackgroundWriter':
+        if self._writer is None:
+            self._writer = BackgroundWriter(name=f'{self.name}-writer')
+        return self._writer
+
+    def save_day_later(self, data: TimeTrackerData,
+                       on_done: Optional[Callable[[Optional[Exception]], None]] = None) -> None:
+        """交给写后队列保存，data 应是调用方之后不会再修改的副本"""
+        self.writer.submit(lambda: self.save_day(data), on_done, key=data.date)
+
+    def record_task_toggle(self, date: str, index: int, task: TaskItem, tasks: Optional[List[TaskItem]] = None,
+                           on_done: Optional[Callable[[Optional[Exception]], None]] = None) -> None:
+        """记录一次任务勾选，后台批量提交；tasks 为当前完整列表时顺带更新任务计数"""
+        with self._ops_lock:
+            pending = self._pending_ops.setdefault(date, {'ops': [], 'tasks': None})
+            pending['ops'].append(TaskOpsLog.op(index, task))
+            if tasks is not None:
+                pending['tasks'] = [TaskItem(t.text, t.done) for t in tasks]
+        self.writer.submit(lambda: self._write_task_ops(date), on_done, key=('ops', date))
+
+    def _write_task_ops(self, date: str) -> None:
+        with self._ops_lock:
+            pending = self._pending_ops.pop(date, None)
+        # 这一天还没保存过时，这些任务会随之后的完整保存一起写入
+        if not pending or not self.exists(date):
+            return
+        self.apply_task_ops(date, pending['ops'], pending['tasks'])
+
+    def flush(self) -> None:
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self) -> None:
+        """写完排队中的保存并停止写线程"""
+        if self._writer is not None:
+            self._writer.stop()
+            self._writer = None
+        with self._search_lock:
+            if self._search is not None:
+                self._search.close()
+                self._search = None
+
+    @property
+    def search_index(self) -> 'SearchIndex':
+        """日记全文索引（见 core.search），首次使用时才打开"""
+        with self._search_lock:
+            if self._search is None:
+                from .search import SearchIndex
+                self._search = SearchIndex(self.data_dir)
+            return self._search
+
+    def index_days(self, days: Iterable[TimeTrackerData]) -> None:
+        """保存后增量更新搜索索引；索引出错不影响保存，之后可用 reindex 重建"""
+        try:
+            self.search_index.update_many(days)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"更新搜索索引失败: {e}")
+
+    def search(self, query: str, limit: int = 20, start: Optional[str] = None,
+               end: Optional[str] = None) -> List[Dict]:
+        """全文搜索日记和活动名，返回 [{'date', 'score', 'snippet'}]"""
+        return self.search_index.search(query, limit, start, end)
+
+    def rebuild_search_index(self) -> int:
+        """从全部日数据重建搜索索引，返回收录的天数"""
+        self.flush()
+        days = (day for day in (self.load_day(date) for date in self.dates()) if day is not None)
+        return self.search_index.rebuild(days)
+
+    def add_time_blocks(self, date: str, lines: List[str]) -> int:
+        """把标准格式的时间块行追加到某一天（已存在的行跳过），返回新增行数"""
+        data = self.load_day(date) or TimeTrackerData(date=date)
+        existing = set(line.strip() for line in data.time_blocks.splitlines())
+        new_lines = []
+        for line in lines:
+            if line not in existing:
+                existing.add(line)
+                new_lines.append(line)
+        if new_lines:
+            data.time_blocks = '\n'.join([data.time_blocks.rstrip()] + new_lines if data.time_blocks.strip() else new_lines)
+            self.save_day(data)
+        return len(new_lines)
+
+
+class DayFileStore(StorageBackend):
+    """data/<date>.json 日文件 + 时间块 CSV 日志的存储后端
+
+    保存时同时追加派生的时间块行并更新日期清单。
+    日文件用临时文件加重命名的方式原子写入，fsync 策略见 core.fileio。
+    save_day_later 交给后台的写后队列，同一天排队中的多次保存只写一次。
+    勾选任务用 record_task_toggle 追加到增量日志（见 core.taskops），不重写日文件。
+    """
+
+    name = 'json'
+
+    def __init__(self, data_dir: Path, fsync: Optional[str] = None):
+        super().__init__(data_dir, fsync)
+        TimeBlockJournal.for_dir(self.data_dir).fsync = self.fsync
+        self._manifest = None
+
+    @property
+    def manifest(self) -> DateManifest:
+        if self._manifest is None:
+            self._manifest = DateManifest(self.data_dir)
+        return self._manifest
+
+    def day_path(self, date: str) -> Path:
+        return self.data_dir / f"{date}.json"
+
+    def exists(self, date: str) -> bool:
+        return self.day_path(date).exists()
+
+    def load_day(self, date: str) -> Optional[TimeTrackerData]:
+        self.flush()
+        filename = self.day_path(date)
+        if not filename.exists():
+            return None
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = self.from_dict(json.load(f))
+        TaskOpsLog.apply(data.tasks, TaskOpsLog.read(TaskOpsLog.path(self.data_dir, date)))
+        return data
+
+    def save_day(self, data: TimeTrackerData) -> Path:
+        filename = self.day_path(data.date)
+        with atomic_open(filename, fsync=self.fsync) as f:
+            json.dump(self.to_dict(data), f, ensure_ascii=False, indent=4)
+        # 日文件已包含最新的任务状态，增量日志作废
+        TaskOpsLog.path(self.data_dir, data.date).unlink(missing_ok=True)
+        self.manifest.update(data, filename)
+        # 当天的时间块整体替换，删掉或改名的行不会留在日志里
+        rows = TimeBlockUtils.parse_time_blocks(data.time_blocks, data.date)
+        TimeBlockUtils.save_timeblock_df(self.data_dir, rows, replace_dates=[data.date])
+        self.index_days([data])
+        return filename
+
+    def close(self) -> None:
+        super().close()
+        if self._manifest is not None:
+            self._manifest.flush()
+
+    def dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        return self.manifest.dates(start, end)
+
+    def summary(self, date: str) -> Optional[Dict]:
+        return self.manifest.get(date)
+
+    def apply_task_ops(self, date: str, ops: List[Dict], tasks: Optional[List[TaskItem]]) -> None:
+        TaskOpsLog.append(TaskOpsLog.path(self.data_dir, date), ops, fsync=self.fsync)
+        if tasks is not None:
+            self.manifest.update_tasks(date, tasks)
+
+    def load_time_blocks(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        return TimeBlockUtils.load_timeblock_df(self.data_dir, start, end)
+
+    def time_block_months(self) -> Dict[str, List]:
+        return TimeBlockJournal.for_dir(self.data_dir).month_signatures()
+
+    def reindex(self) -> int:
+        TimeBlockUtils.compact_timeblock_df(self.data_dir)
+        return self.manifest.rebuild()
+
+    def bulk_import(self, days: Iterable[TimeTrackerData], rows: Iterable[Dict]) -> int:
+        """逐天写日文件，清单、时间块日志和搜索索引各只更新一次"""
+        saved = []
+        # 时间块行原样导入（可能包含没有日文件的旧数据），按 (日期, 时间, 活动) 去重
+        block_rows = list(rows)
+        for data in days:
+            filename = self.day_path(data.date)
+            with atomic_open(filename, fsync=self.fsync) as f:
+                json.dump(self.to_dict(data), f, ensure_ascii=False, indent=4)
+            TaskOpsLog.path(self.data_dir, data.date).unlink(missing_ok=True)
+            saved.append((data, filename))
+        self.manifest.update_many(saved)
+        # 有日文件的日期以日文本为准，传入的行只补充没有日文件的日期
+        saved_dates = {data.date for data, _ in saved}
+        block_rows = [row for row in block_rows if TimeBlockUtils.row_date(row) not in saved_dates]
+        for data, _ in saved:
+            block_rows.extend(TimeBlockUtils.parse_time_blocks(data.time_blocks, data.date))
+        journal = TimeBlockJournal.for_dir(self.data_dir)
+        journal.append(block_rows, replace_dates=saved_dates)
+        journal.forget({TimeBlockUtils.row_date(row) for row in block_rows})
+        self.index_days(data for data, _ in saved)
+        return len(saved)
+
+
+STORAGE_BACKENDS = ('json', 'sqlite')
+
+
+def read_backend_choice(data_dir: Path) -> Optional[str]:
+    """数据目录里记录的后端名，没有记录时返回 None"""
+    try:
+        return (Path(data_dir) / BACKEND_FILE).read_text(encoding='utf-8').strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_backend_choice(data_dir: Path, name: str) -> None:
+    with atomic_open(Path(data_dir) / BACKEND_FILE) as f:
+        f.write(name + '\n')
+
+
+def get_storage_backend(data_dir: Path, name: Optional[str] = None, fsync: Optional[str] = None) -> StorageBackend:
+    """按名称打开存储后端
+
+    未指定时依次看环境变量 TIME_TRACKER_STORAGE、数据目录里的 storage_backend 记录（迁移时写入）；
+    都没有时，数据目录里已有 SQLite 数据库就用 sqlite，否则用 json。SQLite 后端按需导入。
+    """
+    name = name or os.environ.get(STORAGE_ENV) or read_backend_choice(data_dir)
+    if not name:
+        name = 'sqlite' if (Path(data_dir) / SQLITE_DB_FILE).exists() else DayFileStore.name
+    if name == DayFileStore.name:
+        return DayFileStore(data_dir, fsync=fsync)
+    if name == 'sqlite':
+        from .sqlite_store import SQLiteStore
+        return SQLiteStore(data_dir, fsync=fsync)
+    raise ValueError(f"未知的存储后端: {name}（可选: {', '.join(STORAGE_BACKENDS)}）")
+
+
+def migrate_storage(source: StorageBackend, target: StorageBackend,
+                    start: Optional[str] = None, end: Optional[str] = None) -> int:
+    """把 source 中的日数据和时间块行批量导入 target，返回天数
+
+    同一数据目录内迁移时，完成后记下 target 为该目录的后端，之后不指定后端时打开的就是它。
+    """
+    dates = source.dates(start, end)
+    count = 0
+    # 按块读取和写入，内存占用与历史长度无关；时间块由目标后端从日文本重新解析
+    for i in range(0, len(dates), MIGRATE_CHUNK):
+        days = [day for day in (source.load_day(date) for date in dates[i:i + MIGRATE_CHUNK]) if day is not None]
+        count += target.bulk_import(days, [])
+    # 只有时间块、没有日数据的日期（旧版数据）原样带过去
+    known = set(dates)
+    orphans = [row for row in source.load_time_blocks(start, end) if row['date'] not in known]
+    if orphans:
+        target.bulk_import([], orphans)
+    target.flush()
+    if target.data_dir.resolve() == source.data_dir.resolve():
+        write_backend_choice(target.data_dir, target.name)
+    return count
+
+
+class BackgroundWriter:
+    """单线程的写后（write-behind）队列，界面线程只负责提交
+
+    同一个 key（通常是日期）还在排队时再次提交，只保留最后一次的任务，回调合并执行；
+    不带 key 的任务各自独立。任务按首次入队的顺序执行，on_done(error) 在写线程中回调，
+    error 为 None 表示成功。进程退出时（atexit）会先把队列写完。
+    """
+
+    def __init__(self, name: str = 'background-writer'):
+        self._pending: 'OrderedDict[object, Tuple[Callable, List[Callable]]]' = OrderedDict()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stopped = False
+        self.coalesced = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def submit(self, job: Callable[[], object], on_done: Optional[Callable[[Optional[Exception]], None]] = None,
+               key: Optional[object] = None) -> None:
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("写入队列已关闭")
+            if key is None:
+                key = object()
+            callbacks = [on_done] if on_done else []
+            entry = self._pending.get(key)
+            if entry is not None:
+                self.coalesced += 1
+                callbacks = entry[1] + callbacks
+            self._pending[key] = (job, callbacks)
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending) + (1 if self._busy else 0)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """阻塞到已提交的任务全部写完，超时返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while (self._pending or self._busy) and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self) -> None:
+        """写完剩余任务后结束线程，之后不再接受提交"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+        atexit.unregister(self.stop)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                _, (job, callbacks) = self._pending.popitem(last=False)
+                self._busy = True
+            error = None
+            try:
+                job()
+            except Exception as e:
+                logger.error(f"后台写入失败: {e}", exc_info=True)
+                error = e
+            for on_done in callbacks:
+                try:
+                    on_done(error)
+                except Exception as e:
+                    logger.error(f"写入回调失败: {e}", exc_info=True)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
@@ -0,0 +1,77 @@
+"""
+任务勾选的增量日志
+
+勾选/取消任务时不重写整个日文件，只往 data/<date>.ops.jsonl 追加一行
+{"index": 序号, "text": 任务内容, "done": 是否完成}。记录的是勾选后的状态而不是“翻转”，
+重复应用结果不变。读取日文件时按顺序叠加到任务列表上，下一次完整保存后日志删除。
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from .fileio import sync_file, DEFAULT_FSYNC
+from .models import TaskItem
+
+logger = logging.getLogger(__name__)
+
+
+class TaskOpsLog:
+    SUFFIX = '.ops.jsonl'
+
+    @classmethod
+    def path(cls, data_dir: Path, date: str) -> Path:
+        return Path(data_dir) / f"{date}{cls.SUFFIX}"
+
+    @staticmethod
+    def op(index: int, task: TaskItem) -> Dict:
+        return {'index': index, 'text': task.text, 'done': bool(task.done)}
+
+    @staticmethod
+    def read(path: Path) -> List[Dict]:
+        """读取日志，写到一半的最后一行会被忽略"""
+        ops = []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        ops.append(json.loads(line))
+                    except ValueError:
+                        logger.warning(f"忽略损坏的任务日志行: {path}")
+        except FileNotFoundError:
+            pass
+        return ops
+
+    @staticmethod
+    def append(path: Path, ops: Iterable[Dict], fsync: str = DEFAULT_FSYNC) -> None:
+        lines = ''.join(json.dumps(op, ensure_ascii=False) + '\n' for op in ops)
+        # 上次写到一半中断时先补上换行，免得新记录粘在残行后面
+        try:
+            with open(path, 'rb') as f:
+                f.seek(-1, 2)
+                if f.read(1) != b'\n':
+                    lines = '\n' + lines
+        except OSError:  # 文件不存在或为空
+            pass
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            sync_file(f, fsync)
+
+    @staticmethod
+    def apply(tasks: List[TaskItem], ops: Iterable[Dict]) -> int:
+        """把日志叠加到任务列表上，返回生效的条数
+
+        按序号定位并核对内容，对不上时退而按内容查找，都找不到的记录跳过。
+        """
+        applied = 0
+        for op in ops:
+            index, text = op.get('index'), op.get('text')
+            if isinstance(index, int) and 0 <= index < len(tasks) and tasks[index].text == text:
+                task = tasks[index]
+            else:
+                task = next((t for t in tasks if t.text == text), None)
+                if task is None:
+                    continue
+            task.done = bool(op.get('done'))
+            applied += 1
+        return applied
@@ -1,6 +1,7 @@
 import tkinter as tk
 import logging
 import sys
+import time
 from pathlib import Path
 from time_tracker.ui.main_window import TimeTracker
 
@@ -23,6 +24,7 @@ def main():
         logger.info(f"数据目录: {data_dir}")
 
         # 创建主窗口
+        started = time.perf_counter()
         root = tk.Tk()
         app = TimeTracker(root)
         
@@ -35,6 +37,9 @@ def main():
         y = (screen_height - window_height) // 2
         root.geometry(f"{window_width}x{window_height}+{x}+{y}")
         
+        # 首屏绘制完成后记录启动耗时
+        root.after_idle(lambda: logger.info(f"首屏耗时: {(time.perf_counter() - started) * 1000:.0f}ms"))
+
         # 启动主循环
         logger.info("启动主程序")
         root.mainloop()
@@ -2,7 +2,10 @@ import unittest
 from pathlib import Path
 import tempfile
 import os
-from ..core.analyzer import TimeBlockUtils, NaturalLanguageParser
+from unittest.mock import patch
+from ..core.analyzer import TimeBlockUtils, TimeBlockJournal, NaturalLanguageParser, TimeBlockLineChecker
+from ..core.models import TimeBlock
+from ..core.stats import IncrementalTimeStats
 
 class TestTimeBlockUtils(unittest.TestCase):
     def setUp(self):
@@ -23,6 +26,18 @@ class TestTimeBlockUtils(unittest.TestCase):
         self.assertEqual(blocks[1].time, "09:30")
         self.assertEqual(blocks[1].activity, "阅读")
         self.assertEqual(blocks[1].duration, "40min")
+        self.assertEqual(blocks[0].start_minute, 8 * 60)
+        self.assertEqual(blocks[0].duration_minutes, 8 * 60)
+        self.assertEqual(blocks[1].start_minute, 9 * 60 + 30)
+        self.assertEqual(blocks[1].duration_minutes, 40)
+
+    def test_space_after_colon_still_counts(self):
+        block = TimeBlockUtils.parse_time_block_line("08: 00 睡觉 1小时", "2024-03-18")
+        self.assertEqual((block.time, block.activity, block.start_minute, block.duration_minutes),
+                         ("08:00", "睡觉", 480, 60))
+        stats = IncrementalTimeStats("2024-03-18")
+        stats.update("08: 00 睡觉 1小时\n09:00 阅读 30min")
+        self.assertEqual(stats.total_minutes, 90)
 
     def test_save_and_load_timeblock_df(self):
         rows = [
@@ -36,6 +51,68 @@ class TestTimeBlockUtils(unittest.TestCase):
         self.assertEqual(loaded_rows[0]["time"], "08:00")
         self.assertEqual(loaded_rows[0]["activity"], "睡觉")
         self.assertEqual(loaded_rows[0]["duration"], "8小时")
+        self.assertEqual(loaded_rows[0]["start_minute"], 8 * 60)
+        self.assertEqual(loaded_rows[1]["duration_minutes"], 40)
+
+    def test_journal_appends_only_changed_rows(self):
+        rows = [
+            {"date": "2024-03-20", "time": "08:00", "activity": "睡觉", "duration": "8小时"},
+            {"date": "2024-03-20", "time": "09:30", "activity": "阅读", "duration": "40min"}
+        ]
+        journal = TimeBlockJournal.for_dir(self.data_dir)
+        self.assertEqual(journal.append(rows), 2)
+        self.assertEqual(journal.append(rows), 0)
+        rows[1] = dict(rows[1], duration="1小时")
+        self.assertEqual(journal.append(rows), 1)
+        loaded_rows = TimeBlockUtils.load_timeblock_df(self.data_dir)
+        self.assertEqual(len(loaded_rows), 2)
+        self.assertEqual(loaded_rows[1]["duration"], "1小时")
+
+    def test_caches_are_bounded(self):
+        journal = TimeBlockJournal.for_dir(self.data_dir)
+        with patch.object(TimeBlockJournal, 'MAX_WRITTEN_DATES', 3):
+            for day in range(1, 8):
+                date = f"2024-03-{day:02d}"
+                journal.append([{"date": date, "time": "08:00", "activity": "睡觉", "duration": "8小时"}],
+                               replace_dates=[date])
+            self.assertEqual(list(journal._written), ["2024-03-05", "2024-03-06", "2024-03-07"])
+            # 已被淘汰的日期再整天保存，删掉的行照样作废
+            journal.append([], replace_dates=["2024-03-01"])
+        self.assertNotIn("2024-03-01", [r["date"] for r in TimeBlockUtils.load_timeblock_df(self.data_dir)])
+        with patch.object(TimeBlockJournal, 'MAX_INSTANCES', 2), tempfile.TemporaryDirectory() as a, \
+                tempfile.TemporaryDirectory() as b:
+            TimeBlockJournal.for_dir(a)
+            TimeBlockJournal.for_dir(b)
+            self.assertLessEqual(len(TimeBlockJournal._instances), 2)
+            self.assertIs(TimeBlockJournal.for_dir(b), TimeBlockJournal.for_dir(b))
+
+    def test_compact_folds_journal_into_partitions(self):
+        legacy = self.data_dir / 'timeblocks.csv'
+        legacy.write_text("date,time,activity,duration\n2024-03-19,08:00,睡觉,7小时\n", encoding='utf-8')
+        TimeBlockUtils.save_timeblock_df(self.data_dir, [
+            TimeBlock("08:00", "睡觉", "8小时", "2024-03-20"),
+            TimeBlock("08:00", "睡觉", "8小时", "2024-03-20"),
+        ])
+        TimeBlockUtils.compact_timeblock_df(self.data_dir)
+        self.assertFalse(legacy.exists())
+        header = (self.data_dir / "timeblocks" / "2024-03.csv").read_text(encoding='utf-8').splitlines()[0]
+        self.assertEqual(header.split(','), TimeBlockJournal.FIELDNAMES)
+        self.assertFalse((self.data_dir / TimeBlockJournal.JOURNAL_FILE).exists())
+        self.assertTrue((self.data_dir / "timeblocks" / "2024-03.csv").exists())
+        loaded_rows = TimeBlockUtils.load_timeblock_df(self.data_dir)
+        self.assertEqual([r["date"] for r in loaded_rows], ["2024-03-19", "2024-03-20"])
+
+    def test_load_prunes_partitions_by_date_range(self):
+        TimeBlockUtils.save_timeblock_df(self.data_dir, [
+            {"date": "2024-02-28", "time": "08:00", "activity": "睡觉", "duration": "8小时"},
+            {"date": "2024-03-20", "time": "08:00", "activity": "睡觉", "duration": "8小时"},
+            {"date": "2024-03-21", "time": "08:00", "activity": "睡觉", "duration": "8小时"},
+        ])
+        TimeBlockUtils.compact_timeblock_df(self.data_dir)
+        journal = TimeBlockJournal.for_dir(self.data_dir)
+        self.assertEqual([p.stem for p in journal.partitions("2024-03-01", "2024-03-31")], ["2024-03"])
+        loaded_rows = TimeBlockUtils.load_timeblock_df(self.data_dir, "2024-03-21", "2024-03-31")
+        self.assertEqual([r["date"] for r in loaded_rows], ["2024-03-21"])
 
 class TestNaturalLanguageParser(unittest.TestCase):
     def test_parse_natural_timeblock(self):
@@ -48,5 +125,48 @@ class TestNaturalLanguageParser(unittest.TestCase):
             result = NaturalLanguageParser.parse_natural_timeblock(input_text)
             self.assertEqual(result, expected)
 
+    def test_parse_clock_range_and_compound_duration(self):
+        test_cases = [
+            ("9点半读书", "09:30 读书 30min"),
+            ("14:30 写代码", "14:30 写代码 30min"),
+            ("9点到11点写代码", "09:00 写代码 2小时"),
+            ("晚上11点到早上7点睡觉", "23:00 睡觉 8小时"),
+            ("下午3点开会1小时20分钟", "15:00 开会1小时20分钟 80min"),
+        ]
+        for input_text, expected in test_cases:
+            self.assertEqual(NaturalLanguageParser.parse_natural_timeblock(input_text), expected)
+
+    def test_standard_durations_are_not_reparsed(self):
+        for line in ["08:00 睡觉 30分钟", "09:30 阅读 1.5小时", "08:00 睡觉 8个小时", "15:00 开会 1小时20分钟"]:
+            self.assertIsNone(NaturalLanguageParser.parse_natural_timeblock(line))
+            self.assertEqual(NaturalLanguageParser.normalize_line(line), line)
+
+    def test_parse_many_skips_standard_lines(self):
+        lines = ["08:00 睡觉 8小时", "下午读了2小时书", "随便写写", ""]
+        self.assertEqual(
+            NaturalLanguageParser.parse_many(lines),
+            [None, "14:00 读了2小时书 2小时", None, None]
+        )
+
+class TestTimeBlockLineChecker(unittest.TestCase):
+    def test_check_and_cache(self):
+        checker = TimeBlockLineChecker()
+        self.assertEqual(checker.check("08:00 睡觉 8小时"), (True, None))
+        self.assertEqual(checker.check("下午读了2小时书"), (True, "14:00 读了2小时书 2小时"))
+        self.assertEqual(checker.check("随便写写"), (False, None))
+        self.assertEqual(checker.check("  "), (True, None))
+        lines = ["08:00 睡觉 8小时"] * 300
+        lines[150] = "09:30 阅读 40min"
+        parsed = checker.parsed
+        for line in lines:
+            checker.check(line)
+        # 300 行里只有一行是新内容
+        self.assertEqual(checker.parsed - parsed, 1)
+
+    def test_standard_lines_are_kept(self):
+        checker = TimeBlockLineChecker()
+        for line in ("08:00 睡觉 30分钟", "09:30 阅读 1.5小时", "08:00 睡觉 8个小时", "15:00 开会 1小时20分钟"):
+            self.assertEqual(checker.check(line), (True, None))
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
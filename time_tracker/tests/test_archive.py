@@ -0,0 +1,68 @@
+import unittest
+from pathlib import Path
+import tempfile
+from unittest.mock import patch
+from ..core.analyzer import TimeBlockUtils
+from ..core.archive import TimeBlockArchive
+
+class TestTimeBlockArchive(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+        TimeBlockUtils.save_timeblock_df(self.data_dir, [
+            {"date": "2024-03-18", "time": "08:00", "activity": "睡觉", "duration": "8小时"},
+            {"date": "2024-03-18", "time": "09:30", "activity": "阅读", "duration": "40min"},
+            {"date": "2024-03-19", "time": "09:30", "activity": "阅读", "duration": "1小时20分钟"},
+            {"date": "2024-03-19", "time": "10:00", "activity": "发呆", "duration": "很久"},
+        ])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_build_and_aggregate(self):
+        with TimeBlockArchive.open(self.data_dir) as archive:
+            self.assertEqual(len(archive), 3)
+            self.assertEqual(archive.activities, ["睡觉", "阅读"])
+            self.assertEqual(archive.total_minutes(), 480 + 40 + 80)
+            self.assertEqual(archive.total_minutes("2024-03-19"), 80)
+            self.assertEqual(archive.minutes_by_activity(), {"睡觉": 480, "阅读": 120})
+            # 2024-03-18 是周一
+            self.assertEqual(archive.minutes_by_weekday(), [520, 80, 0, 0, 0, 0, 0])
+
+    def test_open_rebuilds_when_source_changes(self):
+        TimeBlockArchive.open(self.data_dir).close()
+        TimeBlockUtils.save_timeblock_df(self.data_dir, [
+            {"date": "2024-03-20", "time": "07:00", "activity": "跑步", "duration": "30min"},
+        ])
+        with TimeBlockArchive.open(self.data_dir) as archive:
+            self.assertEqual(len(archive), 4)
+            self.assertEqual(archive.minutes_by_activity()["跑步"], 30)
+
+    def test_open_reloads_only_changed_months(self):
+        TimeBlockUtils.save_timeblock_df(self.data_dir, [
+            {"date": "2024-02-01", "time": "07:00", "activity": "跑步", "duration": "30min"},
+        ])
+        TimeBlockUtils.compact_timeblock_df(self.data_dir)
+        TimeBlockArchive.open(self.data_dir).close()
+        TimeBlockUtils.save_timeblock_df(self.data_dir, [
+            {"date": "2024-03-20", "time": "07:00", "activity": "跑步", "duration": "45min"},
+        ])
+        loaded = []
+        original = TimeBlockUtils.load_timeblock_df
+
+        def load(data_dir, start=None, end=None):
+            loaded.append((start, end))
+            return original(data_dir, start, end)
+
+        with patch.object(TimeBlockUtils, 'load_timeblock_df', load):
+            with TimeBlockArchive.open(self.data_dir) as archive:
+                self.assertEqual(loaded, [("2024-03-01", "2024-03-31")])
+                self.assertEqual(len(archive), 5)
+                self.assertEqual(archive.minutes_by_activity(), {"睡觉": 480, "阅读": 120, "跑步": 75})
+                self.assertEqual(archive.total_minutes("2024-02-01", "2024-02-29"), 30)
+            loaded.clear()
+            TimeBlockArchive.open(self.data_dir).close()
+            self.assertEqual(loaded, [])
+
+if __name__ == '__main__':
+    unittest.main()
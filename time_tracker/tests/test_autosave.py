@@ -0,0 +1,53 @@
+import unittest
+from ..ui.autosave import AutoSaver
+
+class FakeScheduler:
+    """模拟 Tk 的 after / after_cancel"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+
+    def after(self, ms, func):
+        self.next_id += 1
+        self.jobs[self.next_id] = (ms, func)
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        del self.jobs[after_id]
+
+    def run_all(self):
+        jobs, self.jobs = self.jobs, {}
+        for _, func in jobs.values():
+            func()
+
+class TestAutoSaver(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = FakeScheduler()
+        self.saves = []
+        self.dirty_events = []
+        self.saver = AutoSaver(self.scheduler, lambda: self.saves.append(1), delay_ms=2000,
+                               on_dirty=lambda: self.dirty_events.append(1))
+
+    def test_debounces_edits(self):
+        for _ in range(5):
+            self.saver.mark_dirty()
+        self.assertEqual(len(self.scheduler.jobs), 1)
+        self.assertEqual(self.dirty_events, [1])
+        self.scheduler.run_all()
+        self.assertEqual(self.saves, [1])
+        self.assertFalse(self.saver.dirty)
+
+    def test_skips_when_clean(self):
+        self.saver.mark_dirty()
+        self.saver.mark_clean()
+        self.assertEqual(self.scheduler.jobs, {})
+        self.scheduler.run_all()
+        self.assertEqual(self.saves, [])
+
+    def test_max_delay(self):
+        self.saver.max_delay_ms = 0
+        self.saver.mark_dirty()
+        self.saver.mark_dirty()
+        delays = [ms for ms, _ in self.scheduler.jobs.values()]
+        self.assertEqual(delays, [0])
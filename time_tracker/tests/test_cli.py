@@ -0,0 +1,85 @@
+import io
+import sys
+import unittest
+import subprocess
+import tempfile
+from pathlib import Path
+from contextlib import redirect_stdout, redirect_stderr
+from unittest.mock import patch
+from ..cli import main
+from ..core.models import TimeTrackerData
+from ..core.sentiment import LexiconSentimentBackend
+from ..core.storage import DayFileStore
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_cli(self, *argv):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = main(['--data-dir', str(self.data_dir)] + list(argv))
+        return code, out.getvalue()
+
+    def test_cli_does_not_import_gui_modules(self):
+        code = ("import sys, time_tracker.cli; "
+                "print([m for m in ('tkinter', 'PIL', 'transformers') if m in sys.modules])")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parents[2])
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_add_block_and_stats(self):
+        code, out = self.run_cli('add-block', '--date', '2024-03-20', '08:00 睡觉 8小时', '下午读了2小时书')
+        self.assertEqual(code, 0)
+        data = DayFileStore(self.data_dir).load_day('2024-03-20')
+        self.assertEqual(data.time_blocks, "08:00 睡觉 8小时\n14:00 读了2小时书 2小时")
+        self.run_cli('add-block', '--date', '2024-03-20', '08:00 睡觉 8小时')
+        code, out = self.run_cli('stats', '--by', 'activity')
+        self.assertIn("睡觉\t480", out)
+        self.assertIn("合计\t600", out)
+
+    def test_sentiment_reports_only_produced_results(self):
+        store = DayFileStore(self.data_dir)
+        store.save_day(TimeTrackerData(date="2024-03-20", diary="今天很开心"))
+        store.close()
+        with patch.object(LexiconSentimentBackend, 'analyze', side_effect=RuntimeError("boom")), \
+                redirect_stderr(io.StringIO()):
+            code, out = self.run_cli('sentiment', '--backend', 'lexicon')
+        self.assertEqual(code, 1)
+        self.assertIn("新分析 0 篇", out)
+        code, out = self.run_cli('sentiment', '--backend', 'lexicon')
+        self.assertEqual(code, 0)
+        self.assertIn("新分析 1 篇", out)
+
+    def test_search(self):
+        self.run_cli('add-block', '--date', '2024-03-20', '09:30 阅读 40min')
+        code, out = self.run_cli('search', '阅读')
+        self.assertEqual(code, 0)
+        self.assertEqual(out, "2024-03-20\t【阅读】\n")
+        code, out = self.run_cli('search', '游泳')
+        self.assertEqual(code, 1)
+
+    def test_add_block_rejects_unknown_text(self):
+        code, out = self.run_cli('add-block', '--date', '2024-03-20', '随便写写')
+        self.assertEqual(code, 1)
+
+    def test_import_export_and_reindex(self):
+        src = self.data_dir / 'in.csv'
+        src.write_text("date,time,activity,duration\n2024-03-19,09:30,阅读,40min\n", encoding='utf-8')
+        self.run_cli('import', str(src))
+        code, out = self.run_cli('export', '--format', 'md')
+        self.assertIn("# 2024-03-19 时间记录", out)
+        self.assertIn("09:30 阅读 40min", out)
+        code, out = self.run_cli('export', '-o', str(self.data_dir / 'out.zip'))
+        self.assertEqual(code, 0)
+        self.assertTrue((self.data_dir / 'out.zip').exists())
+        code, out = self.run_cli('reindex')
+        self.assertEqual(code, 0)
+        self.assertIn("1 天", out)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,20 @@
+import unittest
+from ..ui.emoji import MOODS, render_atlas, render_sprite
+
+try:
+    import PIL
+except ImportError:
+    PIL = None
+
+@unittest.skipIf(PIL is None, "未安装 Pillow")
+class TestEmojiAtlas(unittest.TestCase):
+    def test_atlas_layout(self):
+        atlas = render_atlas(32)
+        self.assertEqual(atlas.size, (32 * len(MOODS), 32))
+        for i, mood in enumerate(MOODS):
+            sprite = atlas.crop((i * 32, 0, (i + 1) * 32, 32))
+            self.assertEqual(sprite.tobytes(), render_sprite(mood, 32).tobytes())
+
+    def test_sizes_render_separately(self):
+        self.assertEqual(render_sprite('happy', 48).size, (48, 48))
+        self.assertNotEqual(render_sprite('happy', 32).tobytes(), render_sprite('sad', 32).tobytes())
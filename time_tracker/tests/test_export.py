@@ -0,0 +1,116 @@
+import io
+import time
+import zipfile
+import threading
+import unittest
+import tempfile
+from pathlib import Path
+from ..core.models import TimeTrackerData, TaskItem
+from ..core.storage import DayFileStore
+from ..core.export import (
+    export_markdown, iter_rendered_days, parse_date_range, render_day_markdown, write_time_blocks_csv
+)
+
+class CountingStore:
+    """记录已开始的读取数和同时进行的读取数"""
+    def __init__(self, dates):
+        self._dates = dates
+        self.started = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def flush(self):
+        pass
+
+    def dates(self, start=None, end=None):
+        return self._dates
+
+    def load_day(self, date):
+        with self.lock:
+            self.started += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.001)
+        with self.lock:
+            self.active -= 1
+        return None if date.endswith('-13') else TimeTrackerData(date=date, diary=date)
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+        self.store = DayFileStore(self.data_dir, fsync='never')
+        for day in ("2024-03-18", "2024-03-19", "2024-04-01"):
+            self.store.save_day(TimeTrackerData(date=day, time_blocks="08:00 睡觉 8小时",
+                                                diary=f"{day} 的日记", tasks=[TaskItem("跑步", True)]))
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def test_single_file(self):
+        target = self.data_dir / "out" / "march.md"
+        target.parent.mkdir()
+        count = export_markdown(self.store, target, start="2024-03-01", end="2024-03-31")
+        self.assertEqual(count, 2)
+        text = target.read_text(encoding='utf-8')
+        self.assertLess(text.index("# 2024-03-18"), text.index("# 2024-03-19"))
+        self.assertNotIn("2024-04-01", text)
+        self.assertIn("- [x] 跑步", text)
+
+    def test_per_day_and_zip(self):
+        progress = []
+        count = export_markdown(self.store, self.data_dir / "days", on_progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(count, 3)
+        self.assertEqual(progress[-1], (3, 3))
+        self.assertEqual(sorted(p.name for p in (self.data_dir / "days").iterdir()),
+                         ["2024-03-18.md", "2024-03-19.md", "2024-04-01.md"])
+        export_markdown(self.store, self.data_dir / "all.zip")
+        with zipfile.ZipFile(self.data_dir / "all.zip") as zf:
+            self.assertEqual(zf.namelist(), ["2024-03-18.md", "2024-03-19.md", "2024-04-01.md"])
+            self.assertEqual(zf.read("2024-04-01.md").decode('utf-8'),
+                             render_day_markdown(self.store.load_day("2024-04-01")))
+        with self.assertRaises(ValueError):
+            export_markdown(self.store, self.data_dir / "x.md", layout='pdf')
+
+    def test_streaming_keeps_order_and_window(self):
+        dates = [f"2024-01-{d:02d}" for d in range(1, 32)]
+        store = CountingStore(dates)
+        window = 3 * 2
+        out = []
+        for date, _ in iter_rendered_days(store, dates, workers=3):
+            consumed = dates.index(date) + 1
+            # 消费方停在这里时，线程池最多读到已消费之后的 window 天，并且会一直读满
+            expected = min(len(dates), consumed + window)
+            deadline = time.monotonic() + 2
+            while store.started < expected and time.monotonic() < deadline:
+                time.sleep(0.001)
+            time.sleep(0.002)
+            self.assertEqual(store.started, expected)
+            out.append(date)
+        self.assertEqual(out, [d for d in dates if d != "2024-01-13"])
+        self.assertLessEqual(store.peak, 3)
+
+    def test_csv_reads_one_month_at_a_time(self):
+        calls = []
+        load = self.store.load_time_blocks
+        self.store.load_time_blocks = lambda start=None, end=None: calls.append((start, end)) or load(start, end)
+        out = io.StringIO()
+        self.assertEqual(write_time_blocks_csv(self.store, out, start="2024-03-19"), 2)
+        self.assertEqual(calls, [("2024-03-19", "2024-03-31"), ("2024-04-01", "2024-04-31")])
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "date,time,activity,duration,duration_minutes")
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ["2024-03-19", "2024-04-01"])
+
+    def test_parse_date_range(self):
+        self.assertEqual(parse_date_range("all"), (None, None))
+        self.assertEqual(parse_date_range("2024-03-18"), ("2024-03-18", "2024-03-18"))
+        self.assertEqual(parse_date_range("2024-01-01 ~ 2024-12-31"), ("2024-01-01", "2024-12-31"))
+        self.assertEqual(parse_date_range("2024-01-01~"), ("2024-01-01", None))
+        for bad in ("2024-13-01", "2024-12-31~2024-01-01"):
+            with self.assertRaises(ValueError):
+                parse_date_range(bad)
+
+if __name__ == '__main__':
+    unittest.main()
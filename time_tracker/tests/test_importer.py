@@ -0,0 +1,108 @@
+import io
+import json
+import unittest
+import tempfile
+from pathlib import Path
+from ..core.models import TimeTrackerData
+from ..core.storage import DayFileStore
+from ..core.sqlite_store import SQLiteStore
+from ..core.importer import BulkImporter, iter_csv, iter_text, iter_json
+
+class TestImportParsers(unittest.TestCase):
+    def test_csv_aliases(self):
+        f = io.StringIO("Day,Start,Task,Minutes\n2024-03-18,2024-03-18 08:00:00,跑步,30\n")
+        self.assertEqual(list(iter_csv(f)), [("2024-03-18", "08:00 跑步 30min")])
+
+    def test_text_date_lines(self):
+        f = io.StringIO("# 2024-03-18 时间记录\n08:00 睡觉 8小时\n下午读了2小时书\n\n2024-03-19 09:30 阅读 40min\n")
+        self.assertEqual(list(iter_text(f)), [("2024-03-18", "08:00 睡觉 8小时"), ("2024-03-18", "下午读了2小时书"),
+                                              ("2024-03-19", "09:30 阅读 40min")])
+
+    def test_json_lines_and_documents(self):
+        lines = io.StringIO('{"date": "2024-03-18", "time": "08:00", "activity": "睡觉", "duration": "8小时"}\n'
+                            '{"date": "2024-03-19", "time_blocks": "09:30 阅读 40min", "diary": ""}\n')
+        self.assertEqual(list(iter_json(lines)), [("2024-03-18", "08:00 睡觉 8小时"), ("2024-03-19", "09:30 阅读 40min")])
+        doc = io.StringIO(json.dumps({"records": [{"date": "2024-03-18", "start": "08:00", "name": "睡觉", "duration": 480}]}, indent=2))
+        self.assertEqual(list(iter_json(doc)), [("2024-03-18", "08:00 睡觉 480min")])
+
+    def test_structured_durations_are_kept(self):
+        f = io.StringIO("date,time,activity,duration\n2024-03-19,10:00,会议,01:30\n2024-03-19,08:00,阅读,1.5小时\n"
+                        "2024-03-19,09:00,写代码,30分钟\n2024-03-19,11:00,发呆,很久\n2024-03-19,,午饭,30\n")
+        self.assertEqual(list(iter_csv(f)), [("2024-03-19", "10:00 会议 90min"), ("2024-03-19", "08:00 阅读 1.5小时"),
+                                             ("2024-03-19", "09:00 写代码 30分钟"), ("2024-03-19", None),
+                                             ("2024-03-19", None)])
+        records = io.StringIO('{"date": "2024-03-19", "time": "10:00", "activity": "会议", "duration": "1:30"}\n')
+        self.assertEqual(list(iter_json(records)), [("2024-03-19", "10:00 会议 90min")])
+
+class TestBulkImporter(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def check_store(self, store):
+        store.save_day(TimeTrackerData(date="2024-03-18", time_blocks="08:00 睡觉 8小时", diary="已有的日记"))
+        src = self.data_dir / "log.txt"
+        src.write_text("2024-03-18\n08:00 睡觉 8小时\n下午读了2小时书\n随便写写\n"
+                       "2024-03-19\n09:30 阅读 40min\n09:30 阅读 40min\n2024-03-20 10:00 写代码 1小时\n", encoding='utf-8')
+        batches = []
+        importer = BulkImporter(store, batch_rows=2, on_progress=lambda p: batches.append(p.rows))
+        progress = importer.import_file(src)
+        self.assertEqual((progress.rows, progress.imported, progress.duplicates, progress.skipped), (6, 3, 2, 1))
+        self.assertGreater(len(batches), 1)
+        day = store.load_day("2024-03-18")
+        self.assertEqual(day.time_blocks, "08:00 睡觉 8小时\n14:00 读了2小时书 2小时")
+        self.assertEqual(day.diary, "已有的日记")
+        self.assertEqual(store.dates(), ["2024-03-18", "2024-03-19", "2024-03-20"])
+        self.assertEqual(len(store.load_time_blocks()), 4)
+        self.assertEqual(store.search("写代码")[0]['date'], "2024-03-20")
+        # 重新导入同一文件不产生重复
+        progress = BulkImporter(store).import_file(src)
+        self.assertEqual((progress.imported, progress.duplicates), (0, 5))
+        self.assertEqual(store.load_day("2024-03-19").time_blocks, "09:30 阅读 40min")
+
+    def test_structured_rows_and_backend_switch(self):
+        src = self.data_dir / "log.csv"
+        src.write_text("date,time,activity,duration\n2024-03-19,10:00,会议,01:30\n2024-03-19,08:00,阅读,1.5小时\n"
+                       "2024-03-19,09:00,写代码,30分钟\n2024-03-19,11:00,发呆,很久\n", encoding='utf-8')
+        store = DayFileStore(self.data_dir, fsync='never')
+        try:
+            progress = BulkImporter(store).import_file(src)
+            self.assertEqual((progress.imported, progress.skipped), (3, 1))
+            self.assertEqual(store.load_day("2024-03-19").time_blocks,
+                             "10:00 会议 90min\n08:00 阅读 1.5小时\n09:00 写代码 30分钟")
+            # 手动删掉一行后再导入，只补回这一行
+            store.save_day(TimeTrackerData(date="2024-03-19", time_blocks="10:00 会议 90min\n08:00 阅读 1.5小时"))
+            progress = BulkImporter(store).import_file(src)
+            self.assertEqual((progress.imported, progress.duplicates), (1, 2))
+        finally:
+            store.close()
+        # 同一目录换到 SQLite 后端，之前导入到 json 的记录不算重复
+        store = SQLiteStore(self.data_dir, fsync='never')
+        try:
+            progress = BulkImporter(store).import_file(src)
+            self.assertEqual((progress.imported, progress.duplicates), (3, 0))
+            self.assertEqual(store.summary("2024-03-19")['minutes'], 90 + 90 + 30)
+        finally:
+            store.close()
+
+    def test_day_file_store(self):
+        store = DayFileStore(self.data_dir, fsync='never')
+        try:
+            self.check_store(store)
+            self.assertEqual(store.summary("2024-03-18")['minutes'], 600)
+        finally:
+            store.close()
+
+    def test_sqlite_store(self):
+        store = SQLiteStore(self.data_dir, fsync='never')
+        try:
+            self.check_store(store)
+            self.assertEqual(store.summary("2024-03-18")['minutes'], 600)
+        finally:
+            store.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import json
+from pathlib import Path
+import tempfile
+from ..core.manifest import DateManifest
+from ..core.models import TimeTrackerData, TaskItem
+from ..core.stats import IncrementalTimeStats
+
+class TestDateManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_day(self, date, time_blocks="", tasks=(), mood=""):
+        d = {"date": date, "time_blocks": time_blocks, "diary": "", "tasks": list(tasks), "mood": mood}
+        path = self.data_dir / f"{date}.json"
+        path.write_text(json.dumps(d, ensure_ascii=False), encoding='utf-8')
+        return path
+
+    def test_rebuild_and_navigation(self):
+        self.write_day("2024-03-18", "08:00 睡觉 8小时\n09:30 阅读 40min", mood="happy")
+        self.write_day("2024-03-20", tasks=[{"text": "写代码", "done": True}, {"text": "跑步", "done": False}])
+        manifest = DateManifest(self.data_dir)
+        self.assertEqual(manifest.dates(), ["2024-03-18", "2024-03-20"])
+        self.assertEqual(manifest.get("2024-03-18")["minutes"], 520)
+        self.assertEqual(manifest.get("2024-03-18")["mood"], "happy")
+        self.assertEqual(manifest.get("2024-03-20")["tasks"], 2)
+        self.assertEqual(manifest.get("2024-03-20")["tasks_done"], 1)
+        self.assertEqual(manifest.next_date("2024-03-18"), "2024-03-20")
+        self.assertEqual(manifest.prev_date("2024-03-20"), "2024-03-18")
+        self.assertIsNone(manifest.next_date("2024-03-20"))
+
+    def test_minutes_match_incremental_stats(self):
+        text = "08:00 睡觉 8小时\n早上 跑步 30min\n25:00 阅读 40min\n09:00 发呆 很久"
+        stats = IncrementalTimeStats("2024-03-18")
+        stats.update(text)
+        summary = DateManifest.summarize(TimeTrackerData("2024-03-18", time_blocks=text))
+        self.assertEqual(summary["minutes"], stats.total_minutes)
+        self.assertEqual(summary["minutes"], 480)
+
+    def test_unreadable_day_files_are_skipped(self):
+        self.write_day("2024-03-18", "08:00 睡觉 8小时")
+        (self.data_dir / "2024-03-19.json").write_text('{"time_blocks": ""}', encoding='utf-8')
+        (self.data_dir / "2024-03-20.json").write_text('{', encoding='utf-8')
+        self.assertEqual(DateManifest(self.data_dir).dates(), ["2024-03-18"])
+
+    def test_update_is_incremental_and_persisted(self):
+        manifest = DateManifest(self.data_dir)
+        data = TimeTrackerData("2024-03-19", time_blocks="07:00 跑步 30min", tasks=[TaskItem("读书")])
+        path = self.write_day(data.date, data.time_blocks, [{"text": "读书", "done": False}])
+        manifest.update(data, path)
+        reloaded = DateManifest(self.data_dir)
+        self.assertEqual(reloaded.dates(), ["2024-03-19"])
+        self.assertEqual(reloaded.total_minutes(), 30)
+        self.assertEqual(reloaded.sync(), 0)
+
+    def test_updates_are_batched(self):
+        manifest = DateManifest(self.data_dir)
+        manifest.flush()
+        mtime = manifest.path.stat().st_mtime_ns
+        for i, date in enumerate(["2024-03-19", "2024-03-20"]):
+            data = TimeTrackerData(date, time_blocks=f"07:00 跑步 {30 + i}min")
+            manifest.update(data, self.write_day(date, data.time_blocks))
+        # 间隔内的更新不重写清单文件，只留下 dirty 标记
+        self.assertEqual(manifest.path.stat().st_mtime_ns, mtime)
+        self.assertTrue(manifest.dirty_path.exists())
+        # 没有 flush 就退出：下次打开按标记重新同步
+        self.assertEqual(DateManifest(self.data_dir).total_minutes(), 61)
+        self.assertFalse(manifest.dirty_path.exists())
+        manifest.flush()
+        self.assertEqual(DateManifest(self.data_dir).dates(), ["2024-03-19", "2024-03-20"])
+
+if __name__ == '__main__':
+    unittest.main()
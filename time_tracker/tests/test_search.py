@@ -0,0 +1,86 @@
+import unittest
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from ..core.models import TimeTrackerData
+from ..core.search import SearchIndex, tokenize, query_terms, make_snippet
+from ..core.storage import DayFileStore
+from ..core.sqlite_store import SQLiteStore
+
+class TestTokenize(unittest.TestCase):
+    def test_cjk_bigrams_and_words(self):
+        self.assertEqual(tokenize("今天跑步 5km，Python!"), ["今天", "天跑", "跑步", "步", "5km", "python"])
+        self.assertEqual(query_terms("跑步 跑步"), ["跑步"])
+        self.assertEqual(query_terms("累"), ["累"])
+
+    def test_snippet_marks_first_hit(self):
+        self.assertEqual(make_snippet(["早上去跑步了，很累"], "跑步", width=2), "…上去【跑步】了，…")
+        self.assertEqual(make_snippet(["", "阅读 写代码"], "代码"), "阅读 写【代码】")
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def check_store(self, store):
+        store.save_day(TimeTrackerData(date="2024-03-18", diary="早上跑步，跑步真累", time_blocks="07:00 跑步 30min"))
+        store.save_day(TimeTrackerData(date="2024-03-19", diary="读了一本书，晚上跑步"))
+        store.save_day(TimeTrackerData(date="2024-03-20", time_blocks="09:00 写代码 2小时"))
+        store.save_day(TimeTrackerData(date="2024-03-21", mood="happy"))
+        self.assertEqual([r['date'] for r in store.search("跑步")], ["2024-03-18", "2024-03-19"])
+        self.assertEqual([r['date'] for r in store.search("跑步", start="2024-03-19")], ["2024-03-19"])
+        self.assertEqual([r['date'] for r in store.search("书")], ["2024-03-19"])
+        self.assertEqual(store.search("写代码")[0]['snippet'], "【写代码】")
+        self.assertEqual(store.search("跑步 书")[0]['date'], "2024-03-19")
+        self.assertEqual(store.search("游泳"), [])
+        self.assertEqual(len(store.search_index), 3)
+        # 只更新保存的那一天，内容没变时跳过
+        self.assertFalse(store.search_index.update(store.load_day("2024-03-18")))
+        store.save_day(TimeTrackerData(date="2024-03-19", diary="在家休息"))
+        self.assertEqual([r['date'] for r in store.search("跑步")], ["2024-03-18"])
+        self.assertEqual([r['date'] for r in store.search("休息")], ["2024-03-19"])
+        store.search_index.conn.execute("DELETE FROM postings")
+        self.assertEqual(store.rebuild_search_index(), 3)
+        self.assertEqual([r['date'] for r in store.search("休息")], ["2024-03-19"])
+
+    def test_day_file_store(self):
+        store = DayFileStore(self.data_dir, fsync='never')
+        try:
+            self.check_store(store)
+        finally:
+            store.close()
+
+    def test_sqlite_store(self):
+        store = SQLiteStore(self.data_dir, fsync='never')
+        try:
+            self.check_store(store)
+        finally:
+            store.close()
+
+    def test_index_persists(self):
+        index = SearchIndex(self.data_dir)
+        index.update_many([TimeTrackerData(date="2024-03-18", diary="今天很开心")])
+        index.close()
+        index = SearchIndex(self.data_dir)
+        self.assertEqual(index.search("开心")[0]['date'], "2024-03-18")
+        index.close()
+
+    def test_lengths_fetched_in_chunks(self):
+        index = SearchIndex(self.data_dir)
+        try:
+            index.update_many([TimeTrackerData(date=f"2024-03-{day:02d}", diary="跑步" + "很累" * day)
+                               for day in range(1, 8)])
+            index.update_many([TimeTrackerData(date="2024-04-01", diary="读书")])
+            with patch("time_tracker.core.search.LOOKUP_CHUNK", 3):
+                self.assertEqual(index._lengths(["2024-03-01", "2024-03-07"]), {"2024-03-01": 4, "2024-03-07": 16})
+                results = index.search("跑步")
+            # 文档越短得分越高
+            self.assertEqual([r['date'] for r in results], [f"2024-03-{day:02d}" for day in range(1, 8)])
+        finally:
+            index.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import tempfile
+import threading
+import time
+from pathlib import Path
+from ..core.sentiment import (
+    SentimentBackend, SentimentWorker, LexiconSentimentBackend, get_sentiment_backend
+)
+
+class FakeBackend(SentimentBackend):
+    name = 'fake'
+
+    def __init__(self):
+        self.calls = []
+
+    def analyze(self, texts, max_length=512):
+        self.calls.append(list(texts))
+        return [{'label': 'NEGATIVE' if '难过' in t else 'POSITIVE', 'score': 0.9} for t in texts]
+
+class TestLexiconSentimentBackend(unittest.TestCase):
+    def test_labels_chinese_diaries(self):
+        backend = get_sentiment_backend('lexicon')
+        self.assertIsInstance(backend, LexiconSentimentBackend)
+        results = backend.analyze([
+            "今天很开心，完成了很多事",
+            "今天有点难过，一点也不开心",
+            "今天去了超市",
+        ])
+        self.assertEqual([r['label'] for r in results], ['POSITIVE', 'NEGATIVE', 'NEUTRAL'])
+        self.assertGreater(results[1]['score'], 0.7)
+
+    def test_modifiers_stay_in_their_clause(self):
+        backend = LexiconSentimentBackend()
+        results = backend.analyze(["我不累。开心", "不累开心", "今天不太顺利"])
+        self.assertEqual([r['label'] for r in results], ['POSITIVE', 'POSITIVE', 'NEGATIVE'])
+        self.assertEqual(backend.score("我不累。开心"), 2.0)
+
+    def test_negation_must_be_adjacent(self):
+        backend = LexiconSentimentBackend()
+        results = backend.analyze(["未来很美好", "今天无比开心", "别太难过", "很不开心", "无论如何都不开心"])
+        self.assertEqual([r['label'] for r in results], ['POSITIVE', 'POSITIVE', 'NEGATIVE', 'NEGATIVE', 'NEGATIVE'])
+
+    def test_backend_must_implement_analyze(self):
+        with self.assertRaises(TypeError):
+            SentimentBackend()
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_sentiment_backend('nope')
+
+class TestSentimentWorker(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+        self.backend = FakeBackend()
+        self.results = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_worker(self, **kwargs):
+        def on_result(date, result):
+            with self.lock:
+                self.results.append((date, result['label']))
+        return SentimentWorker(self.data_dir, backend=self.backend,
+                               on_result=on_result, coalesce_delay=0.05, **kwargs)
+
+    def test_coalesces_saves_and_batches_days(self):
+        worker = self.make_worker()
+        worker.submit("2024-03-20", "今天有点难过")
+        worker.submit("2024-03-20", "今天很开心")
+        worker.submit("2024-03-21", "还不错")
+        self.assertTrue(worker.wait_idle(5))
+        worker.stop()
+        self.assertEqual(self.backend.calls, [["今天很开心", "还不错"]])
+        self.assertEqual(sorted(self.results), [("2024-03-20", "POSITIVE"), ("2024-03-21", "POSITIVE")])
+
+    def test_cache_is_persisted_and_reused(self):
+        worker = self.make_worker()
+        self.assertEqual(worker.backfill([("2024-03-19", "有点难过"), ("2024-03-20", "")]), 1)
+        self.assertTrue(worker.wait_idle(5))
+        worker.stop()
+        worker = self.make_worker()
+        worker.submit("2024-03-22", "有点难过")
+        worker.stop()
+        self.assertEqual(len(self.backend.calls), 1)
+        self.assertEqual(self.results[-1], ("2024-03-22", "NEGATIVE"))
+
+    def test_cache_writes_are_debounced(self):
+        worker = self.make_worker(save_interval=60)
+        worker.submit("2024-03-20", "今天很开心")
+        self.assertTrue(worker.wait_idle(5))
+        worker.submit("2024-03-21", "有点难过")
+        self.assertTrue(worker.wait_idle(5))
+        self.assertFalse(worker.cache_path.exists())
+        worker.stop()
+        worker = self.make_worker()
+        self.assertEqual(len(worker.cache), 2)
+        worker.stop()
+
+    def test_idle_worker_flushes_cache(self):
+        worker = self.make_worker(save_interval=0.1)
+        worker.submit("2024-03-20", "今天很开心")
+        self.assertTrue(worker.wait_idle(5))
+        deadline = time.monotonic() + 5
+        while not worker.cache_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertTrue(worker.cache_path.exists())
+        worker.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import unittest
+import tempfile
+from pathlib import Path
+from unittest import mock
+from ..core.models import TimeTrackerData, TaskItem
+from ..core.storage import StorageBackend, DayFileStore, get_storage_backend, migrate_storage, STORAGE_ENV
+from ..core.sqlite_store import SQLiteStore
+from ..core.analyzer import TimeBlockUtils
+from ..core.stats import TimeStatsEngine
+
+class TestSQLiteStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+        self.store = SQLiteStore(self.data_dir, fsync='never')
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def test_save_and_load_day(self):
+        data = TimeTrackerData(date="2024-03-18", time_blocks="08:00 睡觉 8小时\n09:30 阅读 40min", diary="今天不错",
+                               tasks=[TaskItem("写代码", True), TaskItem("跑步")], mood="happy")
+        self.store.save_day(data)
+        self.assertEqual(self.store.load_day("2024-03-18"), data)
+        self.assertIsNone(self.store.load_day("2024-03-19"))
+        self.assertEqual(self.store.summary("2024-03-18"),
+                         {'minutes': 520, 'tasks': 2, 'tasks_done': 1, 'mood': 'happy', 'has_diary': True})
+        journal_mode = self.store.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(journal_mode, 'wal')
+
+    def test_time_blocks_replaced_per_day(self):
+        self.store.save_day(TimeTrackerData(date="2024-03-18", time_blocks="08:00 睡觉 8小时\n09:30 阅读 40min"))
+        self.store.save_day(TimeTrackerData(date="2024-04-02", time_blocks="10:00 写代码 2小时"))
+        versions = self.store.time_block_months()
+        self.store.save_day(TimeTrackerData(date="2024-03-18", time_blocks="08:00 睡觉 8小时\n09:30 阅读 40min", diary="改了日记"))
+        self.assertEqual(self.store.time_block_months(), versions)
+        self.store.save_day(TimeTrackerData(date="2024-03-18", time_blocks="08:00 睡觉 7小时"))
+        changed = self.store.time_block_months()
+        self.assertNotEqual(changed["2024-03"], versions["2024-03"])
+        self.assertEqual(changed["2024-04"], versions["2024-04"])
+        rows = self.store.load_time_blocks("2024-03-01", "2024-03-31")
+        self.assertEqual([(r['activity'], r['duration_minutes']) for r in rows], [("睡觉", 420)])
+        self.assertEqual(self.store.dates("2024-04-01"), ["2024-04-02"])
+        with TimeStatsEngine.from_data_dir(self.data_dir, store=self.store) as engine:
+            self.assertEqual(engine.by_activity(), {"睡觉": 420, "写代码": 120})
+
+    def test_task_toggle_updates_one_row(self):
+        tasks = [TaskItem("写代码"), TaskItem("跑步")]
+        self.store.save_day(TimeTrackerData(date="2024-03-18", tasks=tasks))
+        self.store.record_task_toggle("2024-03-18", 1, TaskItem("跑步", True))
+        self.store.flush()
+        self.assertEqual([t.done for t in self.store.load_day("2024-03-18").tasks], [False, True])
+        self.assertEqual(self.store.summary("2024-03-18")['tasks_done'], 1)
+
+class TestStorageSelection(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_migrate_json_to_sqlite(self):
+        source = DayFileStore(self.data_dir, fsync='never')
+        source.save_day(TimeTrackerData(date="2024-03-18", time_blocks="08:00 睡觉 8小时",
+                                        tasks=[TaskItem("写代码")], mood="happy"))
+        source.record_task_toggle("2024-03-18", 0, TaskItem("写代码", True))
+        source.save_day(TimeTrackerData(date="2024-03-19", time_blocks="09:30 阅读 40min"))
+        source.close()
+        with mock.patch.dict(os.environ, {STORAGE_ENV: ''}):
+            self.assertIsInstance(get_storage_backend(self.data_dir), DayFileStore)
+            # 日志里多出的行（日文本里已没有）不迁移；没有日文件的旧数据照样带过去
+            TimeBlockUtils.save_timeblock_df(self.data_dir, [
+                {"date": "2024-03-19", "time": "11:00", "activity": "读书", "duration": "1小时"},
+                {"date": "2024-02-01", "time": "07:00", "activity": "跑步", "duration": "30min"},
+            ])
+            target = get_storage_backend(self.data_dir, 'sqlite')
+            with mock.patch('time_tracker.core.storage.MIGRATE_CHUNK', 1):
+                self.assertEqual(migrate_storage(source, target), 2)
+            self.assertTrue(target.load_day("2024-03-18").tasks[0].done)
+            self.assertEqual([(r['date'], r['activity']) for r in target.load_time_blocks()],
+                             [("2024-02-01", "跑步"), ("2024-03-18", "睡觉"), ("2024-03-19", "阅读")])
+            target.close()
+            # 迁移后默认打开 SQLite
+            store = get_storage_backend(self.data_dir)
+            self.assertIsInstance(store, SQLiteStore)
+            # 迁回 json 后数据库文件还在，但默认打开的应是 json
+            back = get_storage_backend(self.data_dir, 'json')
+            self.assertEqual(migrate_storage(store, back), 2)
+            store.close()
+            back.close()
+            self.assertIsInstance(get_storage_backend(self.data_dir), DayFileStore)
+        with self.assertRaises(ValueError):
+            get_storage_backend(self.data_dir, 'nope')
+        with self.assertRaises(TypeError):
+            StorageBackend(self.data_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import sys
+import json
+import unittest
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+THRESHOLDS = json.loads((ROOT / 'benchmarks' / 'startup_thresholds.json').read_text(encoding='utf-8'))
+
+class TestStartupImports(unittest.TestCase):
+    def loaded_heavy_modules(self, module, forbidden=THRESHOLDS['forbidden_modules']):
+        code = (f"import sys, {module}; "
+                f"print([m for m in {forbidden!r} if m in sys.modules])")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT)
+        if result.returncode != 0:
+            self.skipTest(result.stderr.strip().splitlines()[-1])
+        return result.stdout.strip()
+
+    def test_main_window_import_is_light(self):
+        self.assertEqual(self.loaded_heavy_modules('time_tracker.ui.main_window'), "[]")
+
+    def test_cli_import_is_light(self):
+        # 命令行还不能加载任何界面模块
+        forbidden = THRESHOLDS['forbidden_modules'] + THRESHOLDS['cli_forbidden_modules']
+        self.assertEqual(self.loaded_heavy_modules('time_tracker.cli', forbidden), "[]")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from pathlib import Path
+import tempfile
+from unittest.mock import patch
+from ..core.analyzer import TimeBlockUtils
+from ..core.archive import load_numpy
+from ..core.stats import IncrementalTimeStats, TimeStatsEngine
+
+class TestIncrementalTimeStats(unittest.TestCase):
+    def test_update_parses_only_changed_lines(self):
+        stats = IncrementalTimeStats("2024-03-20")
+        text = "08:00 睡觉 8小时\n09:30 阅读 40min\n随便写写"
+        self.assertTrue(stats.update(text))
+        self.assertEqual(stats.total_minutes, 520)
+        self.assertEqual(stats.parsed_lines, 3)
+        self.assertFalse(stats.update(text))
+        self.assertEqual(stats.parsed_lines, 3)
+
+        self.assertTrue(stats.update(text + "\n10:10 阅读 20min"))
+        self.assertEqual(stats.parsed_lines, 4)
+        self.assertEqual(stats.distribution(), [("睡觉", 480), ("阅读", 60)])
+
+        self.assertTrue(stats.update("09:30 阅读 40min\n10:10 阅读 20min"))
+        self.assertEqual(stats.parsed_lines, 4)
+        self.assertEqual(stats.total_minutes, 60)
+        self.assertEqual(dict(stats.activity_minutes), {"阅读": 60})
+        self.assertEqual([b.time for b in stats.blocks()], ["09:30", "10:10"])
+
+    def test_duplicate_lines_and_date_switch(self):
+        stats = IncrementalTimeStats("2024-03-20")
+        stats.update("09:30 阅读 40min\n09:30 阅读 40min")
+        self.assertEqual(stats.total_minutes, 80)
+        stats.update("09:30 阅读 40min")
+        self.assertEqual(stats.total_minutes, 40)
+        self.assertTrue(stats.update("", "2024-03-21"))
+        self.assertEqual(stats.total_minutes, 0)
+
+class TestTimeStatsEngine(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+        TimeBlockUtils.save_timeblock_df(self.data_dir, [
+            {"date": "2023-12-31", "time": "23:00", "activity": "睡觉", "duration": "8小时"},
+            {"date": "2024-01-01", "time": "09:30", "activity": "阅读", "duration": "40min"},
+            {"date": "2024-02-05", "time": "10:45", "activity": "阅读", "duration": "1小时20分钟"},
+        ])
+        self.engine = TimeStatsEngine.from_data_dir(self.data_dir)
+
+    def tearDown(self):
+        self.engine.close()
+        self.temp_dir.cleanup()
+
+    def test_group_by_period(self):
+        self.assertEqual(self.engine.by_day(), {"2023-12-31": 480, "2024-01-01": 40, "2024-02-05": 80})
+        self.assertEqual(self.engine.by_week(), {"2023-W52": 480, "2024-W01": 40, "2024-W06": 80})
+        self.assertEqual(self.engine.by_month(start="2024-01-01"), {"2024-01": 40, "2024-02": 80})
+        self.assertEqual(self.engine.by_year(), {"2023": 480, "2024": 120})
+        self.assertEqual(self.engine.by_activity(), {"睡觉": 480, "阅读": 120})
+
+    def test_by_hour_splits_blocks_across_hours(self):
+        hours = self.engine.by_hour()
+        self.assertEqual(sum(hours), 600)
+        self.assertEqual(hours[23], 60)
+        self.assertEqual(hours[0], 60)
+        self.assertEqual(hours[9], 30)
+        self.assertEqual(hours[10], 10 + 15)
+        self.assertEqual(hours[11], 60)
+        self.assertEqual(hours[12], 5)
+
+    def test_numpy_and_fallback_agree(self):
+        if load_numpy() is None:
+            self.skipTest("未安装 numpy")
+        rows = []
+        for i in range(200):
+            day = f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+            time = "早上" if i % 17 == 0 else f"{(i * 7) % 24:02d}:{(i * 13) % 60:02d}"
+            rows.append({"date": day, "time": time, "activity": f"活动{i % 5}", "duration": f"{(i * 37) % 300 + 5}min"})
+        data_dir = self.data_dir / "many"
+        data_dir.mkdir()
+        TimeBlockUtils.save_timeblock_df(data_dir, rows)
+        with TimeStatsEngine.from_data_dir(data_dir) as engine:
+            ranges = [(None, None), ("2024-03-01", "2024-08-15")]
+            fast = [(engine.by_period(p, *r), engine.by_hour(*r)) for r in ranges for p in engine.PERIODS]
+            with patch("time_tracker.core.stats.load_numpy", return_value=None):
+                slow = [(engine.by_period(p, *r), engine.by_hour(*r)) for r in ranges for p in engine.PERIODS]
+        self.assertEqual(fast, slow)
+        self.assertGreater(sum(fast[0][1]), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import tempfile
+import threading
+from pathlib import Path
+from ..core.models import TimeTrackerData, TaskItem
+from ..core.storage import DayFileStore, BackgroundWriter
+from ..core.fileio import atomic_open, atomic_write_text, check_fsync_policy
+from ..core.taskops import TaskOpsLog
+from ..core.manifest import DateManifest
+from ..core.analyzer import TimeBlockUtils
+from ..core.stats import TimeStatsEngine
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "2024-03-18.json"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_failed_write_keeps_old_content(self):
+        atomic_write_text(self.path, "旧内容", fsync='always')
+        with self.assertRaises(RuntimeError):
+            with atomic_open(self.path) as f:
+                f.write("写了一半")
+                raise RuntimeError("崩溃")
+        self.assertEqual(self.path.read_text(encoding='utf-8'), "旧内容")
+        self.assertEqual([p.name for p in self.path.parent.iterdir()], [self.path.name])
+
+    def test_fsync_policy(self):
+        self.assertEqual(check_fsync_policy('never'), 'never')
+        with self.assertRaises(ValueError):
+            check_fsync_policy('sometimes')
+
+class TestBackgroundWriter(unittest.TestCase):
+    def setUp(self):
+        self.writer = BackgroundWriter()
+
+    def tearDown(self):
+        self.writer.stop()
+
+    def test_coalesces_same_key(self):
+        gate = threading.Event()
+        done, results = [], []
+        self.writer.submit(gate.wait)  # 先占住写线程
+        for version in range(3):
+            self.writer.submit(lambda v=version: done.append(v), results.append, key="2024-03-18")
+        self.writer.submit(lambda: done.append("other"), key="2024-03-19")
+        gate.set()
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.assertEqual(done, [2, "other"])
+        self.assertEqual(results, [None, None, None])
+        self.assertEqual(self.writer.coalesced, 2)
+
+    def test_reports_errors_and_rejects_after_stop(self):
+        results = []
+        def job():
+            raise OSError("磁盘已满")
+        self.writer.submit(job, results.append)
+        self.writer.stop()
+        self.assertIsInstance(results[0], OSError)
+        with self.assertRaises(RuntimeError):
+            self.writer.submit(job)
+
+class TestDayFileStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = DayFileStore(Path(self.temp_dir.name), fsync='never')
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def test_save_day_later(self):
+        threads = []
+        for diary in ("第一版", "第二版"):
+            data = TimeTrackerData(date="2024-03-18", diary=diary, time_blocks="08:00 睡觉 8小时")
+            self.store.save_day_later(data, lambda error: threads.append(threading.current_thread()))
+        # load_day 会先等待排队中的写入
+        self.assertEqual(self.store.load_day("2024-03-18").diary, "第二版")
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual(self.store.manifest.get("2024-03-18")['minutes'], 480)
+
+    def test_removed_blocks_leave_the_stats(self):
+        self.store.save_day(TimeTrackerData(date="2024-03-20", time_blocks="08:00 睡觉 6小时\n09:00 读书 1小时"))
+        self.store.save_day(TimeTrackerData(date="2024-03-21", time_blocks="10:00 跑步 30min"))
+        TimeBlockUtils.compact_timeblock_df(self.store.data_dir)
+        self.store.save_day(TimeTrackerData(date="2024-03-20", time_blocks="08:00 睡觉 6小时"))
+        self.store.save_day(TimeTrackerData(date="2024-03-21", time_blocks=""))
+        with TimeStatsEngine.from_data_dir(self.store.data_dir, store=self.store) as engine:
+            self.assertEqual(engine.by_activity(), {"睡觉": 360})
+            self.assertEqual(engine.by_month(), {"2024-03": 360})
+        # 合并进分区后替换标记依然生效
+        TimeBlockUtils.compact_timeblock_df(self.store.data_dir)
+        rows = self.store.load_time_blocks()
+        self.assertEqual([(r['date'], r['activity']) for r in rows], [("2024-03-20", "睡觉")])
+
+    def test_task_toggles_are_logged_as_deltas(self):
+        date = "2024-03-18"
+        tasks = [TaskItem(f"任务{i}") for i in range(20)]
+        self.store.save_day(TimeTrackerData(date=date, tasks=[TaskItem(t.text) for t in tasks]))
+        day_file = self.store.day_path(date).read_bytes()
+        gate = threading.Event()
+        self.store.writer.submit(gate.wait)
+        for i, task in enumerate(tasks):
+            task.done = True
+            self.store.record_task_toggle(date, i, task, tasks)
+        gate.set()
+        self.store.flush()
+        # 二十次勾选合并成一次追加，日文件没有重写
+        self.assertEqual(self.store.writer.coalesced, 19)
+        self.assertEqual(self.store.day_path(date).read_bytes(), day_file)
+        self.assertEqual(len(TaskOpsLog.read(TaskOpsLog.path(self.store.data_dir, date))), 20)
+        self.assertEqual(self.store.manifest.get(date)['tasks_done'], 20)
+        self.assertEqual(DateManifest(self.store.data_dir).rebuild(), 1)
+        data = self.store.load_day(date)
+        self.assertTrue(all(t.done for t in data.tasks))
+        # 完整保存后增量日志被折叠
+        self.store.save_day(data)
+        self.assertFalse(TaskOpsLog.path(self.store.data_dir, date).exists())
+        self.assertTrue(all(t.done for t in self.store.load_day(date).tasks))
+
+class TestTaskOpsLog(unittest.TestCase):
+    def test_apply(self):
+        tasks = [TaskItem("写代码"), TaskItem("跑步"), TaskItem("读书")]
+        ops = [
+            {'index': 0, 'text': "写代码", 'done': True},
+            {'index': 0, 'text': "读书", 'done': True},  # 序号对不上时按内容查找
+            {'index': 5, 'text': "不存在", 'done': True},
+            {'index': 0, 'text': "写代码", 'done': False},
+        ]
+        self.assertEqual(TaskOpsLog.apply(tasks, ops), 3)
+        self.assertEqual([t.done for t in tasks], [False, False, True])
+
+    def test_torn_last_line(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = TaskOpsLog.path(tmp, "2024-03-18")
+            TaskOpsLog.append(path, [{'index': 0, 'text': "写代码", 'done': True}], fsync='never')
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write('{"index": 1, "te')
+            self.assertEqual(len(TaskOpsLog.read(path)), 1)
+            TaskOpsLog.append(path, [{'index': 1, 'text': "跑步", 'done': True}], fsync='never')
+            self.assertEqual([op['text'] for op in TaskOpsLog.read(path)], ["写代码", "跑步"])
@@ -1 +1,9 @@
- 
\ No newline at end of file
+import unittest
+from ..ui.widgets.custom_widgets import VirtualTaskList
+
+class TestVirtualTaskList(unittest.TestCase):
+    def test_clamp_first(self):
+        self.assertEqual(VirtualTaskList.clamp_first(0, 10, 3), 0)
+        self.assertEqual(VirtualTaskList.clamp_first(-2, 10, 500), 0)
+        self.assertEqual(VirtualTaskList.clamp_first(495, 10, 500), 490)
+        self.assertEqual(VirtualTaskList.clamp_first(500, 10, 500), 490)
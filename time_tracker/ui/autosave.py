@@ -0,0 +1,56 @@
+"""
+自动保存
+
+编辑时标记为脏，停止输入 delay_ms 后保存一次；一直在输入时最迟 max_delay_ms 也会保存。
+只依赖 after / after_cancel，不直接导入 tkinter。
+"""
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AutoSaver:
+    def __init__(self, scheduler, save, delay_ms=2000, max_delay_ms=30000, on_dirty=None):
+        self.scheduler = scheduler
+        self.save = save
+        self.delay_ms = delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.on_dirty = on_dirty
+        self.dirty = False
+        self._dirty_since = None
+        self._after_id = None
+
+    def mark_dirty(self, event=None):
+        """控件编辑时调用，可直接作为事件回调"""
+        now = time.monotonic()
+        if not self.dirty:
+            self.dirty = True
+            self._dirty_since = now
+            if self.on_dirty:
+                self.on_dirty()
+        waited_ms = (now - self._dirty_since) * 1000
+        delay = max(0, min(self.delay_ms, self.max_delay_ms - waited_ms))
+        self._cancel()
+        self._after_id = self.scheduler.after(int(delay), self._fire)
+
+    def mark_clean(self):
+        """已经保存（手动保存或切换日期）后调用，取消待执行的自动保存"""
+        self.dirty = False
+        self._dirty_since = None
+        self._cancel()
+
+    def _cancel(self):
+        if self._after_id is not None:
+            self.scheduler.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _fire(self):
+        self._after_id = None
+        if not self.dirty:
+            return
+        self.mark_clean()
+        try:
+            self.save()
+        except Exception as e:
+            logger.error(f"自动保存失败: {e}", exc_info=True)
@@ -0,0 +1,135 @@
+"""
+心情表情图
+
+每种心情按 (尺寸, 缩放) 只用 PIL 画一次，七个表情横向拼成一张 PNG 图集缓存到数据目录。
+之后的启动直接用 Tk 自带的 PNG 支持读取图集并裁剪，不再导入 PIL；
+切换模块、新建日期时复用已有的 PhotoImage，不做任何图像处理。
+"""
+import logging
+from pathlib import Path
+
+import tkinter as tk
+
+logger = logging.getLogger(__name__)
+
+MOODS = ('happy', 'smile', 'neutral', 'sad', 'angry', 'sleepy', 'think')
+ATLAS_VERSION = 1  # 绘制逻辑改变时加一，使旧图集失效
+
+
+def render_sprite(mood, size):
+    """用 PIL 画一个表情，返回 RGBA 的 Image"""
+    from PIL import Image, ImageDraw
+    img = Image.new('RGBA', (size, size), (255,255,255,0))
+    draw = ImageDraw.Draw(img)
+    w = max(1, round(size / 16))  # 32px 时线宽为 2
+    draw.ellipse((2,2,size-2,size-2), fill='#FFF', outline='#222', width=w)
+    if mood in MOODS:
+        draw.ellipse((size*0.28, size*0.38, size*0.38, size*0.48), fill='#222')
+        draw.ellipse((size*0.62, size*0.38, size*0.72, size*0.48), fill='#222')
+    if mood=='happy':
+        draw.arc((size*0.28, size*0.55, size*0.72, size*0.85), 0, 180, fill='#222', width=w)
+    elif mood=='smile':
+        draw.arc((size*0.32, size*0.60, size*0.68, size*0.80), 10, 170, fill='#222', width=w)
+    elif mood=='neutral':
+        draw.line((size*0.32, size*0.75, size*0.68, size*0.75), fill='#222', width=w)
+    elif mood=='sad':
+        draw.arc((size*0.32, size*0.75, size*0.68, size*0.95), 190, 350, fill='#222', width=w)
+    elif mood=='angry':
+        draw.arc((size*0.32, size*0.80, size*0.68, size*0.95), 200, 340, fill='#222', width=w)
+        draw.line((size*0.25, size*0.25, size*0.40, size*0.40), fill='#222', width=w)
+        draw.line((size*0.60, size*0.40, size*0.75, size*0.25), fill='#222', width=w)
+    elif mood=='sleepy':
+        draw.arc((size*0.32, size*0.80, size*0.68, size*0.95), 200, 340, fill='#222', width=w)
+        draw.line((size*0.28, size*0.45, size*0.38, size*0.45), fill='#222', width=w)
+        draw.line((size*0.62, size*0.45, size*0.72, size*0.45), fill='#222', width=w)
+    elif mood=='think':
+        draw.arc((size*0.32, size*0.80, size*0.68, size*0.95), 200, 340, fill='#222', width=w)
+        draw.ellipse((size*0.45, size*0.85, size*0.55, size*0.95), fill='#222')
+    return img
+
+
+def render_atlas(size):
+    """按 MOODS 的顺序横向拼接所有表情"""
+    from PIL import Image
+    atlas = Image.new('RGBA', (size * len(MOODS), size), (255,255,255,0))
+    for i, mood in enumerate(MOODS):
+        atlas.paste(render_sprite(mood, size), (i * size, 0))
+    return atlas
+
+
+class EmojiSprites:
+    """按 (心情, 像素尺寸) 缓存的 PhotoImage，整个窗口生命周期内共用"""
+
+    def __init__(self, master, cache_dir=None, size=32):
+        self.master = master
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.size = size
+        self._photos = {}
+        self._blank = {}
+
+    def scale(self):
+        """相对 96 DPI 的缩放倍数"""
+        try:
+            return round(float(self.master.tk.call('tk', 'scaling')) * 72 / 96, 2)
+        except tk.TclError:
+            return 1.0
+
+    def pixel_size(self):
+        return max(16, round(self.size * self.scale()))
+
+    def atlas_path(self, px):
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"emoji_atlas_v{ATLAS_VERSION}_{px}.png"
+
+    def blank(self):
+        """表情加载前使用的空白占位图"""
+        px = self.pixel_size()
+        if px not in self._blank:
+            self._blank[px] = tk.PhotoImage(master=self.master, width=px, height=px)
+        return self._blank[px]
+
+    def get(self, mood):
+        """已加载时返回表情图，否则返回 None（不会触发绘制）"""
+        return self._photos.get((mood, self.pixel_size()))
+
+    def loaded(self):
+        px = self.pixel_size()
+        return all((mood, px) in self._photos for mood in MOODS)
+
+    def load(self):
+        """确保当前尺寸的所有表情都可用：优先读缓存的图集，没有时用 PIL 绘制并写回"""
+        px = self.pixel_size()
+        if self.loaded():
+            return
+        atlas = self._read_atlas(px)
+        if atlas is None:
+            atlas = self._build_atlas(px)
+        for i, mood in enumerate(MOODS):
+            sprite = tk.PhotoImage(master=self.master, width=px, height=px)
+            sprite.tk.call(sprite, 'copy', atlas, '-from', i * px, 0, (i + 1) * px, px)
+            self._photos[(mood, px)] = sprite
+
+    def _read_atlas(self, px):
+        path = self.atlas_path(px)
+        if path is None or not path.exists():
+            return None
+        try:
+            return tk.PhotoImage(master=self.master, file=str(path))
+        except tk.TclError as e:
+            logger.warning(f"表情图集读取失败，重新绘制: {e}")
+            return None
+
+    def _build_atlas(self, px):
+        from PIL import ImageTk
+        image = render_atlas(px)
+        path = self.atlas_path(px)
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmpfile = path.with_name(path.name + '.tmp')
+                image.save(tmpfile, format='PNG')
+                tmpfile.replace(path)
+            except OSError as e:
+                logger.warning(f"表情图集缓存失败: {e}")
+        return ImageTk.PhotoImage(image, master=self.master)
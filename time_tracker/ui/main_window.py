@@ -1,21 +1,20 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, Toplevel
-import json
+from tkinter import messagebox, simpledialog, filedialog
 from datetime import datetime
-import os
+import queue
 import threading
-import sys
-import re
 from pathlib import Path
-import asyncio
-from PIL import Image, ImageDraw, ImageTk
-from typing import List
-from dataclasses import asdict
 import logging
 
 from ..core.models import TimeTrackerData, TaskItem
-from ..core.analyzer import TimeBlockUtils, NaturalLanguageParser
-from .widgets.custom_widgets import PlaceholderText, FluentButton, TaskItemFrame
+from ..core.analyzer import TimeBlockLineChecker
+from ..core.storage import get_storage_backend
+from ..core.export import export_markdown, parse_date_range
+from ..core.stats import IncrementalTimeStats, TimeStatsEngine
+from ..core.sentiment import SentimentWorker
+from .autosave import AutoSaver
+from .emoji import EmojiSprites
+from .widgets.custom_widgets import PlaceholderText, FluentButton, VirtualTaskList, TimeDistributionPanel
 
 logger = logging.getLogger(__name__)
 
@@ -31,20 +30,34 @@ class TimeTracker:
         self.current_date = datetime.now().strftime("%Y-%m-%d")
         self.data_dir = Path.cwd() / "data"
         self.data_dir.mkdir(exist_ok=True)
+        self.store = get_storage_backend(self.data_dir)
         self.data = TimeTrackerData(date=self.current_date)
+        self.time_stats = IncrementalTimeStats(self.current_date)
+        self.distribution_panel = None
+        self.history_window = None
+        self.search_window = None
+        self.search_results = []
         self.current_module = "today"
-        self.sentiment_analyzer = None
-        self.sentiment_thread = threading.Thread(target=self.load_sentiment_model, daemon=True)
-        self.sentiment_thread.start()
-        self.create_widgets()
-        self.load_data(self.current_date)
-        self.auto_save_interval = 300  # 5分钟
-        self.auto_save_task = None
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
-        self.root.after(100, self.start_auto_save)
+        # 情感分析、PIL 表情渲染都延迟到首屏之后或首次使用时再加载
+        self.sentiment_worker = None
+        # 后台线程不直接碰 Tk：结果（主线程上执行的回调）放进 ui_results，由 check_ui_results 轮询取出
+        self.ui_results = queue.Queue()
+        self.ui_polling = False
+        self.pending_tasks = 0
+        self.sprites = EmojiSprites(self.root, self.data_dir / "cache")
+        self.mood_buttons = {}
+        # 写盘在存储层的写后队列中进行，结果经 save_results 交回主线程
+        self.save_results = queue.Queue()
+        self.pending_writes = 0
+        self.saved_snapshot = None
+        self.autosaver = AutoSaver(self.root, lambda: self.save_data(auto=True), on_dirty=self.on_dirty)
         self.encourage_label = None
         self.last_encourage_count = 0
+        self.line_checker = TimeBlockLineChecker()
+        self.checked_line_count = 0
+        self.unsettled_lines = set()
+        self.create_widgets()
+        self.load_data(self.current_date)
         logger.info("TimeTracker 初始化完成")
 
     def create_widgets(self):
@@ -87,6 +100,27 @@ class TimeTracker:
             width=90
         )
         self.date_button.pack(side=tk.LEFT, padx=5)
+        self.stat_button = FluentButton(
+            self.button_frame,
+            text="时间分布",
+            command=self.show_time_distribution,
+            width=90
+        )
+        self.stat_button.pack(side=tk.LEFT, padx=5)
+        self.history_button = FluentButton(
+            self.button_frame,
+            text="历史统计",
+            command=self.show_history_stats,
+            width=90
+        )
+        self.history_button.pack(side=tk.LEFT, padx=5)
+        self.search_button = FluentButton(
+            self.button_frame,
+            text="搜索",
+            command=self.show_search,
+            width=90
+        )
+        self.search_button.pack(side=tk.LEFT, padx=5)
         self.status_label = tk.Label(
             self.root,
             textvariable=self.save_status,
@@ -113,79 +147,62 @@ class TimeTracker:
     def update_title(self):
         self.root.title(self.get_title())
 
-    def start_auto_save(self):
-        """启动自动保存"""
-        try:
-            if not self.auto_save_task:
-                self.auto_save_task = self.loop.create_task(self.async_auto_save_loop())
-            self.root.after(100, self.start_auto_save)
-        except Exception as e:
-            logger.error(f"自动保存启动失败: {e}", exc_info=True)
-
-    async def async_auto_save_loop(self):
-        """自动保存循环"""
-        while True:
-            try:
-                await asyncio.sleep(self.auto_save_interval)
-                self.save_data(auto=True)
-            except Exception as e:
-                logger.error(f"自动保存失败: {e}", exc_info=True)
-                await asyncio.sleep(60)  # 出错后等待1分钟再试
+    def on_dirty(self):
+        self.save_status.set("未保存")
+        self.update_title()
 
     def choose_date(self):
         date = simpledialog.askstring("选择日期", "请输入日期 (YYYY-MM-DD)：", initialvalue=self.current_date)
         if date:
             try:
                 datetime.strptime(date, "%Y-%m-%d")
-                self.save_data()
-                self.current_date = date
-                self.load_data(self.current_date)
-                self.save_status.set("未保存")
-                self.update_title()
+                self.go_to_date(date)
             except ValueError:
                 messagebox.showerror("错误", "日期格式不正确！")
 
+    def go_to_date(self, date):
+        self.save_data()
+        self.current_date = date
+        self.load_data(self.current_date)
+        self.save_status.set("未保存")
+        self.update_title()
+
     def load_data(self, date):
-        filename = self.data_dir / f"{date}.json"
-        if filename.exists():
-            try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    d = json.load(f)
-                    d['tasks'] = [TaskItem(**t) for t in d.get('tasks',[])]
-                    self.data = TimeTrackerData(**d)
-            except Exception as e:
-                messagebox.showerror("错误", f"加载数据失败: {str(e)}")
-                self.data = TimeTrackerData(date=date)
-        else:
+        self.saved_snapshot = None
+        try:
+            data = self.store.load_day(date)
+            if data is not None:
+                self.saved_snapshot = self.store.to_dict(data)
+            self.data = data or TimeTrackerData(date=date)
+        except Exception as e:
+            messagebox.showerror("错误", f"加载数据失败: {str(e)}")
             self.data = TimeTrackerData(date=date)
         self.refresh_ui_from_data()
 
     def refresh_ui_from_data(self):
         if hasattr(self, 'time_blocks_text') and self.time_blocks_text.winfo_exists():
             self.time_blocks_text.set_value(self.data.time_blocks)
+            # 刚载入的内容只标出错误行，不改写用户保存过的文字
+            self.check_time_blocks(full=True, include_cursor=True, normalize=False)
         if hasattr(self, 'diary_text') and self.diary_text.winfo_exists():
             self.diary_text.set_value(self.data.diary)
-        if hasattr(self, 'tasks_frame') and self.tasks_frame.winfo_exists():
-            for widget in self.tasks_frame.winfo_children():
-                widget.destroy()
-            for task in self.data.tasks:
-                self.add_task_item(task.text, task.done)
+            # 已有的字数不再触发鼓励
+            self.last_encourage_count = self.diary_text.char_count() // 50
+        if hasattr(self, 'task_list') and self.task_list.winfo_exists():
+            self.task_list.set_tasks(self.data.tasks)
         if hasattr(self, 'mood_var'):
             self.mood_var.set(self.data.mood)
         self.update_time_stat()
         self.update_title()
+        self.autosaver.mark_clean()
 
     def update_data_from_ui(self):
         if hasattr(self, 'time_blocks_text') and self.time_blocks_text.winfo_exists():
             self.data.time_blocks = self.time_blocks_text.get_value()
         if hasattr(self, 'diary_text') and self.diary_text.winfo_exists():
             self.data.diary = self.diary_text.get_value()
-        if hasattr(self, 'tasks_frame') and self.tasks_frame.winfo_exists():
-            tasks = []
-            for widget in self.tasks_frame.winfo_children():
-                if isinstance(widget, TaskItemFrame):
-                    tasks.append(widget.get())
-            self.data.tasks = tasks
+        if hasattr(self, 'task_list') and self.task_list.winfo_exists():
+            self.data.tasks = self.task_list.get_tasks()
         if hasattr(self, 'mood_var'):
             self.data.mood = self.mood_var.get()
 
@@ -224,37 +241,112 @@ class TimeTracker:
         self.update_title()
 
     def save_data(self, auto=False):
+        """把当前内容交给后台写线程；与上次保存相比没有变化时跳过"""
         self.update_data_from_ui()
-        filename = self.data_dir / f"{self.current_date}.json"
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                d = asdict(self.data)
-                d['tasks'] = [asdict(t) for t in self.data.tasks]
-                json.dump(d, f, ensure_ascii=False, indent=4)
-            if self.data.time_blocks.strip():
-                rows = TimeBlockUtils.parse_time_blocks(self.data.time_blocks, self.current_date)
-                TimeBlockUtils.save_timeblock_df(self.data_dir, rows)
-            if not auto:
-                self.save_status.set("已保存")
-            else:
-                self.save_status.set("自动保存")
-        except Exception as e:
-            messagebox.showerror("错误", f"保存数据失败: {str(e)}")
-            self.save_status.set("保存失败")
+        self.data.date = self.current_date
+        self.autosaver.mark_clean()
+        snapshot = self.store.to_dict(self.data)
+        if snapshot != self.saved_snapshot:
+            self.saved_snapshot = snapshot
+            data = self.store.from_dict(snapshot)  # 与界面对象脱钩的副本
+            self.store.save_day_later(data, self.track_write(auto))
+        elif not auto:
+            self.save_status.set("已保存")
         self.update_title()
         self.update_time_stat()
-        if not auto and self.sentiment_analyzer:
+        if not auto:
             diary = self.data.diary.strip()
             if diary:
-                threading.Thread(target=self.analyze_diary_sentiment, args=(diary,), daemon=True).start()
+                self.request_sentiment(diary)
 
-    def analyze_diary_sentiment(self, text):
-        try:
-            result = self.sentiment_analyzer(text[:512])[0]
-            if result['label'] == 'NEGATIVE' and result['score'] > 0.7:
-                self.show_encourage_message("检测到你今天心情不佳，记得多关心自己，明天会更好！")
-        except Exception:
-            pass
+    def track_write(self, auto=False):
+        """登记一次后台写入，返回交给写线程的完成回调"""
+        self.pending_writes += 1
+        if self.pending_writes == 1:
+            self.root.after(50, self.check_save_results)
+        return lambda error: self.save_results.put((error, auto))
+
+    def check_save_results(self):
+        """在主线程处理写线程的结果，只在有写入未完成时轮询"""
+        while True:
+            try:
+                error, auto = self.save_results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending_writes -= 1
+            self.on_saved(error, auto)
+        if self.pending_writes:
+            self.root.after(50, self.check_save_results)
+
+    def on_saved(self, error, auto):
+        if error is not None:
+            self.saved_snapshot = None  # 下次保存时重试
+            self.save_status.set("保存失败")
+            messagebox.showerror("错误", f"保存数据失败: {str(error)}")
+        elif not self.autosaver.dirty:
+            self.save_status.set("自动保存" if auto else "已保存")
+        self.update_title()
+
+    def request_sentiment(self, diary):
+        """交给常驻的情感分析线程，后端默认是内置中文词典，见 core.sentiment"""
+        if self.sentiment_worker is None:
+            self.sentiment_worker = SentimentWorker(self.data_dir, on_result=self.on_sentiment_result)
+        self.sentiment_worker.submit(self.current_date, diary)
+        self.start_ui_poll()
+
+    def on_sentiment_result(self, date, result):
+        # 在工作线程中回调，交给主线程的轮询处理
+        self.ui_results.put(lambda: self.show_sentiment_result(date, result))
+
+    def start_ui_poll(self):
+        if not self.ui_polling:
+            self.ui_polling = True
+            self.root.after(50, self.check_ui_results)
+
+    def run_in_background(self, work, on_done, error_msg):
+        """在后台线程执行 work，成功后在主线程调用 on_done(结果)，失败时弹出 error_msg"""
+        self.pending_tasks += 1
+        self.start_ui_poll()
+
+        def worker():
+            try:
+                result = work()
+                callback = lambda: on_done(result)
+            except Exception as e:
+                logger.error(f"{error_msg}: {e}", exc_info=True)
+                msg = f"{error_msg}: {str(e)}"
+                callback = lambda: messagebox.showerror("错误", msg)
+            self.ui_results.put(lambda: self.finish_task(callback))
+        threading.Thread(target=worker, daemon=True).start()
+
+    def finish_task(self, callback):
+        self.pending_tasks -= 1
+        callback()
+
+    def ui_busy(self):
+        if self.pending_tasks:
+            return True
+        return self.sentiment_worker is not None and not self.sentiment_worker.wait_idle(0)
+
+    def check_ui_results(self):
+        """在主线程执行后台线程交回的回调，只在还有后台任务时轮询"""
+        # 先判断是否空闲再取队列：空闲时回调都已入队，取完即可停止轮询
+        busy = self.ui_busy()
+        while True:
+            try:
+                callback = self.ui_results.get_nowait()
+            except queue.Empty:
+                break
+            callback()
+        self.ui_polling = busy
+        if busy:
+            self.root.after(50, self.check_ui_results)
+
+    def show_sentiment_result(self, date, result):
+        if date != self.current_date:
+            return
+        if result['label'] == 'NEGATIVE' and result['score'] > 0.7:
+            self.show_encourage_message("检测到你今天心情不佳，记得多关心自己，明天会更好！")
 
     def show_encourage_message(self, msg_or_count):
         if isinstance(msg_or_count, int):
@@ -268,64 +360,44 @@ class TimeTracker:
         self.root.after(2000, lambda: self.encourage_label.destroy() if self.encourage_label and self.encourage_label.winfo_exists() else None)
 
     def export_md(self):
-        self.save_data()
-        tasks_md = "\n".join([f"- [{'x' if t.done else ' '}] {t.text}" for t in self.data.tasks])
-        md_content = f"""# {self.current_date} 时间记录\n\n## 时间块\n{self.data.time_blocks}\n\n## 今日总结\n{self.data.diary}\n\n## 今日待办\n{tasks_md}\n\n## 心情\n{self.data.mood}\n"""
-        filename = self.data_dir / f"{self.current_date}.md"
+        """导出一段日期为 Markdown（单个文件或 zip），读取和写出在后台线程进行"""
+        text = simpledialog.askstring(
+            "导出", "导出范围：单个日期、起止日期（如 2025-01-01~2025-12-31）或 all：", initialvalue=self.current_date)
+        if not text:
+            return
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(md_content)
-            if sys.platform.startswith('win'):
-                os.startfile(str(self.data_dir))
-            elif sys.platform.startswith('darwin'):
-                os.system(f'open "{self.data_dir}"')
-            else:
-                os.system(f'xdg-open "{self.data_dir}"')
-            messagebox.showinfo("成功", f"已导出到 {filename}")
-        except Exception as e:
-            messagebox.showerror("错误", f"导出Markdown失败: {str(e)}")
+            start, end = parse_date_range(text)
+        except ValueError:
+            messagebox.showerror("错误", "导出范围格式不正确！")
+            return
+        name = start if start == end else f"{start or 'all'}_{end or 'all'}"
+        filename = filedialog.asksaveasfilename(
+            title="导出到", initialdir=str(self.data_dir), initialfile=f"{name}.md", defaultextension=".md",
+            filetypes=[("Markdown", "*.md"), ("Zip 压缩包", "*.zip")])
+        if not filename:
+            return
+        # 屏幕上未保存的修改也要导出；内容没变时 save_data 不会重写文件
+        self.save_data()
+
+        self.run_in_background(
+            lambda: export_markdown(self.store, Path(filename), start=start, end=end, fsync=self.store.fsync),
+            lambda days: messagebox.showinfo("成功", f"已导出 {days} 天到 {filename}"),
+            "导出Markdown失败")
 
     def on_close(self):
         """关闭窗口时的处理"""
         try:
-            if self.auto_save_task:
-                self.auto_save_task.cancel()
-            if self.loop.is_running():
-                self.loop.stop()
             self.save_data()
+            # 保证排队中的保存全部落盘后再退出
+            self.store.close()
+            self.check_save_results()
+            if self.sentiment_worker:
+                self.sentiment_worker.stop()
             self.root.destroy()
         except Exception as e:
             logger.error(f"关闭窗口时出错: {e}", exc_info=True)
             self.root.destroy()
 
-    def create_emoji_image(self, mood, size=32):
-        img = Image.new('RGBA', (size, size), (255,255,255,0))
-        draw = ImageDraw.Draw(img)
-        draw.ellipse((2,2,size-2,size-2), fill='#FFF', outline='#222', width=2)
-        if mood in ['happy','smile','neutral','sad','angry','sleepy','think']:
-            draw.ellipse((size*0.28, size*0.38, size*0.38, size*0.48), fill='#222')
-            draw.ellipse((size*0.62, size*0.38, size*0.72, size*0.48), fill='#222')
-        if mood=='happy':
-            draw.arc((size*0.28, size*0.55, size*0.72, size*0.85), 0, 180, fill='#222', width=2)
-        elif mood=='smile':
-            draw.arc((size*0.32, size*0.60, size*0.68, size*0.80), 10, 170, fill='#222', width=2)
-        elif mood=='neutral':
-            draw.line((size*0.32, size*0.75, size*0.68, size*0.75), fill='#222', width=2)
-        elif mood=='sad':
-            draw.arc((size*0.32, size*0.75, size*0.68, size*0.95), 190, 350, fill='#222', width=2)
-        elif mood=='angry':
-            draw.arc((size*0.32, size*0.80, size*0.68, size*0.95), 200, 340, fill='#222', width=2)
-            draw.line((size*0.25, size*0.25, size*0.40, size*0.40), fill='#222', width=2)
-            draw.line((size*0.60, size*0.40, size*0.75, size*0.25), fill='#222', width=2)
-        elif mood=='sleepy':
-            draw.arc((size*0.32, size*0.80, size*0.68, size*0.95), 200, 340, fill='#222', width=2)
-            draw.line((size*0.28, size*0.45, size*0.38, size*0.45), fill='#222', width=2)
-            draw.line((size*0.62, size*0.45, size*0.72, size*0.45), fill='#222', width=2)
-        elif mood=='think':
-            draw.arc((size*0.32, size*0.80, size*0.68, size*0.95), 200, 340, fill='#222', width=2)
-            draw.ellipse((size*0.45, size*0.85, size*0.55, size*0.95), fill='#222')
-        return ImageTk.PhotoImage(img)
-
     def init_today_module(self):
         for widget in self.main_frame.winfo_children():
             widget.destroy()
@@ -336,11 +408,15 @@ class TimeTracker:
             width=50
         )
         self.time_blocks_text.pack(padx=5, pady=5, fill=tk.X)
+        self.time_blocks_text.tag_configure('invalid', background="#FFE0E0", underline=True)
+        self.time_blocks_text.bind("<<ContentChanged>>", self.on_time_blocks_changed)
+        self.time_blocks_text.bind("<FocusOut>", lambda e: self.check_time_blocks(include_cursor=True), add='+')
         self.mood_var = tk.StringVar()
+        self.mood_var.trace_add('write', lambda *args: self.autosaver.mark_dirty())
         mood_frame = tk.Frame(self.main_frame, bg=self.bg_color)
         mood_frame.pack(pady=2)
         tk.Label(mood_frame, text="今日心情：", bg=self.bg_color).pack(side=tk.LEFT)
-        self.emoji_imgs = {}
+        self.mood_buttons = {}
         emoji_map = [
             ('happy', '开心'),
             ('smile', '微笑'),
@@ -350,11 +426,13 @@ class TimeTracker:
             ('sleepy', '困倦'),
             ('think', '思考')
         ]
+        # 表情图已缓存时直接复用；首次启动先用空白占位图完成首屏，空闲时再加载
+        px = self.sprites.pixel_size()
         for mood, label in emoji_map:
-            img = self.create_emoji_image(mood)
-            self.emoji_imgs[mood] = img
-            b = tk.Radiobutton(mood_frame, image=img, variable=self.mood_var, value=mood, indicatoron=0, width=36, height=36, bg=self.bg_color, selectcolor='#ddd')
+            image = self.sprites.get(mood) or self.sprites.blank()
+            b = tk.Radiobutton(mood_frame, image=image, variable=self.mood_var, value=mood, indicatoron=0, width=px + 4, height=px + 4, bg=self.bg_color, selectcolor='#ddd')
             b.pack(side=tk.LEFT, padx=2)
+            self.mood_buttons[mood] = b
             b_tip = tk.Label(mood_frame, text=label, bg=self.bg_color, font=("微软雅黑", 8))
             b_tip.pack(side=tk.LEFT, padx=(0,8))
         self.diary_text = PlaceholderText(
@@ -364,12 +442,25 @@ class TimeTracker:
             width=50
         )
         self.diary_text.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
-        self.diary_text.bind("<KeyRelease>", self.on_diary_typing)
+        self.diary_text.bind("<<ContentChanged>>", self.on_diary_changed)
         self.last_encourage_count = 0
+        if not self.sprites.loaded():
+            self.root.after(50, self.load_emoji_images)
+
+    def load_emoji_images(self):
+        try:
+            self.sprites.load()
+        except Exception as e:
+            logger.error(f"表情图加载失败: {e}", exc_info=True)
+            return
+        for mood, button in self.mood_buttons.items():
+            if button.winfo_exists():
+                button.configure(image=self.sprites.get(mood))
 
-    def on_diary_typing(self, event=None):
-        text = self.diary_text.get_value()
-        count = len(text)
+    def on_diary_changed(self, event=None):
+        """日记内容变化（已合并，每秒最多几次）"""
+        self.autosaver.mark_dirty()
+        count = self.diary_text.char_count()
         if count // 50 > self.last_encourage_count:
             self.last_encourage_count = count // 50
             self.show_encourage_message(self.last_encourage_count * 50)
@@ -380,8 +471,8 @@ class TimeTracker:
         for widget in self.main_frame.winfo_children():
             widget.destroy()
         tk.Label(self.main_frame, text="今日待办", bg=self.bg_color, font=("微软雅黑", 12, "bold")).pack(anchor="w")
-        self.tasks_frame = tk.Frame(self.main_frame, bg=self.bg_color)
-        self.tasks_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.task_list = VirtualTaskList(self.main_frame, on_toggle=self.on_task_toggled, bg=self.bg_color)
+        self.task_list.pack(fill=tk.BOTH, expand=True, pady=5)
         add_task_frame = tk.Frame(self.main_frame, bg=self.bg_color)
         add_task_frame.pack(pady=2)
         self.new_task_var = tk.StringVar()
@@ -405,81 +496,174 @@ class TimeTracker:
     def add_task_item(self, text, done, clear=False):
         if not text or text == "输入今日任务，回车添加":
             return
-        item = TaskItem(text, done)
-        frame_item = TaskItemFrame(self.tasks_frame, item, on_toggle=self.save_data)
-        frame_item.pack(anchor="w", pady=2, fill=tk.X)
+        self.task_list.append(TaskItem(text, done))
         if clear:
             self.new_task_var.set("")
+            self.autosaver.mark_dirty()
+
+    def on_task_toggled(self, index, task):
+        """勾选只追加一条增量记录，不触发完整保存"""
+        self.data.tasks = self.task_list.get_tasks()
+        self.store.record_task_toggle(self.current_date, index, task, self.data.tasks, self.track_write())
 
     def validate_time_blocks(self):
+        """切换模块、新建日期前的最终检查，有格式错误的行时提示并返回 False"""
         if self.current_module != "today":
             return True
-        lines = self.time_blocks_text.get_value().splitlines()
-        parsed = None
-        for idx, line in enumerate(lines):
-            if line.strip() == "":
-                continue
-            std_line = line.strip()
-            parsed = NaturalLanguageParser.parse_natural_timeblock(std_line)
-            if parsed:
-                lines[idx] = parsed
-                std_line = parsed
-            parts = std_line.split()
-            match parts:
-                case [time, *activity, duration] if (
-                    (len(time.replace(':', '').replace(' ', '')) == 4 and ':' in time)
-                    or (len(time.replace(':', '').replace(' ', '')) == 4 and time.count(':') == 1)
-                ) and (
-                    duration.endswith('小时') or duration.endswith('min')
-                ):
-                    continue
-                case _:
-                    messagebox.showerror(
-                        "格式错误",
-                        f"第{idx+1}行时间块格式应为 'HH:MM 活动 时长' 或 'HH: MM 活动 时长'，如 08:00 睡觉 8小时 或 09:30 阅读 40min\n也支持自然语言如 '下午读了2小时书'"
-                    )
-                    return False
-        if parsed:
-            self.time_blocks_text.set_value('\n'.join(lines))
+        invalid = self.check_time_blocks(full=True, include_cursor=True)
+        if invalid:
+            self.time_blocks_text.see(f"{invalid[0]}.0")
+            messagebox.showerror(
+                "格式错误",
+                f"第{'、'.join(map(str, invalid))}行时间块格式应为 'HH:MM 活动 时长'，如 08:00 睡觉 8小时 或 09:30 阅读 40min\n也支持自然语言如 '下午读了2小时书'"
+            )
+            return False
         return True
 
+    def on_time_blocks_changed(self, event=None):
+        self.autosaver.mark_dirty()
+        self.check_time_blocks()
+
+    def check_time_blocks(self, full=False, include_cursor=False, normalize=True):
+        """增量校验时间块：只检查上次之后编辑过的行，错误行加 invalid 标记，
+        normalize 为 True 时自然语言行原地换成标准格式（内容有变，标记为待保存）。
+        光标所在的行还在输入，默认留到离开后再处理。返回所有错误行的行号。
+        """
+        text = self.time_blocks_text
+        if text.is_placeholder():
+            text.tag_remove('invalid', '1.0', tk.END)
+            text.take_edited_lines()
+            self.checked_line_count = 0
+            self.unsettled_lines = set()
+            return []
+        total = text.line_count()
+        edited = text.take_edited_lines()
+        if full or total != self.checked_line_count:
+            # 行数变化说明有换行或跨行的增删，行号整体错位，全部过一遍（内容没变的行命中缓存）
+            lines = range(1, total + 1)
+        else:
+            lines = sorted(edited | self.unsettled_lines)
+        self.checked_line_count = total
+        cursor = None if include_cursor else text.line_of('insert')
+        self.unsettled_lines = set()
+        replaced = False
+        for n in lines:
+            if n > total:
+                continue
+            text.tag_remove('invalid', f"{n}.0", f"{n}.end")
+            if n == cursor:
+                self.unsettled_lines.add(n)
+                continue
+            ok, normalized = self.line_checker.check(text.get(f"{n}.0", f"{n}.end"))
+            if normalized and normalize:
+                text.replace_line(n, normalized)
+                replaced = True
+            elif not ok:
+                text.tag_add('invalid', f"{n}.0", f"{n}.end")
+        if replaced:
+            # replace_line 不产生编辑事件，自动保存需要单独得知内容变了
+            self.autosaver.mark_dirty()
+        return sorted({text.line_of(start) for start in text.tag_ranges('invalid')[::2]})
+
     def update_time_stat(self):
-        total_min = 0
-        lines = self.data.time_blocks.splitlines()
-        time_blocks = []
-        for line in lines:
-            m = re.match(r"^(\d{2}): ?(\d{2}) .+ (\d+)小时$", line.strip())
-            if m:
-                mins = int(m.group(3)) * 60
-                total_min += mins
-                time_blocks.append((line.strip(), mins))
-            else:
-                m = re.match(r"^(\d{2}): ?(\d{2}) .+ (\d+)min$", line.strip())
-                if m:
-                    mins = int(m.group(3))
-                    total_min += mins
-                    time_blocks.append((line.strip(), mins))
+        changed = self.time_stats.update(self.data.time_blocks, self.current_date)
+        total_min = self.time_stats.total_minutes
         self.time_stat_label.config(text=f"今日已记录时长: {total_min}分钟")
-        self.draw_time_bar(time_blocks, total_min)
+        if changed:
+            self.draw_time_bar(self.time_stats.distribution(), total_min)
+
+    def draw_time_bar(self, distribution, total_min):
+        if self.distribution_panel is None or not self.distribution_panel.winfo_exists():
+            if total_min == 0 or not distribution:
+                return
+            self.distribution_panel = TimeDistributionPanel(self.root)
+        self.distribution_panel.update_distribution(distribution, total_min)
+
+    def show_time_distribution(self):
+        self.update_data_from_ui()
+        self.update_time_stat()
+        if self.distribution_panel is None or not self.distribution_panel.winfo_exists():
+            self.distribution_panel = TimeDistributionPanel(self.root)
+            self.distribution_panel.update_distribution(self.time_stats.distribution(), self.time_stats.total_minutes)
+        self.distribution_panel.show()
+
+    def show_history_stats(self):
+        """在后台线程汇总历史数据，完成后弹出统计窗口"""
+        def work():
+            with TimeStatsEngine.from_data_dir(self.data_dir, store=self.store) as engine:
+                return {
+                    'week': sorted(engine.by_week().items())[-8:],
+                    'month': sorted(engine.by_month().items())[-12:],
+                    'year': sorted(engine.by_year().items()),
+                    'activity': sorted(engine.by_activity().items(), key=lambda kv: -kv[1])[:10],
+                    'hour': engine.by_hour(),
+                }
+        self.run_in_background(work, self.draw_history_stats, "历史统计失败")
+
+    def draw_history_stats(self, report):
+        if self.history_window is None or not self.history_window.winfo_exists():
+            self.history_window = tk.Toplevel(self.root)
+            self.history_window.title("历史统计")
+            self.history_text = tk.Text(self.history_window, height=30, width=60)
+            self.history_text.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        sections = [
+            ("最近 8 周", report['week']),
+            ("最近 12 个月", report['month']),
+            ("每年", report['year']),
+            ("活动 Top 10", report['activity']),
+            ("各小时", [(f"{h:02d}时", mins) for h, mins in enumerate(report['hour']) if mins]),
+        ]
+        lines = []
+        for title, items in sections:
+            lines.append(f"## {title}")
+            lines.extend(f"{key}: {mins // 60}小时{mins % 60}分钟" for key, mins in items)
+            lines.append("")
+        self.history_text.config(state=tk.NORMAL)
+        self.history_text.delete(1.0, tk.END)
+        self.history_text.insert(1.0, "\n".join(lines))
+        self.history_text.config(state=tk.DISABLED)
+        self.history_window.deiconify()
+        self.history_window.lift()
+
+    def show_search(self):
+        if self.search_window is None or not self.search_window.winfo_exists():
+            self.search_window = tk.Toplevel(self.root)
+            self.search_window.title("搜索")
+            self.search_entry = tk.Entry(self.search_window, font=("微软雅黑", 12))
+            self.search_entry.pack(padx=10, pady=(10, 5), fill=tk.X)
+            self.search_entry.bind("<Return>", self.run_search)
+            self.search_list = tk.Listbox(self.search_window, height=20, width=80, font=("微软雅黑", 10))
+            self.search_list.pack(padx=10, pady=(0, 10), fill=tk.BOTH, expand=True)
+            self.search_list.bind("<Double-Button-1>", self.open_search_result)
+        self.search_window.deiconify()
+        self.search_window.lift()
+        self.search_entry.focus_set()
 
-    def draw_time_bar(self, time_blocks, total_min):
-        if total_min == 0 or not time_blocks:
+    def run_search(self, event=None):
+        """在后台线程查询；索引为空而已有历史数据时（升级前的旧数据）先全量建索引"""
+        query = self.search_entry.get().strip()
+        if not query:
             return
-        win = Toplevel(self.root)
-        win.title("今日时间分布")
-        text = tk.Text(win, height=20, width=60)
-        text.pack(padx=10, pady=10)
-        
-        for desc, mins in time_blocks:
-            percentage = (mins / total_min) * 100
-            bar = "█" * int(percentage / 2)
-            text.insert(tk.END, f"{desc}: {bar} {percentage:.1f}%\n")
-        
-        text.config(state=tk.DISABLED)
-
-    def load_sentiment_model(self):
-        try:
-            from transformers import pipeline
-            self.sentiment_analyzer = pipeline('sentiment-analysis', model='distilbert-base-uncased-finetuned-sst-2-english')
-        except Exception as e:
-            self.sentiment_analyzer = None 
\ No newline at end of file
+        self.save_data()  # 刚写的内容也能搜到
+
+        def work():
+            if not len(self.store.search_index) and self.store.dates():
+                self.store.rebuild_search_index()
+            return self.store.search(query)
+        self.run_in_background(work, self.show_search_results, "搜索失败")
+
+    def show_search_results(self, results):
+        if self.search_window is None or not self.search_window.winfo_exists():
+            return
+        self.search_results = results
+        self.search_list.delete(0, tk.END)
+        for result in results:
+            self.search_list.insert(tk.END, f"{result['date']}  {result['snippet']}")
+        if not results:
+            self.search_list.insert(tk.END, "没有找到匹配的记录")
+
+    def open_search_result(self, event=None):
+        """双击结果跳转到那一天"""
+        selection = self.search_list.curselection()
+        if selection and selection[0] < len(self.search_results):
+            self.go_to_date(self.search_results[selection[0]]['date'])
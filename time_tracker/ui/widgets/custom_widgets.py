@@ -1,28 +1,81 @@
 import tkinter as tk
-from PIL import Image, ImageDraw, ImageTk
+
+from ...core.models import TaskItem
 
 class PlaceholderText(tk.Text):
-    def __init__(self, master=None, placeholder="", color="#cccccc", **kwargs):
+    """带占位提示的多行文本框
+
+    用户的编辑经 <<Modified>> 合并，每 throttle_ms 最多触发一次 <<ContentChanged>> 虚拟事件；
+    set_value 和占位提示的显示/清除不会触发。char_count 由 Tk 计数，不复制整段文字；
+    take_edited_lines 返回上次取走之后光标编辑过的行号，供增量处理。
+    """
+
+    def __init__(self, master=None, placeholder="", color="#cccccc", throttle_ms=250, **kwargs):
         super().__init__(master, **kwargs)
         self.placeholder = placeholder
         self.placeholder_color = color
         self.default_fg_color = self['fg'] if 'fg' in kwargs else "#000000"
+        self.throttle_ms = throttle_ms
+        self._change_after = None
+        self._edited_lines = set()
         self.bind("<FocusIn>", self._clear_placeholder)
         self.bind("<FocusOut>", self._show_placeholder)
+        self.bind("<<Modified>>", self._on_modified)
         self._show_placeholder()
 
     def _show_placeholder(self, event=None):
         if not self.get(1.0, tk.END).strip():
             self.insert(1.0, self.placeholder)
             self['fg'] = self.placeholder_color
+            self.edit_modified(False)
 
     def _clear_placeholder(self, event=None):
         if self['fg'] == self.placeholder_color:
             self.delete(1.0, tk.END)
             self['fg'] = self.default_fg_color
+            self.edit_modified(False)
+
+    def _on_modified(self, event=None):
+        # 修改标志已被程序复位（set_value 等），说明不是用户编辑
+        if not self.edit_modified():
+            return
+        self.edit_modified(False)
+        self._edited_lines.add(self.line_of('insert'))
+        if self._change_after is None:
+            self._change_after = self.after(self.throttle_ms, self._emit_change)
+
+    def _emit_change(self):
+        self._change_after = None
+        if self.winfo_exists():
+            self.event_generate("<<ContentChanged>>")
+
+    def line_of(self, index):
+        return int(self.index(index).split('.')[0])
+
+    def line_count(self):
+        return self.line_of('end-1c')
+
+    def take_edited_lines(self):
+        lines, self._edited_lines = self._edited_lines, set()
+        return lines
+
+    def replace_line(self, lineno, text):
+        """原地替换一行内容，不算作用户编辑"""
+        self.delete(f"{lineno}.0", f"{lineno}.end")
+        self.insert(f"{lineno}.0", text)
+        self.edit_modified(False)
+
+    def is_placeholder(self):
+        return self['fg'] == self.placeholder_color
+
+    def char_count(self):
+        """当前字数（含空白），占位提示时为 0"""
+        if self.is_placeholder():
+            return 0
+        return int(self.tk.call(self._w, 'count', '-chars', '1.0', 'end-1c'))
 
     def get_value(self):
-        if self['fg'] == self.placeholder_color:
+        if self.is_placeholder():
             return ""
         return self.get(1.0, tk.END).strip()
 
@@ -33,6 +86,7 @@ class PlaceholderText(tk.Text):
             self['fg'] = self.default_fg_color
         else:
             self._show_placeholder()
+        self.edit_modified(False)
 
 class FluentButton(tk.Canvas):
     def __init__(self, master, text, command=None, width=90, height=36, radius=18, bg='#F5F5F5', fg='#222', font=("微软雅黑", 12), **kwargs):
@@ -99,4 +153,175 @@ class TaskItemFrame(tk.Frame):
         self.label['text'] = text
         self.var.set(done)
         self.task.text = text
-        self.task.done = done 
\ No newline at end of file
+        self.task.done = done 
+
+    def show_task(self, task):
+        """改为显示另一个任务（行控件复用时调用），不修改任务本身"""
+        self.task = task
+        self.label['text'] = task.text
+        self.var.set(task.done)
+
+
+class VirtualTaskList(tk.Frame):
+    """虚拟化的任务列表
+
+    只创建填满可视区域所需的几行 TaskItemFrame，滚动或数据变化时把这些行重新绑定到
+    对应的任务上，不会为每个任务创建控件；勾选某一项只改动该行。
+    on_toggle(index, task) 在勾选后回调。
+    """
+
+    def __init__(self, master, on_toggle=None, row_height=28, rows=10, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_toggle = on_toggle
+        self.row_height = row_height
+        self.tasks = []
+        self.first = 0
+        self._rows = []
+        self.body = tk.Frame(self, bg=self['bg'], height=row_height * rows)
+        self.body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.body.bind('<Configure>', lambda e: self.render())
+        self._bind_wheel(self.body)
+
+    @staticmethod
+    def clamp_first(first, visible, total):
+        """第一行的下标限制在 [0, total - visible]"""
+        return max(0, min(first, total - visible))
+
+    def visible_count(self):
+        return max(1, self.body.winfo_height() // self.row_height)
+
+    def _bind_wheel(self, widget):
+        widget.bind('<MouseWheel>', lambda e: self.yview('scroll', -1 if e.delta > 0 else 1, 'units'))
+        widget.bind('<Button-4>', lambda e: self.yview('scroll', -1, 'units'))
+        widget.bind('<Button-5>', lambda e: self.yview('scroll', 1, 'units'))
+
+    def _row(self, slot):
+        while len(self._rows) <= slot:
+            row = TaskItemFrame(self.body, TaskItem(""))
+            row.index = None
+            row.on_toggle = lambda row=row: self._toggled(row)
+            for widget in (row, row.cb, row.label):
+                self._bind_wheel(widget)
+            self._rows.append(row)
+        return self._rows[slot]
+
+    def _toggled(self, row):
+        if self.on_toggle and row.index is not None:
+            self.on_toggle(row.index, row.task)
+
+    def render(self):
+        """把行控件绑定到当前可见的任务上，多余的行隐藏"""
+        total = len(self.tasks)
+        visible = self.visible_count()
+        self.first = self.clamp_first(self.first, visible, total)
+        # 最后一行可能只露出一部分，多绑定一行
+        slots = min(total - self.first, -(-self.body.winfo_height() // self.row_height))
+        for slot in range(max(slots, 0)):
+            row = self._row(slot)
+            row.index = self.first + slot
+            row.show_task(self.tasks[row.index])
+            row.place(x=0, y=slot * self.row_height, relwidth=1, height=self.row_height)
+        for row in self._rows[max(slots, 0):]:
+            row.index = None
+            row.place_forget()
+        if total:
+            self.scrollbar.set(self.first / total, min(self.first + visible, total) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        total = len(self.tasks)
+        if args[0] == 'moveto':
+            self.first = round(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            step = self.visible_count() if args[2] == 'pages' else 1
+            self.first += int(args[1]) * step
+        self.render()
+
+    def set_tasks(self, tasks):
+        self.tasks = list(tasks)
+        self.first = 0
+        self.render()
+
+    def append(self, task):
+        """追加一个任务并滚动到末尾"""
+        self.tasks.append(task)
+        self.first = len(self.tasks)
+        self.render()
+
+    def get_tasks(self):
+        return list(self.tasks)
+
+class TimeDistributionCanvas(tk.Canvas):
+    """按活动汇总的时间分布条形图
+
+    每一行的文字、色条和百分比是固定的 canvas item，刷新时只改坐标和文字，
+    多余的行隐藏而不销毁；超过 max_rows 的活动合并为“其他”，重绘开销有上界。
+    """
+
+    def __init__(self, master, width=420, row_height=24, max_rows=12, bar_color='#4A90D9', **kwargs):
+        super().__init__(master, width=width, height=row_height, bg='#FFFFFF', highlightthickness=0, **kwargs)
+        self.canvas_width = width
+        self.row_height = row_height
+        self.max_rows = max_rows
+        self.bar_color = bar_color
+        self.label_width = 110
+        self.percent_width = 60
+        self._rows = []
+
+    def _row_items(self, index):
+        while len(self._rows) <= index:
+            y = len(self._rows) * self.row_height + self.row_height // 2
+            self._rows.append((
+                self.create_text(4, y, anchor='w', font=("微软雅黑", 10)),
+                self.create_rectangle(0, 0, 0, 0, fill=self.bar_color, outline=''),
+                self.create_text(self.canvas_width - 4, y, anchor='e', font=("微软雅黑", 9)),
+            ))
+        return self._rows[index]
+
+    def update_distribution(self, distribution, total):
+        """distribution 为按时长降序的 (活动, 分钟数)"""
+        if len(distribution) > self.max_rows:
+            rest = sum(mins for _, mins in distribution[self.max_rows - 1:])
+            distribution = list(distribution[:self.max_rows - 1]) + [("其他", rest)]
+        bar_left = self.label_width
+        bar_max = self.canvas_width - self.label_width - self.percent_width
+        for index, (activity, mins) in enumerate(distribution):
+            label, bar, percent = self._row_items(index)
+            y = index * self.row_height
+            ratio = mins / total if total else 0
+            self.itemconfigure(label, text=activity, state='normal')
+            self.coords(bar, bar_left, y + 5, bar_left + max(int(bar_max * ratio), 1), y + self.row_height - 5)
+            self.itemconfigure(bar, state='normal')
+            self.itemconfigure(percent, text=f"{mins}分钟 {ratio * 100:.1f}%", state='normal')
+        for label, bar, percent in self._rows[len(distribution):]:
+            for item in (label, bar, percent):
+                self.itemconfigure(item, state='hidden')
+        self.configure(height=max(len(distribution), 1) * self.row_height)
+
+
+class TimeDistributionPanel(tk.Toplevel):
+    """常驻的时间分布窗口，关闭时只隐藏，之后原地刷新"""
+
+    def __init__(self, master, title="今日时间分布"):
+        super().__init__(master, bg='#FFFFFF')
+        self.title(title)
+        self.resizable(False, False)
+        self.summary_label = tk.Label(self, bg='#FFFFFF', font=("微软雅黑", 10))
+        self.summary_label.pack(padx=10, pady=(10, 0), anchor='w')
+        self.canvas = TimeDistributionCanvas(self)
+        self.canvas.pack(padx=10, pady=10)
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+
+    def update_distribution(self, distribution, total):
+        self.summary_label['text'] = f"共 {total} 分钟，{len(distribution)} 项活动"
+        self.canvas.update_distribution(distribution, total)
+
+    def is_visible(self):
+        return self.state() != 'withdrawn'
+
+    def show(self):
+        self.deiconify()
+        self.lift()